@@ -1,10 +1,11 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash
+from flask import Flask, Request, request, jsonify, render_template, redirect, url_for, session, flash
 from flask_cors import CORS
 from pymongo import MongoClient
 from pymongo.errors import ServerSelectionTimeoutError, ConnectionFailure
 import os
 import sys
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import HTTPException, Conflict, NotFound, UnsupportedMediaType
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
 import json
@@ -14,21 +15,7 @@ from functools import wraps
 import re
 import time
 import logging
-
-# PDF Processing imports
-import PyPDF2
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import PorterStemmer
-
-# Download required NLTK data (run once)
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    print("✅ NLTK data downloaded successfully")
-except Exception as e:
-    print(f"⚠️  NLTK download warning: {e}")
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,6 +24,25 @@ logger = logging.getLogger(__name__)
 # Add the backend directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from utils.pdf_processor import PDFProcessor
+from utils.document_preocessor import SUPPORTED_FORMATS
+from utils.job_queue import JobQueue
+from utils.ingestion import IngestionWorker
+from utils.uploads import save_and_hash, StreamingUploadWriter, ResumableUploads
+from utils.text_store import TextStore, make_snippet
+from utils.ocr import ocr_available
+from utils.compact_index import LiveCompactIndex
+from utils.index_events import ensure_index_events
+from utils.search_pipeline import aggregate_book_matches
+from utils.book_cache import get_book_cache, invalidate_book_metadata
+from utils.metadata_index import get_metadata_index
+from utils.bm25 import BM25Scorer
+from utils.page_ranker import PageRanker
+from utils.positional import MongoTermBooks, PositionalMatcher, restrict_to_pages
+from utils.query_language import QueryExecutor, parse_query
+from utils.query_planner import QueryPlanner, QueryTrace
+from utils.corpus_stats import CorpusStats, TermStatsMirror, ensure_corpus_stats
+
 # Basic configuration class
 class Config:
     MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://127.0.0.1:27017/')
@@ -44,101 +50,49 @@ class Config:
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'documents/uploads')
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-this-in-production')
+    # Resumable uploads are sent in chunks, so one file may exceed MAX_CONTENT_LENGTH
+    RESUMABLE_UPLOAD_FOLDER = os.environ.get('RESUMABLE_UPLOAD_FOLDER', 'documents/uploads/partial')
+    RESUMABLE_UPLOAD_MAX_SIZE = int(os.environ.get('RESUMABLE_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024))  # 2GB
+    UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024  # 8MB suggested chunk for resumable uploads
+    JOB_QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH', 'documents/jobs.sqlite3')
+    INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', 2))
+    PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', 1))
+    INDEX_BATCH_SIZE = int(os.environ.get('INDEX_BATCH_SIZE', 1000))
+    TEXT_STORE_FOLDER = os.environ.get('TEXT_STORE_FOLDER', 'documents/text_store')
+    # Tesseract processes per ingestion worker for pages without a text layer (0 disables OCR)
+    OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 2))
+    OCR_CACHE_PATH = os.environ.get('OCR_CACHE_PATH', 'documents/ocr_cache.sqlite3')
+    # 'compact' answers /search from an in-process index once loaded; 'mongo' always queries search_index
+    SEARCH_ENGINE = os.environ.get('SEARCH_ENGINE', 'compact')
+    INDEX_SYNC_INTERVAL = float(os.environ.get('INDEX_SYNC_INTERVAL', 2.0))
+    SEARCH_RESULT_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 100))
+    # 'bm25' ranks by BM25 over the index-time corpus statistics; 'matches' by raw match count
+    SEARCH_RANKING = os.environ.get('SEARCH_RANKING', 'bm25')
+    SEARCH_PAGES_PER_BOOK = int(os.environ.get('SEARCH_PAGES_PER_BOOK', 3))
+    # Plain terms in more than this share of the books are dropped from queries like stop words
+    SEARCH_STOPWORD_DF_RATIO = float(os.environ.get('SEARCH_STOPWORD_DF_RATIO', 0.9))
+    # Serve requests while MongoDB is reached in the background; logins wait for the outcome
+    LAZY_STARTUP = os.environ.get('LAZY_STARTUP', '1') == '1'
+
+class StreamingUploadRequest(Request):
+    """Streams document uploads straight into the upload folder instead of spooling them"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint != 'upload_document' or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in SUPPORTED_FORMATS:
+            raise UnsupportedMediaType('Only PDF, DOCX, HTML and TXT files are allowed.')
+        return StreamingUploadWriter(new_upload_path(filename), extension, app.config['MAX_CONTENT_LENGTH'])
 
 # Initialize Flask app
 app = Flask(__name__, template_folder='../frontend/templates', static_folder='../frontend/static')
+app.request_class = StreamingUploadRequest
 CORS(app)
 app.config.from_object(Config)
 app.secret_key = app.config['SECRET_KEY']
 
-# PDF Processing Class
-class PDFProcessor:
-    def __init__(self):
-        self.stemmer = PorterStemmer()
-        try:
-            self.stop_words = set(stopwords.words('english'))
-        except:
-            self.stop_words = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'])
-        print("✅ PDF Processor initialized")
-    
-    def extract_text_from_pdf(self, file_path):
-        """Extract text from PDF with page-level mapping"""
-        page_texts = {}
-        total_pages = 0
-        
-        try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    try:
-                        text = page.extract_text()
-                        page_texts[page_num] = text
-                    except Exception as e:
-                        print(f"Warning: Could not extract text from page {page_num}: {e}")
-                        page_texts[page_num] = ""
-                        
-        except Exception as e:
-            print(f"Error extracting PDF text: {e}")
-            return {}, 0
-            
-        return page_texts, total_pages
-    
-    def process_text_for_search(self, text):
-        """Process text for search indexing"""
-        if not text:
-            return []
-            
-        try:
-            # Convert to lowercase and tokenize
-            words = word_tokenize(text.lower())
-            
-            # Remove stop words and non-alphabetic tokens
-            processed_words = []
-            for word in words:
-                if (word.isalpha() and 
-                    len(word) > 2 and 
-                    word not in self.stop_words):
-                    # Apply stemming
-                    stemmed_word = self.stemmer.stem(word)
-                    processed_words.append(stemmed_word)
-            
-            return processed_words
-        except Exception as e:
-            print(f"Error processing text: {e}")
-            return []
-    
-    def create_search_index(self, book_id, page_texts):
-        """Create search index entries for the document"""
-        index_entries = []
-        
-        for page_num, text in page_texts.items():
-            if not text.strip():
-                continue
-                
-            processed_words = self.process_text_for_search(text)
-            
-            if not processed_words:
-                continue
-            
-            # Count word frequencies
-            word_freq = {}
-            for word in processed_words:
-                word_freq[word] = word_freq.get(word, 0) + 1
-            
-            # Create index entries
-            for word, frequency in word_freq.items():
-                index_entries.append({
-                    'word': word,
-                    'book_id': book_id,
-                    'page_number': page_num,
-                    'frequency': frequency,
-                    'position': processed_words.index(word) if word in processed_words else 0
-                })
-        
-        return index_entries
-
 # Enhanced database connection with comprehensive error handling
 def create_robust_database_connection(max_retries=3):
     """Create database connection with multiple fallback strategies"""
@@ -201,19 +155,43 @@ def create_robust_database_connection(max_retries=3):
     print("=" * 60)
     return None, None
 
-# Initialize database connection and PDF processor
-client, db = create_robust_database_connection()
+# Database connection is attached by attach_database() once it is reachable
+client, db = None, None
 pdf_processor = PDFProcessor()
 
+# Background ingestion queue (extraction and indexing run off the request path)
+job_queue = JobQueue(app.config['JOB_QUEUE_PATH'])
+ingestion_worker = IngestionWorker(
+    job_queue,
+    app.config['MONGODB_URI'],
+    app.config['DATABASE_NAME'],
+    max_workers=app.config['INGEST_WORKERS'],
+    extract_workers=app.config['PDF_EXTRACT_WORKERS'],
+    batch_size=app.config['INDEX_BATCH_SIZE'],
+    text_store_path=app.config['TEXT_STORE_FOLDER'],
+    ocr_workers=app.config['OCR_WORKERS'],
+    ocr_cache_path=app.config['OCR_CACHE_PATH']
+)
+text_store = TextStore(app.config['TEXT_STORE_FOLDER'])
+search_engine = LiveCompactIndex(sync_interval=app.config['INDEX_SYNC_INTERVAL'])
+term_stats = TermStatsMirror(sync_interval=app.config['INDEX_SYNC_INTERVAL'])
+resumable_uploads = ResumableUploads(app.config['RESUMABLE_UPLOAD_FOLDER'], app.config['RESUMABLE_UPLOAD_MAX_SIZE'])
+
 # Fallback User Management System
 class FallbackUserManager:
     """In-memory user management for when database is unavailable"""
     
+    # Hashed on first login rather than at startup; PBKDF2 is deliberately slow
+    DEFAULT_PASSWORDS = {
+        'admin': 'Admin@123',
+        'scientist': 'Scientist@123',
+        'student': 'Student@123'
+    }
+    
     def __init__(self):
         print("⚠️  Initializing fallback user management system")
         self.users = {
             'admin': {
-                'password_hash': generate_password_hash('Admin@123'),
                 'role': 'admin',
                 'full_name': 'System Administrator',
                 'department': 'DESIDOC',
@@ -226,7 +204,6 @@ class FallbackUserManager:
                 }
             },
             'scientist': {
-                'password_hash': generate_password_hash('Scientist@123'),
                 'role': 'scientist',
                 'full_name': 'Test Scientist',
                 'department': 'DRDO',
@@ -237,7 +214,6 @@ class FallbackUserManager:
                 }
             },
             'student': {
-                'password_hash': generate_password_hash('Student@123'),
                 'role': 'student',
                 'full_name': 'Test Student',
                 'department': 'Academic',
@@ -250,10 +226,16 @@ class FallbackUserManager:
         }
         self.pending_requests = []
     
+    def _password_hash(self, username):
+        user_data = self.users[username]
+        if 'password_hash' not in user_data:
+            user_data['password_hash'] = generate_password_hash(self.DEFAULT_PASSWORDS[username])
+        return user_data['password_hash']
+    
     def authenticate_user(self, username, password):
         """Authenticate user against in-memory storage"""
         user_data = self.users.get(username)
-        if user_data and check_password_hash(user_data['password_hash'], password):
+        if user_data and check_password_hash(self._password_hash(username), password):
             return {
                 '_id': f"fallback_{username}",
                 'username': username,
@@ -473,19 +455,76 @@ class DatabaseUserManager:
             print(f"❌ Failed to create admin user: {e}")
             return False
 
-# Initialize user manager based on database availability
-if db is not None:
+# Guards the db swap so leftover ingestion jobs are resumed exactly once
+_attach_lock = threading.Lock()
+resume_jobs_on_connect = False
+
+def attach_database(new_client, new_db):
+    """Switch the app from fallback mode to a live database"""
+    global client, db, user_manager
+    
+    # Content-hash lookups for upload deduplication
+    try:
+        new_db.books.create_index('content_hash')
+        new_db.books.create_index('index_book_id', sparse=True)
+        new_db.search_index.create_index('book_id')
+        ensure_index_events(new_db)
+        ensure_corpus_stats(new_db)
+    except Exception as e:
+        print(f"⚠️  Could not create book indexes: {e}")
+    
     try:
-        user_manager = DatabaseUserManager(db)
-        user_manager.create_default_admin()
+        manager = DatabaseUserManager(new_db)
+        manager.create_default_admin()
         print("✅ Using database-backed user management")
     except Exception as e:
         print(f"❌ Database user manager failed: {e}")
+        manager = None
+    
+    with _attach_lock:
+        client, db = new_client, new_db
+        if manager is not None:
+            user_manager = manager
+        if resume_jobs_on_connect:
+            ingestion_worker.resume_pending()
+    
+    if app.config['SEARCH_ENGINE'] == 'compact':
+        search_engine.start(new_db)
+    term_stats.start(new_db)
+
+def resume_ingestion_jobs():
+    """Resume leftover jobs now, or as soon as the database is attached"""
+    global resume_jobs_on_connect
+    with _attach_lock:
+        resume_jobs_on_connect = True
+        if db is not None:
+            ingestion_worker.resume_pending()
+
+def connect_database():
+    global user_manager
+    new_client, new_db = create_robust_database_connection()
+    if new_db is not None:
+        attach_database(new_client, new_db)
+    # Fallback accounts only take over once the database has actually proved unusable
+    if user_manager is None:
+        print("⚠️  Using fallback user management (no database)")
         user_manager = FallbackUserManager()
-        print("⚠️  Switched to fallback user management")
+
+# No user manager until the connection attempts finish; login and signup answer 503 meanwhile
+user_manager = None
+
+if app.config['LAZY_STARTUP']:
+    print("⏳ Connecting to database in the background")
+    threading.Thread(target=connect_database, name='db-connector', daemon=True).start()
 else:
-    user_manager = FallbackUserManager()
-    print("⚠️  Using fallback user management (no database)")
+    connect_database()
+
+def starting_up_response(template):
+    """503 for account routes while the database connector is still trying"""
+    error_msg = 'The system is starting up. Please try again in a moment.'
+    if request.is_json:
+        return jsonify({'error': error_msg}), 503
+    return render_template(template, error=error_msg), 503
 
 # Authentication decorators
 def login_required(f):
@@ -596,6 +635,9 @@ def login():
         if not username or not password:
             return render_template('login.html', error='Username and password are required')
         
+        if user_manager is None:
+            return starting_up_response('login.html')
+        
         # Authenticate user
         user = user_manager.authenticate_user(username, password)
         
@@ -677,6 +719,9 @@ def signup():
             error_msg = f'Please fill in all required fields: {", ".join(missing_fields)}'
             return render_template('signup.html', error=error_msg)
         
+        if user_manager is None:
+            return starting_up_response('signup.html')
+        
         # Process registration request
         request_id, message = user_manager.create_pending_user(data)
         
@@ -699,6 +744,8 @@ def upload_document():
     if request.method == 'GET':
         return render_template('upload.html', user=request.current_user)
     
+    # Set once the upload is on disk, cleared once a book record owns it
+    file, file_path = None, None
     try:
         # Check upload permissions
         user_permissions = request.current_user.get('permissions', {})
@@ -717,92 +764,260 @@ def upload_document():
             return render_template('upload.html', user=request.current_user)
         
         # Validate file type
-        if not file.filename.lower().endswith('.pdf'):
-            flash('Only PDF files are allowed.', 'error')
+        if os.path.splitext(file.filename)[1].lower() not in SUPPORTED_FORMATS:
+            flash('Only PDF, DOCX, HTML and TXT files are allowed.', 'error')
             return render_template('upload.html', user=request.current_user)
         
         # Get form data
         title = request.form.get('title', '').strip()
-        author = request.form.get('author', '').strip()
-        subject = request.form.get('subject', '').strip()
-        isbn = request.form.get('isbn', '').strip()
-        classification = request.form.get('classification', 'public')
         
         if not title:
+            discard_upload(file)
             flash('Document title is required.', 'error')
             return render_template('upload.html', user=request.current_user)
         
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        
-        # Ensure upload directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        file.save(file_path)
+        if isinstance(file.stream, StreamingUploadWriter):
+            # Already on disk and hashed while the request body was read
+            file.stream.close()
+            file_path = file.stream.path
+            content_hash, file_size = file.stream.content_hash, file.stream.size
+        else:
+            file_path = new_upload_path(file.filename)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            content_hash, file_size = save_and_hash(file, file_path)
         
-        # Process PDF and extract text
-        print(f"📄 Processing PDF: {unique_filename}")
-        page_texts, total_pages = pdf_processor.extract_text_from_pdf(file_path)
-        
-        if not page_texts:
-            flash('Failed to extract text from PDF. Please check the file.', 'error')
-            os.remove(file_path)  # Clean up
-            return render_template('upload.html', user=request.current_user)
-        
-        # Create book record
-        book_data = {
-            'title': title,
-            'author': author,
-            'isbn': isbn,
-            'subject': subject,
-            'classification': classification,
-            'total_pages': total_pages,
-            'file_path': file_path,
-            'original_filename': filename,
-            'unique_filename': unique_filename,
-            'uploaded_by': request.current_user['user_id'],
-            'uploader_name': request.current_user['full_name'],
-            'upload_date': datetime.now(),
-            'status': 'active'
-        }
+        book_data = new_book_data(request.form, file.filename, file_path, content_hash, file_size)
         
         # Save to database
         if db is not None:
             try:
-                # Insert book record
-                book_result = db.books.insert_one(book_data)
-                book_id = str(book_result.inserted_id)
-                
-                # Create search index
-                print(f"🔍 Creating search index for book: {book_id}")
-                index_entries = pdf_processor.create_search_index(book_id, page_texts)
-                
-                # Insert search index entries
-                if index_entries:
-                    db.search_index.insert_many(index_entries)
-                    print(f"✅ Indexed {len(index_entries)} word entries")
-                
-                flash(f'Document "{title}" uploaded and indexed successfully! ({len(index_entries)} words indexed)', 'success')
-                return redirect(url_for('dashboard'))
-                
+                result, status = register_upload(book_data)
             except Exception as e:
                 print(f"Database error during upload: {e}")
                 flash('Failed to save document to database.', 'error')
                 if os.path.exists(file_path):
                     os.remove(file_path)  # Clean up
                 return render_template('upload.html', user=request.current_user)
+            file, file_path = None, None
+            
+            if request.is_json or request.accept_mimetypes.best == 'application/json':
+                return jsonify(result), status
+            
+            if result.get('index_book_id'):
+                flash(f'Document "{title}" matches an already indexed file and is searchable now.', 'success')
+            else:
+                flash(f'Document "{title}" uploaded and queued for indexing (job {result["job_id"]}).', 'success')
+            return redirect(url_for('dashboard'))
         else:
             flash('Database not available. Document uploaded but not indexed.', 'warning')
             return render_template('upload.html', user=request.current_user)
-            
+    
+    except HTTPException as e:
+        # Raised while the body streams in: oversized, or not the format it claims to be
+        print(f"Upload rejected: {e.description}")
+        if request.is_json or request.accept_mimetypes.best == 'application/json':
+            return jsonify({'error': e.description}), e.code
+        flash(e.description, 'error')
+        return render_template('upload.html', user=request.current_user), e.code
+    
     except Exception as e:
         print(f"Upload error: {e}")
+        # Nothing will reference the streamed or saved file
+        if file is not None:
+            discard_upload(file)
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
         flash('An error occurred during upload. Please try again.', 'error')
         return render_template('upload.html', user=request.current_user)
 
+def new_upload_path(filename):
+    """Unique destination in the upload folder for an uploaded file"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{timestamp}_{secure_filename(filename)}")
+
+def discard_upload(file):
+    """Delete a file that was streamed to disk for a request we are rejecting"""
+    if isinstance(file.stream, StreamingUploadWriter):
+        file.stream.discard()
+
+def new_book_data(form, original_filename, file_path, content_hash, file_size):
+    """Book record for an uploaded file; extraction and indexing happen in the background"""
+    return {
+        'title': form.get('title', '').strip(),
+        'author': form.get('author', '').strip(),
+        'isbn': form.get('isbn', '').strip(),
+        'subject': form.get('subject', '').strip(),
+        'classification': form.get('classification', 'public'),
+        'total_pages': 0,
+        'file_path': file_path,
+        'original_filename': secure_filename(original_filename),
+        'unique_filename': os.path.basename(file_path),
+        'content_hash': content_hash,
+        'file_size': file_size,
+        'uploaded_by': request.current_user['user_id'],
+        'uploader_name': request.current_user['full_name'],
+        'upload_date': datetime.now(),
+        'status': 'processing'
+    }
+
+def register_upload(book_data):
+    """Insert the book record and queue ingestion, or link to identical content"""
+    # Same bytes already ingested: link to the existing pages and postings
+    existing = db.books.find_one({
+        'content_hash': book_data['content_hash'],
+        'index_book_id': {'$exists': False},
+        'status': {'$in': ['active', 'processing']}
+    })
+    if existing:
+        return link_duplicate_upload(book_data, existing)
+    
+    # Insert book record
+    book_result = db.books.insert_one(book_data)
+    book_id = str(book_result.inserted_id)
+    
+    # Queue extraction and indexing
+    job_id = job_queue.enqueue(book_id, book_data['file_path'],
+                               {'title': book_data['title'], 'uploaded_by': book_data['uploaded_by']})
+    db.books.update_one({'_id': book_result.inserted_id}, {'$set': {'ingest_job_id': job_id}})
+    invalidate_book_metadata(book_id)
+    ingestion_worker.submit(job_id)
+    print(f"📥 Queued ingestion job {job_id} for book: {book_id}")
+    
+    return {
+        'message': 'Upload accepted for processing',
+        'job_id': job_id,
+        'book_id': book_id,
+        'status_url': url_for('api_job_status', job_id=job_id)
+    }, 202
+
+def link_duplicate_upload(book_data, existing):
+    """Register a re-upload as a new record sharing an indexed book's postings"""
+    existing_id = str(existing['_id'])
+    
+    # The copy we just wrote is redundant; point at the indexed file instead
+    if os.path.exists(book_data['file_path']):
+        os.remove(book_data['file_path'])
+    
+    book_data.update({
+        'index_book_id': existing_id,
+        'file_path': existing['file_path'],
+        'total_pages': existing.get('total_pages', 0),
+        'status': existing['status'],
+        'ingest_job_id': existing.get('ingest_job_id')
+    })
+    book_result = db.books.insert_one(book_data)
+    book_id = str(book_result.inserted_id)
+    # Cached results for the indexed book must now list this record too
+    invalidate_book_metadata(existing_id)
+    print(f"♻️  Duplicate upload linked: {book_id} -> {existing_id}")
+    
+    return {
+        'message': 'Document already indexed; linked to existing content',
+        'book_id': book_id,
+        'index_book_id': existing_id,
+        'job_id': book_data['ingest_job_id']
+    }, 201
+
+# Resumable chunked uploads for very large scans
+def upload_api_error(e):
+    """JSON body for an HTTP error raised by the upload store"""
+    return jsonify({'error': e.description}), e.code
+
+@app.route('/api/uploads', methods=['POST'])
+@login_required
+def api_create_upload():
+    """Start a resumable upload; the client then sends chunks with Upload-Offset"""
+    if not request.current_user.get('permissions', {}).get('upload_documents', False):
+        return jsonify({'error': 'You do not have permission to upload documents'}), 403
+    if db is None:
+        return jsonify({'error': 'Database not available'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename', '')
+    if os.path.splitext(filename)[1].lower() not in SUPPORTED_FORMATS:
+        return jsonify({'error': 'Only PDF, DOCX, HTML and TXT files are allowed'}), 415
+    if not data.get('title', '').strip():
+        return jsonify({'error': 'Document title is required'}), 400
+    
+    metadata = {field: data.get(field, '') for field in ('title', 'author', 'subject', 'isbn', 'classification')}
+    metadata['classification'] = metadata['classification'] or 'public'
+    metadata['uploaded_by'] = request.current_user['user_id']
+    try:
+        upload = resumable_uploads.create(filename, int(data.get('size', 0)), metadata)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except HTTPException as e:
+        return upload_api_error(e)
+    
+    return jsonify({
+        'upload_id': upload['upload_id'],
+        'offset': upload['offset'],
+        'size': upload['size'],
+        'chunk_size': app.config['UPLOAD_CHUNK_BYTES'],
+        'upload_url': url_for('api_upload_chunk', upload_id=upload['upload_id'])
+    }), 201
+
+def get_own_upload(upload_id):
+    upload = resumable_uploads.get(upload_id)
+    if upload is None or upload['metadata']['uploaded_by'] != request.current_user['user_id']:
+        raise NotFound('Upload not found')
+    return upload
+
+@app.route('/api/uploads/<upload_id>', methods=['GET', 'PATCH', 'DELETE'])
+@login_required
+def api_upload_chunk(upload_id):
+    """Report the resume offset, append a chunk at it, or cancel the upload"""
+    try:
+        upload = get_own_upload(upload_id)
+        
+        if request.method == 'DELETE':
+            resumable_uploads.discard(upload_id)
+            return jsonify({'message': 'Upload cancelled'})
+        
+        if request.method == 'PATCH':
+            try:
+                offset = int(request.headers.get('Upload-Offset', ''))
+            except ValueError:
+                return jsonify({'error': 'Upload-Offset header is required'}), 400
+            try:
+                upload['offset'] = resumable_uploads.append(upload_id, offset, request.stream)
+            except Conflict as e:
+                # Tell the client where to resume from
+                current = resumable_uploads.get(upload_id)
+                return jsonify({'error': e.description, 'offset': current['offset']}), 409
+        
+        return jsonify({'upload_id': upload_id, 'offset': upload['offset'], 'size': upload['size']})
+    except HTTPException as e:
+        return upload_api_error(e)
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+def api_complete_upload(upload_id):
+    """Move a fully received upload into the library and queue it for indexing"""
+    if db is None:
+        return jsonify({'error': 'Database not available'}), 503
+    
+    try:
+        upload = get_own_upload(upload_id)
+        file_path = new_upload_path(upload['filename'])
+        content_hash, file_size = resumable_uploads.complete(upload_id, file_path)
+    except HTTPException as e:
+        return upload_api_error(e)
+    
+    book_data = new_book_data(upload['metadata'], upload['filename'], file_path, content_hash, file_size)
+    try:
+        result, status = register_upload(book_data)
+    except Exception as e:
+        print(f"Database error during upload: {e}")
+        if os.path.exists(file_path):
+            os.remove(file_path)  # Clean up
+        return jsonify({'error': 'Failed to save document to database'}), 500
+    return jsonify(result), status
+
 # Document Search Route
+SNIPPET_RESULTS = 20
+SEARCH_RANKINGS = ('bm25', 'matches')
+
 @app.route('/search', methods=['GET', 'POST'])
 @login_required
 def search_documents():
@@ -821,69 +1036,114 @@ def search_documents():
         allowed_access_levels = user_permissions.get('document_access', ['public'])
         
         if db is not None:
-            # Process search query
-            processed_query = pdf_processor.process_text_for_search(query)
+            # ?explain=1 shows the query plan and how long each stage took; admins only, since its
+            # frequencies and book counts cover the whole corpus, not just what the user may see
+            explain = request.args.get('explain') == '1' and request.current_user.get('role') == 'admin'
+            trace = QueryTrace()
             
-            if not processed_query:
+            # Process search query: operators, "quoted phrases", NEAR/n and field filters
+            with trace.stage('parse'):
+                parsed_query = parse_query(query, pdf_processor.process_text_for_search)
+            
+            if parsed_query.empty:
                 flash('No valid search terms found.', 'error')
                 return render_template('search.html', user=request.current_user)
             
-            print(f"🔍 Searching for: {processed_query}")
+            # One document frequency lookup orders evaluation and drops near-stop words
+            with trace.stage('plan'):
+                plan = QueryPlanner(query_stats(), app.config['SEARCH_STOPWORD_DF_RATIO']).plan(parsed_query)
+            parsed_query = plan.query
+            processed_query = parsed_query.terms
+            
+            print(f"🔍 Searching for: {processed_query}" +
+                  (f" (dropped common terms: {plan.dropped})" if plan.dropped else ''))
             
             # Search in index
             search_results = []
-            book_matches = {}
+            result_limit = app.config['SEARCH_RESULT_LIMIT']
+            ranking = request.form.get('ranking') or app.config['SEARCH_RANKING']
+            if ranking not in SEARCH_RANKINGS:
+                ranking = 'matches'
+            if ranking == 'bm25':
+                scorer = BM25Scorer(plan.total_books, plan.average_length,
+                                    {term: plan.frequencies.get(term, 0) for term in processed_query})
+            else:
+                scorer = None
+            # Restrict to books the user may see before the top results are taken
+            with trace.stage('access') as stage:
+                allowed_books = accessible_books(allowed_access_levels)
+                stage['books'] = 'all' if allowed_books is None else len(allowed_books)
+            book_matches = search_book_matches(plan, limit=result_limit, scorer=scorer, trace=trace,
+                                               books=allowed_books)
             
-            for word in processed_query:
-                # Find documents containing this word
-                matches = list(db.search_index.find({'word': word}))
-                
-                for match in matches:
-                    book_id = match['book_id']
-                    
-                    if book_id not in book_matches:
-                        book_matches[book_id] = {
-                            'pages': set(),
-                            'total_matches': 0,
-                            'words_found': set()
-                        }
-                    
-                    book_matches[book_id]['pages'].add(match['page_number'])
-                    book_matches[book_id]['total_matches'] += match['frequency']
-                    book_matches[book_id]['words_found'].add(word)
+            # Get book details for the ranked books in one projected $in fetch (or from cache)
+            with trace.stage('book records', books=len(book_matches)):
+                book_records = get_book_cache(db.books).get_many(book_matches.keys())
             
-            # Get book details and filter by access level
+            # Filter by access level
             for book_id, match_data in book_matches.items():
                 try:
-                    book = db.books.find_one({'_id': ObjectId(book_id)})
-                    
-                    if book and book.get('classification', 'public') in allowed_access_levels:
+                    # Includes re-uploads that share this book's postings
+                    for book in book_records.get(str(book_id), []):
+                        if book.get('classification', 'public') not in allowed_access_levels:
+                            continue
+                        # Books matched by field filters alone have no pages
+                        first_page = min(match_data['pages']) if match_data['pages'] else None
                         search_results.append({
-                            'book_id': book_id,
+                            'book_id': str(book['_id']),
                             'title': book['title'],
                             'author': book['author'],
                             'subject': book.get('subject', ''),
                             'classification': book.get('classification', 'public'),
                             'pages': sorted(list(match_data['pages'])),
                             'total_matches': match_data['total_matches'],
+                            'score': match_data.get('score', match_data['total_matches']),
                             'words_found': list(match_data['words_found']),
                             'upload_date': book['upload_date'].strftime('%Y-%m-%d'),
-                            'uploader_name': book.get('uploader_name', 'Unknown')
+                            'uploader_name': book.get('uploader_name', 'Unknown'),
+                            'content_hash': book.get('content_hash'),
+                            'index_book_id': str(book_id),
+                            'snippet_page': first_page
                         })
                 except Exception as e:
                     print(f"Error processing book {book_id}: {e}")
                     continue
             
-            # Sort by relevance (total matches)
-            search_results.sort(key=lambda x: x['total_matches'], reverse=True)
+            # Sort by relevance (BM25 score, or total matches)
+            search_results.sort(key=lambda x: (x['score'], x['total_matches']), reverse=True)
+            search_results = search_results[:result_limit]
+            
+            # Best pages per book by term coverage and proximity; positions are only read for contenders
+            page_ranker = PageRanker(db.search_index, pages_per_book=app.config['SEARCH_PAGES_PER_BOOK'])
+            ranked_ids = {result['index_book_id'] for result in search_results}
+            with trace.stage('page ranking', books=len(ranked_ids)):
+                top_pages = page_ranker.rank(
+                    processed_query,
+                    {book_id: book_matches[book_id] for book_id in book_matches if str(book_id) in ranked_ids},
+                    weights=scorer.idf if scorer is not None else None
+                )
+            for result in search_results:
+                result['top_pages'] = top_pages.get(result['index_book_id'], [])
+                if result['top_pages']:
+                    result['snippet_page'] = result['top_pages'][0]['page']
+            
+            # Snippets come from the stored page text, never from re-parsing the PDF
+            with trace.stage('snippets'):
+                for result in search_results[:SNIPPET_RESULTS]:
+                    if result['snippet_page'] is None:
+                        continue
+                    page_text = text_store.read_page(result['content_hash'], result['snippet_page'])
+                    result['snippet'] = make_snippet(page_text, processed_query)
             
-            print(f"✅ Search completed: {len(search_results)} results found")
+            print(f"✅ Search completed: {len(search_results)} results found ({trace.summary()})")
             
             return render_template('search.html', 
                                  user=request.current_user,
                                  query=query,
+                                 ranking=ranking,
                                  results=search_results,
-                                 total_results=len(search_results))
+                                 total_results=len(search_results),
+                                 explain=dict(plan.describe(), stages=trace.stages) if explain else None)
         else:
             flash('Search functionality requires database connection.', 'error')
             return render_template('search.html', user=request.current_user)
@@ -893,6 +1153,87 @@ def search_documents():
         flash('An error occurred during search. Please try again.', 'error')
         return render_template('search.html', user=request.current_user)
 
+def query_stats():
+    """The in-memory mirror avoids stats reads per query once it has loaded"""
+    return term_stats if term_stats.ready else CorpusStats(db)
+
+def accessible_books(allowed_access_levels):
+    """Book ids (as postings carry them) with a record at an allowed level; None when that is every book"""
+    metadata = get_metadata_index(db.books)
+    books = set().union(*(metadata.matching('classification', level) for level in allowed_access_levels))
+    return None if books >= metadata.all_books() else books
+
+def search_book_matches(plan, limit=None, scorer=None, trace=None, books=None):
+    """Ranked per-book matches for books that satisfy the whole planned query.
+
+    Plain word queries keep the top-k ranked search. Anything with operators,
+    phrases or field filters is first evaluated as set operations over book
+    ids (field filters first, then terms rarest first, each lookup restricted
+    to the books still in play); only those candidates are ranked, and
+    positional clauses are confirmed in rank order before the survivors'
+    matches are materialized. `books` restricts every path to those book ids
+    before the limit is applied.
+    """
+    trace = trace or QueryTrace()
+    parsed_query = plan.query
+    terms = parsed_query.terms
+    if books is not None and not books:
+        return {}
+    if parsed_query.simple:
+        with trace.stage('top-k search', engine='compact' if search_engine.ready else 'mongo'):
+            if search_engine.ready:
+                return search_engine.search(terms, limit=limit, scorer=scorer, books=books)
+            return mongo_book_matches(terms, limit=limit, scorer=scorer, books=books)
+
+    postings = search_engine if search_engine.ready else MongoTermBooks(db.search_index, query_stats())
+    executor = QueryExecutor(postings, PositionalMatcher(db.search_index, postings), get_metadata_index(db.books),
+                             trace=trace, total_books=plan.total_books)
+    with trace.stage('candidates', engine='compact' if search_engine.ready else 'mongo') as stage:
+        candidates = executor.candidates(parsed_query, plan.frequencies)
+        if books is not None:
+            candidates = candidates & books
+        stage['books'] = len(candidates)
+    if not candidates:
+        return {}
+
+    book_matches = {}
+    with trace.stage('rank', books=len(candidates)):
+        if not terms:
+            ranked = []
+        elif search_engine.ready:
+            ranked = [book_id for book_id, _ in search_engine.rank(terms, scorer=scorer, books=candidates)]
+        else:
+            book_matches = mongo_book_matches(terms, scorer=scorer, books=candidates)
+            ranked = list(book_matches)
+        # Books admitted without a term hit (field filters, NOT) follow the ranked ones, newest first
+        unscored = sorted(candidates.difference(ranked), reverse=True)
+    with trace.stage('confirm') as stage:
+        confirmed = executor.confirm(parsed_query, ranked + unscored, limit)
+        stage['books'] = len(confirmed)
+    if terms and search_engine.ready:
+        with trace.stage('materialize', books=len(confirmed)):
+            book_matches = search_engine.search(terms, scorer=scorer, books=confirmed)
+
+    results = {}
+    for book_id, pages in confirmed.items():
+        match = book_matches.get(book_id)
+        if match is None:
+            match = {'book_id': book_id, 'pages': set(), 'total_matches': 0, 'words_found': set(), 'term_pages': {}}
+            if scorer is not None:
+                match['score'] = 0.0
+        results[book_id] = restrict_to_pages(match, pages) if pages else match
+    return results
+
+def mongo_book_matches(processed_query, limit=None, scorer=None, books=None):
+    """Per-book matches from one search_index aggregation, used until the compact index is loaded"""
+    if scorer is not None:
+        matches = aggregate_book_matches(db.search_index, processed_query, limit,
+                                         score=scorer.aggregation_score(),
+                                         extra_stages=scorer.book_length_stages(), books=books)
+    else:
+        matches = aggregate_book_matches(db.search_index, processed_query, limit, books=books)
+    return {match['book_id']: match for match in matches}
+
 # Browse Documents Route
 @app.route('/browse')
 @login_required
@@ -1202,7 +1543,8 @@ def api_status():
         'user_management': 'active',
         'authentication': 'active',
         'pdf_processing': 'active',
-        'search_engine': 'active',
+        'search_engine': 'compact' if search_engine.ready else 'mongo',
+        'term_stats': 'memory' if term_stats.ready else 'mongo',
         'upload_system': 'active',
         'timestamp': datetime.now().isoformat(),
         'version': '1.0.0'
@@ -1214,11 +1556,44 @@ def api_test():
     return jsonify({
         'message': 'DESIDOC API is working correctly',
         'database_status': 'connected' if db is not None else 'fallback_mode',
-        'user_manager': type(user_manager).__name__,
+        'user_manager': type(user_manager).__name__ if user_manager is not None else 'starting',
         'pdf_processor': 'active',
         'timestamp': datetime.now().isoformat()
     })
 
+def can_view_job(job):
+    """Admins see every job; others only jobs for books they uploaded"""
+    if request.current_user.get('role') == 'admin':
+        return True
+    uploaded_by = job['payload'].get('uploaded_by')
+    if uploaded_by is None and db is not None and ObjectId.is_valid(job['book_id']):
+        # Jobs queued before the uploader was recorded in the payload
+        book = db.books.find_one({'_id': ObjectId(job['book_id'])}, {'uploaded_by': 1})
+        uploaded_by = book.get('uploaded_by') if book else None
+    return uploaded_by is not None and uploaded_by == request.current_user['user_id']
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def api_job_status(job_id):
+    """Ingestion job status with per-page progress"""
+    job = job_queue.get_job(job_id)
+    if not job or not can_view_job(job):
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        'job_id': job['id'],
+        'book_id': job['book_id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'pages_done': job['pages_done'],
+        'total_pages': job['total_pages'],
+        'progress': job['progress'],
+        'words_indexed': job['words_indexed'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    })
+
 @app.route('/api/user-info')
 @login_required
 def api_user_info():
@@ -1274,11 +1649,13 @@ def initialize_system():
     print("📊 SYSTEM STATUS SUMMARY")
     print("=" * 60)
     print(f"🗄️  Database: {'✅ Connected' if db is not None else '⚠️  Fallback Mode'}")
-    print(f"👤 User Management: {'✅ Database-backed' if isinstance(user_manager, DatabaseUserManager) else '⚠️  In-memory fallback'}")
+    print(f"👤 User Management: {'✅ Database-backed' if isinstance(user_manager, DatabaseUserManager) else '⏳ Waiting for database' if user_manager is None else '⚠️  In-memory fallback'}")
     print(f"🔐 Authentication: ✅ Active")
     print(f"📄 PDF Processing: ✅ Active")
     print(f"🔍 Search Engine: ✅ Active")
     print(f"📤 Upload System: ✅ Active")
+    print(f"📥 Ingestion Workers: {app.config['INGEST_WORKERS']}")
+    print(f"🔎 OCR: {'✅ ' + str(app.config['OCR_WORKERS']) + ' workers' if app.config['OCR_WORKERS'] and ocr_available() else '⚠️  Disabled'}")
     print(f"🌐 Web Interface: ✅ Ready")
     print("=" * 60)
     print("🔑 DEFAULT CREDENTIALS")
@@ -1301,4 +1678,5 @@ def initialize_system():
 
 if __name__ == '__main__':
     initialize_system()
+    resume_ingestion_jobs()
     app.run(debug=True, host='0.0.0.0', port=5000)
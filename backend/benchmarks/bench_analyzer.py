@@ -0,0 +1,61 @@
+# backend/benchmarks/bench_analyzer.py
+"""Tokens/sec of the shared analyzer with and without the stem cache.
+
+"before" is the old per-occurrence pipeline (PorterStemmer.stem on every
+token); "after" is Analyzer.analyze with its LRU-cached stemmer.
+
+Usage: python benchmarks/bench_analyzer.py [path/to/file.pdf] [--pages N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.analyzer import Analyzer, MIN_TOKEN_LENGTH
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'documents', 'uploads', 'maths_ebook.pdf')
+
+def sample_pages(pdf_path, max_pages):
+    from utils.pdf_extractor import PDFExtractor
+    pages = []
+    for _, text in PDFExtractor().iter_page_texts(pdf_path):
+        if text.strip():
+            pages.append(text)
+        if len(pages) >= max_pages:
+            break
+    return pages
+
+def uncached_analyze(analyzer, text):
+    """The pre-cache pipeline: stem every surviving token occurrence"""
+    return [
+        analyzer.stemmer.stem(token)
+        for token in analyzer.tokenize(text)
+        if token.isalpha() and len(token) >= MIN_TOKEN_LENGTH and token not in analyzer.stop_words
+    ]
+
+def measure(pages, analyze):
+    start = time.perf_counter()
+    tokens = sum(len(analyze(text)) for text in pages)
+    return tokens, time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdf', nargs='?', default=DEFAULT_PDF)
+    parser.add_argument('--pages', type=int, default=200)
+    args = parser.parse_args()
+
+    pages = sample_pages(args.pdf, args.pages)
+    analyzer = Analyzer()
+
+    before_tokens, before_seconds = measure(pages, lambda text: uncached_analyze(analyzer, text))
+    after_tokens, after_seconds = measure(pages, analyzer.analyze)
+    assert before_tokens == after_tokens
+
+    info = analyzer.cache_info()
+    print(f"📄 {len(pages)} pages, {after_tokens} indexed tokens")
+    print(f"   before (uncached stem): {before_tokens / before_seconds:>12.0f} tokens/sec")
+    print(f"   after  (LRU stem):      {after_tokens / after_seconds:>12.0f} tokens/sec")
+    print(f"   stem cache hit rate:    {info.hits / max(info.hits + info.misses, 1):>12.1%}")
@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_boolean_queries.py
+"""Boolean and fielded queries as set operations vs filtering the OR search.
+
+A synthetic corpus of Zipf-distributed pages is loaded into a CompactIndex,
+with book metadata (subject, author, year) in an in-process collection, so
+no MongoDB server is needed. Each query combines a field filter with AND,
+OR and NOT over terms. The baseline is what the search could do before: an
+OR search over every term (a full posting walk per term), then dropping
+books that fail the filter or the boolean structure. The planned path
+starts from the filter's precomputed book set and restricts each term
+lookup to the books still in play, rarest first.
+
+Usage: python benchmarks/bench_boolean_queries.py [--books N] [--pages N] [--queries N] [--limit K]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bm25 import BM25Scorer
+from utils.compact_index import CompactIndex
+from utils.metadata_index import MetadataIndex
+from utils.positional import PositionalMatcher
+from utils.query_language import QueryExecutor, parse_query
+
+SUBJECTS = ['radar', 'sonar', 'avionics', 'propulsion', 'materials', 'optics', 'navigation', 'logistics',
+            'communications', 'medicine', 'history', 'law', 'chemistry', 'physics', 'geology', 'software']
+AUTHORS = ['smith', 'jones', 'garcia', 'chen', 'patel', 'mueller', 'kowalski', 'nakamura', 'okafor', 'silva']
+
+class BooksCollection:
+    """Just enough of db.books.find for the metadata index"""
+
+    def __init__(self, books):
+        self.books = books
+
+    def find(self, query=None, projection=None):
+        return iter(self.books)
+
+def build_corpus(books, pages, tokens_per_page, words, weights, rng):
+    index, records = CompactIndex(), []
+    for book in range(books):
+        book_id = f"book{book:06d}"
+        word_pages = defaultdict(list)
+        for page in range(1, pages + 1):
+            counts = defaultdict(int)
+            for word in rng.choices(words, weights, k=tokens_per_page):
+                counts[word] += 1
+            for word, count in counts.items():
+                word_pages[word].append((page, count))
+        index.add_book(book_id, word_pages)
+        records.append({'_id': book_id, 'subject': rng.choice(SUBJECTS), 'author': rng.choice(AUTHORS),
+                        'classification': 'public', 'upload_date': datetime(rng.randint(1990, 2024), 1, 1)})
+    return index, MetadataIndex(BooksCollection(records))
+
+def sample_queries(words, count, rng):
+    """Filter plus terms drawn from the head of the vocabulary, where OR scans are longest"""
+    queries = []
+    common = words[:200]
+    for _ in range(count):
+        filters = rng.choice([f"subject:{rng.choice(SUBJECTS)}", f"author:{rng.choice(AUTHORS)}",
+                              f"subject:{rng.choice(SUBJECTS)} year:>={rng.randint(2010, 2020)}"])
+        a, b, c, d = rng.sample(common, 4)
+        shape = rng.choice([f"{a} AND {b}", f"({a} OR {b}) AND {c}", f"{a} AND {b} NOT {c}", f"{a} {b} {c} {d}"])
+        queries.append(f"{filters} {shape}")
+    return queries
+
+def baseline_search(index, allowed, parsed, limit, scorer):
+    """OR search over every term, then drop books the full query rejects (given for free)"""
+    matches = index.rank(parsed.terms, scorer=scorer)
+    return [book_id for book_id, _ in matches if book_id in allowed][:limit]
+
+def planned_search(index, executor, parsed, limit, scorer):
+    candidates = executor.candidates(parsed)
+    if not candidates:
+        return []
+    ranked = [book_id for book_id, _ in index.rank(parsed.terms, scorer=scorer, books=candidates)]
+    confirmed = executor.confirm(parsed, ranked, limit)
+    return list(index.search(parsed.terms, scorer=scorer, books=confirmed))
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=5000)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--tokens-per-page', type=int, default=200)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(13)
+    words = [f"term{i}" for i in range(args.vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(args.vocabulary)]
+    start = time.perf_counter()
+    index, metadata = build_corpus(args.books, args.pages, args.tokens_per_page, words, weights, rng)
+    metadata.all_books()
+    print(f"📚 {args.books} books x {args.pages} pages built in {time.perf_counter() - start:.1f}s")
+
+    baseline_times, planned_times, mismatches = [], [], 0
+    for query in sample_queries(words, args.queries, rng):
+        parsed = parse_query(query, str.split)
+        lengths = index.doc_lengths
+        scorer = BM25Scorer(len(lengths), sum(lengths) / len(lengths), index.document_frequencies(parsed.terms))
+        executor = QueryExecutor(index, PositionalMatcher(None, index), metadata)
+
+        allowed = executor.candidates(parsed)
+        start = time.perf_counter()
+        baseline = baseline_search(index, allowed, parsed, args.limit, scorer)
+        baseline_times.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        planned = planned_search(index, executor, parsed, args.limit, scorer)
+        planned_times.append((time.perf_counter() - start) * 1000)
+        # Books tied at the cutoff may differ; their scores may not
+        scores = dict(index.rank(parsed.terms, scorer=scorer, books=allowed))
+        mismatches += sorted(map(scores.get, baseline)) != sorted(map(scores.get, planned))
+
+    print(f"  filter then OR p50 {percentile(baseline_times, 0.5):6.2f} p99 {percentile(baseline_times, 0.99):6.2f} ms | "
+          f"planned p50 {percentile(planned_times, 0.5):6.2f} p99 {percentile(planned_times, 0.99):6.2f} ms "
+          f"({mismatches} results differ)")
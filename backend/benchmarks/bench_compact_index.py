@@ -0,0 +1,78 @@
+# backend/benchmarks/bench_compact_index.py
+"""Query latency of the in-process CompactIndex on a synthetic corpus.
+
+Books draw their vocabulary from a Zipf-like distribution, so a few terms
+hit nearly every book (the expensive case) and most are rare. Queries mix
+1-4 terms drawn from the same distribution. Reports build time, memory
+held by the posting arrays, and p50/p95/p99 latency with and without a
+result limit, ranked by match count and by BM25.
+
+Usage: python benchmarks/bench_compact_index.py [--books N] [--terms-per-book N] [--queries N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bm25 import BM25Scorer
+from utils.compact_index import CompactIndex
+
+def build_corpus(index, books, terms_per_book, vocabulary, pages_per_book, rng):
+    words = [f"term{i}" for i in range(vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    for book in range(books):
+        chosen = set(rng.choices(words, weights, k=terms_per_book))
+        index.add_book(f"book{book}", {
+            word: [(rng.randint(1, pages_per_book), rng.randint(1, 20)) for _ in range(rng.randint(1, 5))]
+            for word in chosen
+        })
+    return words, weights
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def corpus_scorer(index, terms):
+    """BM25 over the index's own counts, standing in for the term_stats/corpus_stats reads"""
+    lengths = index.doc_lengths
+    frequencies = {term: len(index.postings[index.term_ids[term]].docs) if term in index.term_ids else 0
+                   for term in terms}
+    return BM25Scorer(len(lengths), sum(lengths) / max(len(lengths), 1), frequencies)
+
+def run_queries(index, queries, limit, bm25=False):
+    samples = []
+    for terms in queries:
+        scorer = corpus_scorer(index, terms) if bm25 else None
+        start = time.perf_counter()
+        index.search(terms, limit, scorer)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=10000)
+    parser.add_argument('--terms-per-book', type=int, default=300)
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = CompactIndex()
+    start = time.perf_counter()
+    words, weights = build_corpus(index, args.books, args.terms_per_book, args.vocabulary, args.pages, rng)
+    build_seconds = time.perf_counter() - start
+    stats = index.stats()
+    print(f"📚 {stats['books']} books, {stats['terms']} terms, {stats['postings']} page postings "
+          f"({stats['bytes'] / (1024 * 1024):.1f} MB of arrays), built in {build_seconds:.1f}s")
+
+    queries = [rng.choices(words, weights, k=rng.randint(1, 4)) for _ in range(args.queries)]
+    for label, limit, bm25 in (('all results', None, False), (f'top {args.limit}', args.limit, False),
+                               (f'bm25 top {args.limit}', args.limit, True)):
+        samples = run_queries(index, queries, limit, bm25)
+        print(f"{label:>12}: p50 {percentile(samples, 0.50):6.2f} ms  p95 {percentile(samples, 0.95):6.2f} ms  "
+              f"p99 {percentile(samples, 0.99):6.2f} ms")
@@ -0,0 +1,101 @@
+# backend/benchmarks/bench_index_round_trips.py
+"""Database round trips per indexed document: add_index_entry vs. add_index_entries.
+
+Runs DocumentIndexer's write path against an in-process collection that
+counts calls, so no MongoDB server is needed. Operations are counted from
+what each path hands the collection: the old path's inserts make one
+posting per distinct (word, book, page), and the bulk path's upserts are
+what add_index_entries reports it built (a page split across two batches
+upserts some postings twice).
+
+Usage: python benchmarks/bench_index_round_trips.py [--pages N] [--words-per-page N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.search_index import SearchIndex
+from utils.index_pipeline import stream_index_pages
+
+class CountingCollection:
+    """Just enough of a pymongo collection to count server round trips"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.rows = {}
+        self.bulk_operations = 0
+
+    def find_one(self, query):
+        self.round_trips += 1
+        key = (query['word'], query['book_id'], query['page_number'])
+        return {'_id': key} if key in self.rows else None
+
+    def update_one(self, query, update, upsert=False):
+        self.round_trips += 1
+        self.rows[query['_id']] += update['$inc']['frequency']
+
+    def insert_one(self, document):
+        self.round_trips += 1
+        self.rows[(document['word'], document['book_id'], document['page_number'])] = document['frequency']
+
+    def bulk_write(self, requests, ordered=True):
+        self.round_trips += 1
+        self.bulk_operations += len(requests)
+
+class CountingDB:
+    def __init__(self):
+        self.search_index = CountingCollection()
+
+def synthetic_pages(pages, words_per_page, vocabulary=5000):
+    rng = random.Random(42)
+    vocab = [f"term{i}" for i in range(vocabulary)]
+    for page_num in range(1, pages + 1):
+        yield page_num, [rng.choice(vocab) for _ in range(words_per_page)]
+
+def page_entries(book_id):
+    return lambda page_num, words: [
+        {'word': word, 'book_id': book_id, 'page_number': page_num, 'position': position}
+        for position, word in enumerate(words)
+    ]
+
+def run_single(pages, words_per_page, book_id):
+    index = SearchIndex(CountingDB())
+    start = time.perf_counter()
+    for page_num, words in synthetic_pages(pages, words_per_page):
+        for entry in page_entries(book_id)(page_num, words):
+            index.add_index_entry(entry['word'], book_id, page_num, entry['position'])
+    return index.collection.round_trips, len(index.collection.rows), time.perf_counter() - start
+
+def run_bulk(pages, words_per_page, book_id, batch_size):
+    index = SearchIndex(CountingDB(), batch_size=batch_size)
+    start = time.perf_counter()
+    upserts = []
+    stream_index_pages(
+        ((page_num, ' '.join(words)) for page_num, words in synthetic_pages(pages, words_per_page)),
+        lambda page_num, text: page_entries(book_id)(page_num, text.split()),
+        lambda entries: upserts.append(index.add_index_entries(entries)),
+        batch_size=batch_size
+    )
+    assert sum(upserts) == index.collection.bulk_operations
+    return index.collection.round_trips, sum(upserts), time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--words-per-page', type=int, default=300)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    book_id = '64b7f0c2a1b2c3d4e5f60718'
+    single_trips, single_postings, single_time = run_single(args.pages, args.words_per_page, book_id)
+    bulk_trips, bulk_postings, bulk_time = run_bulk(args.pages, args.words_per_page, book_id, args.batch_size)
+
+    print(f"📊 {args.pages} pages x {args.words_per_page} words, batch size {args.batch_size}")
+    print(f"   add_index_entry:   {single_trips:>8} round trips ({single_time:.2f}s client time)")
+    print(f"   add_index_entries: {bulk_trips:>8} round trips ({bulk_time:.2f}s client time)")
+    print(f"   reduction:         {single_trips / max(bulk_trips, 1):.0f}x fewer round trips")
+    print(f"   postings:          {single_postings} inserted vs {bulk_postings} upserts")
@@ -0,0 +1,55 @@
+# backend/benchmarks/bench_ocr.py
+"""OCR throughput (pages/min) for scanned pages, cold and from the page cache.
+
+By default only pages whose text layer is empty are OCR'd, exactly as
+ingestion does; --force treats the first --pages pages as empty so a
+text PDF can be used as a stand-in for a scan.
+
+Usage: python benchmarks/bench_ocr.py path/to/file.pdf [--pages N] [--workers 1,2,4] [--force]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ocr import OCRCache, OCRStage, ocr_available
+from utils.pdf_extractor import PDFExtractor
+from utils.uploads import hash_file
+
+def page_stream(pdf_path, max_pages, force):
+    for page_number, text in PDFExtractor().iter_page_texts(pdf_path):
+        if page_number > max_pages:
+            break
+        yield page_number, "" if force else text
+
+def run(stage, pdf_path, content_hash, max_pages, force):
+    start = time.perf_counter()
+    pages = sum(1 for _ in stage.fill_empty_pages(pdf_path, page_stream(pdf_path, max_pages, force), content_hash))
+    return pages, time.perf_counter() - start
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdf')
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+
+    if not ocr_available():
+        sys.exit("tesseract and pdftoppm must be on PATH")
+
+    content_hash = hash_file(args.pdf)
+    for workers in [int(value) for value in args.workers.split(',')]:
+        workdir = tempfile.mkdtemp(prefix='bench_ocr_')
+        try:
+            stage = OCRStage(OCRCache(os.path.join(workdir, 'ocr.sqlite3')), max_workers=workers)
+            pages, cold = run(stage, args.pdf, content_hash, args.pages, args.force)
+            _, warm = run(stage, args.pdf, content_hash, args.pages, args.force)
+            print(f"{workers} workers: {pages} pages  cold {pages / cold * 60:8.1f} pages/min  "
+                  f"cached {pages / warm * 60:10.1f} pages/min")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
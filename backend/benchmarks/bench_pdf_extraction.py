@@ -0,0 +1,51 @@
+# backend/benchmarks/bench_pdf_extraction.py
+"""Pages/sec for serial vs. pooled PDF text extraction as worker count grows.
+
+Usage: python benchmarks/bench_pdf_extraction.py [path/to/file.pdf] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_extractor import PDFExtractor
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'documents', 'uploads', 'maths_ebook.pdf')
+
+def worker_counts():
+    counts, n = [], 1
+    while n <= (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    if counts[-1] != (os.cpu_count() or 1):
+        counts.append(os.cpu_count())
+    return counts
+
+def run(pdf_path, repeat):
+    total_pages = PDFExtractor().count_pages(pdf_path)
+    print(f"📄 {os.path.basename(pdf_path)}: {total_pages} pages, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'seconds':>10} {'pages/sec':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in worker_counts():
+        # parallel_min_pages=0 forces the pool so small samples still exercise it
+        extractor = PDFExtractor(max_workers=workers, parallel_min_pages=0)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            pages = sum(1 for _ in extractor.iter_page_texts(pdf_path, total_pages))
+            best = min(best, time.perf_counter() - start)
+        assert pages == total_pages
+
+        baseline = baseline or best
+        print(f"{workers:>8} {best:>10.2f} {total_pages / best:>10.1f} {baseline / best:>7.2f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdf', nargs='?', default=DEFAULT_PDF)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.pdf, args.repeat)
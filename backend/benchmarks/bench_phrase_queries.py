@@ -0,0 +1,143 @@
+# backend/benchmarks/bench_phrase_queries.py
+"""Phrase and NEAR/n queries vs the plain OR search over the same terms.
+
+A synthetic corpus of Zipf-distributed token streams is loaded into a
+CompactIndex, with positional postings in an in-process collection (so no
+MongoDB server is needed; round trips are counted instead). Phrases are cut
+from real pages so they always match somewhere. Each query runs as the OR
+search over its terms, and as the positional search: rarest-first book
+intersection, restricted ranking, then position checks in rank order.
+The positional search runs twice: walking every candidate until the limit
+is confirmed, and bounded the way the app runs it (clauses whose terms are
+in most books are only checked among the top-ranked batch), reporting how
+many of the unbounded results the bounded run keeps.
+
+Usage: python benchmarks/bench_phrase_queries.py [--books N] [--pages N] [--queries N] [--limit K]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bm25 import BM25Scorer
+from utils.compact_index import CompactIndex
+from utils.positional import PositionalMatcher, restrict_to_pages
+from utils.query_language import QueryExecutor, parse_query
+from utils.postings import collect_positions, encode_positions
+
+class PositionsCollection:
+    """Just enough of search_index.find for position fetches, counting round trips"""
+
+    def __init__(self):
+        self.rows = defaultdict(list)  # (word, book_id) -> rows, like the compound index
+        self.round_trips = 0
+
+    def insert(self, row):
+        self.rows[row['word'], row['book_id']].append(row)
+
+    def find(self, query, projection=None):
+        self.round_trips += 1
+        return [row for word in query['word']['$in'] for book_id in query['book_id']['$in']
+                for row in self.rows.get((word, book_id), ())]
+
+def build_corpus(books, pages, tokens_per_page, words, weights, rng):
+    index, collection, streams = CompactIndex(), PositionsCollection(), []
+    for book in range(books):
+        book_id = f"book{book}"
+        word_pages = defaultdict(list)
+        for page in range(1, pages + 1):
+            tokens = rng.choices(words, weights, k=tokens_per_page)
+            streams.append(tokens)
+            for word, positions in collect_positions(tokens).items():
+                word_pages[word].append((page, len(positions)))
+                collection.insert({'word': word, 'book_id': book_id, 'page_number': page,
+                                   'position': positions[0], 'positions': encode_positions(positions)})
+        index.add_book(book_id, word_pages)
+    return index, collection, streams
+
+def sample_queries(streams, count, rng):
+    queries = {'phrase': [], 'near': []}
+    for _ in range(count):
+        tokens = rng.choice(streams)
+        start = rng.randrange(len(tokens) - 6)
+        queries['phrase'].append('"' + ' '.join(tokens[start:start + rng.randint(2, 3)]) + '"')
+        queries['near'].append(f"{tokens[start]} NEAR/5 {tokens[start + rng.randint(2, 5)]}")
+    return queries
+
+def scorer_for(index, terms):
+    lengths = index.doc_lengths
+    return BM25Scorer(len(lengths), sum(lengths) / max(len(lengths), 1), index.document_frequencies(terms))
+
+def positional_search(index, collection, parsed, limit, scorer, total_books=None):
+    executor = QueryExecutor(index, PositionalMatcher(collection, index), total_books=total_books)
+    candidates = executor.candidates(parsed)
+    if not candidates:
+        return {}
+    ranked = [book_id for book_id, _ in index.rank(parsed.terms, scorer=scorer, books=candidates)]
+    confirmed = executor.confirm(parsed, ranked, limit)
+    book_matches = index.search(parsed.terms, scorer=scorer, books=confirmed)
+    return {book_id: restrict_to_pages(book_matches[book_id], pages) for book_id, pages in confirmed.items()}
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--tokens-per-page', type=int, default=200)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    words = [f"term{i}" for i in range(args.vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(args.vocabulary)]
+    start = time.perf_counter()
+    index, collection, streams = build_corpus(args.books, args.pages, args.tokens_per_page, words, weights, rng)
+    print(f"📚 {args.books} books x {args.pages} pages built in {time.perf_counter() - start:.1f}s")
+    # The in-process postings are millions of objects MongoDB would hold; keep full GC passes off them
+    gc.freeze()
+
+    for kind, queries in sample_queries(streams, args.queries, rng).items():
+        # Split by how selective the query's rarest term is: phrases of near-universal terms are the worst case
+        buckets = defaultdict(list)
+        for query in queries:
+            parsed = parse_query(query, str.split)
+            rarest = min(index.document_frequencies(parsed.terms).values())
+            buckets['common' if rarest >= args.books // 2 else 'selective'].append(parsed)
+
+        for bucket, parsed_queries in sorted(buckets.items()):
+            or_times, positional_times, or_books, positional_books = [], [], 0, 0
+            bounded_times, bounded_books, kept = [], 0, 0
+            for parsed in parsed_queries:
+                scorer = scorer_for(index, parsed.terms)
+                start = time.perf_counter()
+                or_books += len(index.search(parsed.terms, args.limit, scorer))
+                or_times.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                unbounded = positional_search(index, collection, parsed, args.limit, scorer)
+                positional_times.append((time.perf_counter() - start) * 1000)
+                positional_books += len(unbounded)
+
+                start = time.perf_counter()
+                bounded = positional_search(index, collection, parsed, args.limit, scorer, args.books)
+                bounded_times.append((time.perf_counter() - start) * 1000)
+                bounded_books += len(bounded)
+                kept += len(bounded.keys() & unbounded.keys())
+
+            count = len(parsed_queries)
+            print(f"  {kind:>6} {bucket:>9} ({count:3d} queries): OR p50 {percentile(or_times, 0.5):6.2f} "
+                  f"p99 {percentile(or_times, 0.99):6.2f} ms ({or_books / count:5.1f} books) | unbounded "
+                  f"p50 {percentile(positional_times, 0.5):6.2f} p99 {percentile(positional_times, 0.99):6.2f} ms "
+                  f"({positional_books / count:5.1f} books) | bounded p50 {percentile(bounded_times, 0.5):6.2f} "
+                  f"p99 {percentile(bounded_times, 0.99):6.2f} ms ({bounded_books / count:5.1f} books, "
+                  f"{kept / max(positional_books, 1):.0%} kept)")
@@ -0,0 +1,139 @@
+# backend/benchmarks/bench_query_planner.py
+"""Rarest-first planned evaluation vs walking terms in typed order.
+
+Queries mix one or two near-universal terms with mid-frequency and rare
+ones, typed in random order. AND queries are evaluated the old way (every
+posting of each term in typed order, then intersected) and planned (rarest
+term first, each later lookup restricted to the books still in play, the
+near-universal terms dropped). Plain OR queries run the top-k search with
+and without the dropped terms. Postings read counts the book ids each
+lookup returns, which is what a book_id $in lookup reads from MongoDB.
+
+Usage: python benchmarks/bench_query_planner.py [--books N] [--queries N] [--limit K]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bm25 import BM25Scorer
+from utils.compact_index import CompactIndex
+from utils.positional import PositionalMatcher
+from utils.query_language import QueryExecutor, parse_query
+from utils.query_planner import QueryPlanner
+
+class CountingPostings:
+    """The compact index's term lookups, counting the book ids they return"""
+
+    def __init__(self, index):
+        self.index = index
+        self.read = 0
+
+    def document_frequencies(self, terms):
+        return self.index.document_frequencies(terms)
+
+    def term_books(self, word, books=None):
+        found = self.index.term_books(word, books)
+        self.read += len(found)
+        return found
+
+    def all_books(self):
+        return self.index.all_books()
+
+    def totals(self):
+        lengths = self.index.doc_lengths
+        return len(lengths), sum(lengths) / max(len(lengths), 1)
+
+def build_index(books, terms_per_book, words, weights, rng):
+    index = CompactIndex()
+    for book in range(books):
+        chosen = set(rng.choices(words, weights, k=terms_per_book)) | set(words[:2])
+        index.add_book(f"book{book:06d}", {word: [(rng.randint(1, 50), rng.randint(1, 5))] for word in chosen})
+    return index
+
+def sample_queries(words, count, rng):
+    queries = []
+    for _ in range(count):
+        terms = rng.sample(words[:2], rng.randint(1, 2)) + [rng.choice(words[20:300]), rng.choice(words[300:5000])]
+        rng.shuffle(terms)
+        queries.append(terms)
+    return queries
+
+def typed_order_and(postings, terms):
+    """Every posting of every term, in the order typed"""
+    books = None
+    for word in terms:
+        found = postings.term_books(word)
+        books = found if books is None else books & found
+    return books
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def report(name, before_times, after_times, before_read, after_read, count, note=''):
+    print(f"  {name:>6}: typed order p50 {percentile(before_times, 0.5):6.2f} p99 {percentile(before_times, 0.99):6.2f} ms "
+          f"({before_read / count:8.0f} postings) | planned p50 {percentile(after_times, 0.5):6.2f} "
+          f"p99 {percentile(after_times, 0.99):6.2f} ms ({after_read / count:8.0f} postings){note}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--terms-per-book', type=int, default=400)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(17)
+    words = [f"term{i}" for i in range(args.vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(args.vocabulary)]
+    start = time.perf_counter()
+    index = build_index(args.books, args.terms_per_book, words, weights, rng)
+    postings = CountingPostings(index)
+    planner = QueryPlanner(postings)
+    print(f"📚 {args.books} books indexed in {time.perf_counter() - start:.1f}s")
+
+    queries = sample_queries(words, args.queries, rng)
+    times = {'and': ([], []), 'or': ([], [])}
+    read = {'and': [0, 0], 'or': [0, 0]}
+    mismatches, overlap = 0, 0.0
+    for terms in queries:
+        # AND: typed order with full posting walks, vs planned
+        postings.read = 0
+        start = time.perf_counter()
+        expected = typed_order_and(postings, terms)
+        times['and'][0].append((time.perf_counter() - start) * 1000)
+        read['and'][0] += postings.read
+
+        postings.read = 0
+        start = time.perf_counter()
+        plan = planner.plan(parse_query(' AND '.join(terms), str.split))
+        executor = QueryExecutor(postings, PositionalMatcher(None, postings))
+        found = executor.candidates(plan.query, plan.frequencies)
+        times['and'][1].append((time.perf_counter() - start) * 1000)
+        read['and'][1] += postings.read
+        # Dropping a term in nearly every book can only admit the few books missing it
+        mismatches += not expected <= found
+
+        # OR: top-k over every term vs over the planned terms
+        total_books, average_length = postings.totals()
+        scorer = BM25Scorer(total_books, average_length, index.document_frequencies(terms))
+        start = time.perf_counter()
+        full = index.search(terms, args.limit, scorer)
+        times['or'][0].append((time.perf_counter() - start) * 1000)
+        read['or'][0] += sum(index.document_frequencies(terms).values())
+
+        start = time.perf_counter()
+        plan = planner.plan(parse_query(' '.join(terms), str.split))
+        planned = index.search(plan.query.terms, args.limit, scorer)
+        times['or'][1].append((time.perf_counter() - start) * 1000)
+        read['or'][1] += sum(plan.frequencies[term] for term in plan.query.terms)
+        overlap += len(set(full) & set(planned)) / max(len(full), 1)
+
+    count = len(queries)
+    report('and', *times['and'], *read['and'], count, f" ({mismatches} lost results)")
+    report('or', *times['or'], *read['or'], count, f" ({overlap / count:.0%} top-{args.limit} overlap)")
@@ -0,0 +1,103 @@
+# backend/benchmarks/bench_search_round_trips.py
+"""Round trips and reply bytes per search: per-term find() vs one aggregation.
+
+Needs a running MongoDB. Synthetic postings are written to a scratch
+database (dropped afterwards), then each query is run both ways while a
+command listener counts commands (including getMore batches) and the BSON
+size of every reply.
+
+Usage: python benchmarks/bench_search_round_trips.py [--books N] [--pages N] [--limit K]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import bson
+from pymongo import MongoClient, monitoring
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.search_pipeline import aggregate_book_matches
+
+class ReplyCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = 0
+        self.reply_bytes = 0
+
+    def reset(self):
+        self.commands = 0
+        self.reply_bytes = 0
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name in ('find', 'getMore', 'aggregate'):
+            self.commands += 1
+            self.reply_bytes += len(bson.encode(event.reply))
+
+    def failed(self, event):
+        pass
+
+def per_term_find(collection, terms):
+    """The old path: one find per term, merged in Python"""
+    book_matches = {}
+    for word in terms:
+        for match in collection.find({'word': word}):
+            entry = book_matches.setdefault(match['book_id'], {'pages': set(), 'total_matches': 0, 'words_found': set()})
+            entry['pages'].add(match['page_number'])
+            entry['total_matches'] += match['frequency']
+            entry['words_found'].add(word)
+    return book_matches
+
+def seed(collection, books, pages, vocabulary, rng):
+    words = [f"term{i}" for i in range(vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    batch = []
+    for book in range(books):
+        for page in range(1, pages + 1):
+            for word in set(rng.choices(words, weights, k=40)):
+                batch.append({'word': word, 'book_id': f"book{book}", 'page_number': page,
+                              'frequency': rng.randint(1, 6), 'position': 0})
+            if len(batch) >= 5000:
+                collection.insert_many(batch)
+                batch = []
+    if batch:
+        collection.insert_many(batch)
+    collection.create_index([('word', 1), ('book_id', 1)])
+    return words, weights
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGODB_URI', 'mongodb://127.0.0.1:27017/'))
+    parser.add_argument('--books', type=int, default=500)
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    counter = ReplyCounter()
+    client = MongoClient(args.mongo_uri, event_listeners=[counter], serverSelectionTimeoutMS=5000)
+    db = client['bench_search_round_trips']
+    rng = random.Random(7)
+    try:
+        words, weights = seed(db.search_index, args.books, args.pages, args.vocabulary, rng)
+        queries = [rng.choices(words, weights, k=rng.randint(1, 4)) for _ in range(args.queries)]
+
+        for label, run in (
+            ('per-term find', lambda terms: per_term_find(db.search_index, terms)),
+            (f'aggregate top {args.limit}', lambda terms: aggregate_book_matches(db.search_index, terms, args.limit)),
+        ):
+            counter.reset()
+            start = time.perf_counter()
+            for terms in queries:
+                run(terms)
+            seconds = time.perf_counter() - start
+            print(f"{label:>16}: {counter.commands / len(queries):6.1f} round trips/query  "
+                  f"{counter.reply_bytes / len(queries) / 1024:9.1f} KB/query  "
+                  f"{seconds / len(queries) * 1000:7.1f} ms/query")
+    finally:
+        client.drop_database('bench_search_round_trips')
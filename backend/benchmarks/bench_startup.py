@@ -0,0 +1,49 @@
+# backend/benchmarks/bench_startup.py
+"""Time-to-first-request of the Flask app, eager vs lazy startup.
+
+Each run is a fresh interpreter that imports app.py and serves GET
+/api/status through the test client, so import cost, the database
+connector and fallback user setup are all included. Point MONGODB_URI at
+an unreachable host to reproduce the worst case (full retry loop).
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import time
+start = time.perf_counter()
+import app
+response = app.app.test_client().get('/api/status')
+assert response.status_code == 200
+print(f"FIRST_REQUEST {time.perf_counter() - start:.3f} {response.get_json()['database']}")
+"""
+
+def time_to_first_request(lazy):
+    env = dict(os.environ, LAZY_STARTUP='1' if lazy else '0')
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    wall = time.perf_counter() - start
+    line = next(line for line in output.splitlines() if line.startswith('FIRST_REQUEST'))
+    _, seconds, database = line.split()
+    return float(seconds), wall, database
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    for label, lazy in (('eager', False), ('lazy', True)):
+        results = [time_to_first_request(lazy) for _ in range(args.runs)]
+        best = min(seconds for seconds, _, _ in results)
+        print(f"{label:>5}: first request after {best:6.2f}s "
+              f"(process wall {min(wall for _, wall, _ in results):6.2f}s, database: {results[-1][2]})")
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_text_store.py
+"""Size and read throughput of the compressed extracted-text store vs. re-parsing the PDF.
+
+Usage: python benchmarks/bench_text_store.py [path/to/file.pdf] [--random-reads N]
+"""
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_extractor import PDFExtractor
+from utils.text_store import TextStore
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'documents', 'uploads', 'maths_ebook.pdf')
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def run(pdf_path, random_reads):
+    content_hash = file_hash(pdf_path)
+    root = tempfile.mkdtemp(prefix='text_store_bench_')
+    try:
+        store = TextStore(root)
+        extractor = PDFExtractor()
+
+        start = time.perf_counter()
+        raw_bytes = 0
+        pages = 0
+        for _, text in store.iter_pages(content_hash, lambda: extractor.iter_page_texts(pdf_path)):
+            raw_bytes += len(text.encode('utf-8'))
+            pages += 1
+        extract_seconds = time.perf_counter() - start
+        stored_bytes = store.stats()['bytes']
+
+        start = time.perf_counter()
+        with store.reader(content_hash) as reader:
+            sequential_bytes = sum(len(text) for _, text in reader.iter_pages())
+        sequential_seconds = time.perf_counter() - start
+
+        rng = random.Random(7)
+        start = time.perf_counter()
+        with store.reader(content_hash) as reader:
+            numbers = reader.page_numbers
+            for _ in range(random_reads):
+                reader.read_page(rng.choice(numbers))
+        random_seconds = time.perf_counter() - start
+
+        print(f"📄 {os.path.basename(pdf_path)}: {pages} pages")
+        print(f"   PDF extraction:    {pages / extract_seconds:>10.1f} pages/sec")
+        print(f"   raw text:          {raw_bytes / 1024:>10.1f} KB")
+        print(f"   store on disk:     {stored_bytes / 1024:>10.1f} KB "
+              f"({stored_bytes / max(raw_bytes, 1):.1%} of raw)")
+        print(f"   sequential read:   {pages / sequential_seconds:>10.1f} pages/sec "
+              f"({sequential_bytes / sequential_seconds / 1e6:.1f} MB/s)")
+        print(f"   random page read:  {random_reads / random_seconds:>10.1f} pages/sec")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdf', nargs='?', default=DEFAULT_PDF)
+    parser.add_argument('--random-reads', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.pdf, args.random_reads)
@@ -0,0 +1,102 @@
+# backend/benchmarks/bench_top_k.py
+"""Exhaustive ranking vs MaxScore top-k on the CompactIndex.
+
+For each corpus size, queries are drawn from several term-frequency mixes:
+common terms only, rare terms only, one common term plus rarer ones, and
+plain Zipf samples. Each query is ranked both ways with BM25 and with raw
+match counts; the script checks the top k agree and reports p50/p99
+latency for both.
+
+Usage: python benchmarks/bench_top_k.py [--sizes 2000,10000,40000] [--queries N] [--limit K]
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bm25 import BM25Scorer
+from utils.compact_index import CompactIndex
+
+COMMON_TERMS = 20
+RARE_FROM = 1000
+
+def build_index(books, terms_per_book, words, weights, pages, rng):
+    index = CompactIndex()
+    for book in range(books):
+        chosen = set(rng.choices(words, weights, k=terms_per_book))
+        index.add_book(f"book{book}", {
+            word: [(rng.randint(1, pages), rng.randint(1, 20)) for _ in range(rng.randint(1, 5))]
+            for word in chosen
+        })
+    return index
+
+def query_mixes(words, weights, count, rng):
+    common, rare = words[:COMMON_TERMS], words[RARE_FROM:]
+    return {
+        'common': [rng.sample(common, rng.randint(2, 3)) for _ in range(count)],
+        'rare': [rng.sample(rare, rng.randint(1, 3)) for _ in range(count)],
+        'common+rare': [[rng.choice(common)] + rng.choices(words[COMMON_TERMS:], weights[COMMON_TERMS:],
+                                                           k=rng.randint(1, 2)) for _ in range(count)],
+        'zipf': [rng.choices(words, weights, k=rng.randint(1, 4)) for _ in range(count)]
+    }
+
+def corpus_scorer(index, terms):
+    lengths = index.doc_lengths
+    frequencies = {term: len(index.postings[index.term_ids[term]].docs) if term in index.term_ids else 0
+                   for term in terms}
+    return BM25Scorer(len(lengths), sum(lengths) / max(len(lengths), 1), frequencies)
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def compare(index, queries, limit, bm25):
+    exhaustive, top_k, mismatches = [], [], 0
+    for terms in queries:
+        scorer = corpus_scorer(index, terms) if bm25 else None
+
+        start = time.perf_counter()
+        scores = index.scores(terms, scorer)
+        expected = heapq.nlargest(limit, scores.values())
+        exhaustive.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        candidates = index.top_k_scores(terms, limit, scorer)
+        found = heapq.nlargest(limit, candidates.values())
+        top_k.append((time.perf_counter() - start) * 1000)
+
+        if [round(score, 9) for score in expected] != [round(score, 9) for score in found]:
+            mismatches += 1
+    return exhaustive, top_k, mismatches
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='2000,10000,40000')
+    parser.add_argument('--terms-per-book', type=int, default=200)
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    words = [f"term{i}" for i in range(args.vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(args.vocabulary)]
+    mixes = query_mixes(words, weights, args.queries, rng)
+
+    for books in (int(size) for size in args.sizes.split(',')):
+        start = time.perf_counter()
+        index = build_index(books, args.terms_per_book, words, weights, args.pages, rng)
+        print(f"📚 {books} books built in {time.perf_counter() - start:.1f}s")
+        for mix, queries in mixes.items():
+            for ranking, bm25 in (('bm25', True), ('matches', False)):
+                exhaustive, top_k, mismatches = compare(index, queries, args.limit, bm25)
+                print(f"  {mix:>11} {ranking:>7}: exhaustive p50 {percentile(exhaustive, 0.5):6.2f} "
+                      f"p99 {percentile(exhaustive, 0.99):6.2f} ms | top {args.limit} "
+                      f"p50 {percentile(top_k, 0.5):6.2f} p99 {percentile(top_k, 0.99):6.2f} ms | "
+                      f"mean speedup {sum(exhaustive) / max(sum(top_k), 1e-9):4.1f}x"
+                      + (f" | {mismatches} MISMATCHES" if mismatches else ""))
@@ -0,0 +1,51 @@
+# backend/check_stats.py
+"""Verify term_stats, document_stats and corpus_stats against search_index.
+
+Document frequency and total term frequency per term, length per book and
+the corpus totals are recounted from the raw postings and compared with
+the incrementally maintained counters. With --repair, all three are
+rebuilt from search_index (run it while nothing is being indexed).
+
+Usage: python check_stats.py [--repair] [--samples N]
+"""
+import argparse
+import os
+import sys
+
+from pymongo import MongoClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.stats_check import check_corpus_stats, rebuild_stats_from_postings
+
+def main():
+    parser = argparse.ArgumentParser(description='Check incrementally maintained term statistics')
+    parser.add_argument('--repair', action='store_true', help='rebuild the statistics from search_index')
+    parser.add_argument('--samples', type=int, default=20, help='mismatches to print')
+    args = parser.parse_args()
+
+    mongo_uri = os.environ.get('MONGODB_URI', 'mongodb://127.0.0.1:27017/')
+    database_name = os.environ.get('DATABASE_NAME', 'desidoc_library')
+    db = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)[database_name]
+
+    report = check_corpus_stats(db, max_samples=args.samples)
+    print(f"📊 Terms out of step: {report['term_mismatches']}, books out of step: {report['book_mismatches']}, "
+          f"interrupted updates: {report['pending']}")
+    print(f"   Corpus from postings: {report['corpus']['postings']}, stored: {report['corpus']['stats']}")
+    for sample in report['samples']:
+        print(f"   {sample['kind']} {sample['key']!r}: postings {sample['postings']} vs stats {sample['stats']}")
+
+    if report['consistent']:
+        print("✅ Term statistics match search_index")
+        return 0
+    if not args.repair:
+        print("⚠️  Statistics differ from search_index; rerun with --repair to rebuild them")
+        return 1
+
+    rebuild_stats_from_postings(db)
+    report = check_corpus_stats(db, max_samples=0)
+    print("✅ Statistics rebuilt" if report['consistent'] else "❌ Statistics still differ after rebuild")
+    return 0 if report['consistent'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
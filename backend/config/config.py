@@ -13,3 +13,21 @@ class Config:
     MAX_SEARCH_LIMIT = 100
     MIN_WORD_LENGTH = 3
     MAX_WORDS_PER_PAGE = 10000
+    JOB_QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH', 'documents/jobs.sqlite3')
+    INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', 2))
+    PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', 1))
+    INDEX_BATCH_SIZE = int(os.environ.get('INDEX_BATCH_SIZE', 1000))
+    TEXT_STORE_FOLDER = os.environ.get('TEXT_STORE_FOLDER', 'documents/text_store')
+    # Tesseract processes per ingestion worker for pages without a text layer (0 disables OCR)
+    OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 2))
+    OCR_CACHE_PATH = os.environ.get('OCR_CACHE_PATH', 'documents/ocr_cache.sqlite3')
+    LAZY_STARTUP = os.environ.get('LAZY_STARTUP', '1') == '1'
+    SEARCH_ENGINE = os.environ.get('SEARCH_ENGINE', 'compact')
+    INDEX_SYNC_INTERVAL = float(os.environ.get('INDEX_SYNC_INTERVAL', 2.0))
+    SEARCH_RESULT_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 100))
+    SEARCH_RANKING = os.environ.get('SEARCH_RANKING', 'bm25')
+    SEARCH_PAGES_PER_BOOK = int(os.environ.get('SEARCH_PAGES_PER_BOOK', 3))
+    SEARCH_STOPWORD_DF_RATIO = float(os.environ.get('SEARCH_STOPWORD_DF_RATIO', 0.9))
+    RESUMABLE_UPLOAD_FOLDER = os.environ.get('RESUMABLE_UPLOAD_FOLDER', 'documents/uploads/partial')
+    RESUMABLE_UPLOAD_MAX_SIZE = int(os.environ.get('RESUMABLE_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024))
+    UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
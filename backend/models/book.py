@@ -2,6 +2,9 @@ from pymongo import MongoClient
 from datetime import datetime
 from bson import ObjectId
 
+from models.search_index import SearchIndex
+from utils.book_cache import invalidate_book_metadata
+
 class Book:
     def __init__(self, db_connection):
         self.db = db_connection
@@ -28,13 +31,27 @@ class Book:
         return self.collection.find_one({'_id': ObjectId(book_id)})
     
     def update_book(self, book_id, update_data):
-        return self.collection.update_one(
+        result = self.collection.update_one(
             {'_id': ObjectId(book_id)},
             {'$set': update_data}
         )
+        invalidate_book_metadata(book_id)
+        return result
     
     def delete_book(self, book_id):
-        return self.collection.update_one(
+        result = self.collection.update_one(
             {'_id': ObjectId(book_id)},
             {'$set': {'status': 'deleted'}}
         )
+        invalidate_book_metadata(book_id)
+        
+        # Postings (and their term statistics) go once no live upload shares them
+        book = self.collection.find_one({'_id': ObjectId(book_id)}, {'index_book_id': 1}) or {}
+        index_book_id = book.get('index_book_id') or str(book_id)
+        still_used = self.collection.count_documents({
+            '$or': [{'_id': ObjectId(index_book_id)}, {'index_book_id': index_book_id}],
+            'status': {'$ne': 'deleted'}
+        }, limit=1)
+        if not still_used:
+            SearchIndex(self.db).delete_book_index(index_book_id)
+        return result
@@ -1,9 +1,17 @@
 from bson import ObjectId
+from pymongo import UpdateOne
+
+from utils.compact_index import book_filter
+from utils.corpus_stats import remove_book_stats
+from utils.index_events import BOOK_REMOVED, publish_index_event
+
+DEFAULT_BULK_BATCH_SIZE = 1000
 
 class SearchIndex:
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, batch_size=DEFAULT_BULK_BATCH_SIZE):
         self.db = db_connection
         self.collection = self.db.search_index
+        self.batch_size = batch_size
     
     def add_index_entry(self, word, book_id, page_number, position):
         index_entry = {
@@ -28,6 +36,39 @@ class SearchIndex:
         else:
             self.collection.insert_one(index_entry)
     
+    def add_index_entries(self, entries, batch_size=None):
+        """Batched add_index_entry: aggregate per (word, book_id, page) and bulk upsert"""
+        aggregated = {}
+        for entry in entries:
+            book_id = entry['book_id']
+            key = (
+                entry['word'].lower(),
+                ObjectId(book_id) if isinstance(book_id, str) else book_id,
+                entry['page_number']
+            )
+            if key in aggregated:
+                aggregated[key][0] += entry.get('frequency', 1)
+            else:
+                aggregated[key] = [entry.get('frequency', 1), entry.get('position', 0)]
+        
+        requests = [
+            UpdateOne(
+                {'word': word, 'book_id': book_id, 'page_number': page_number},
+                {
+                    '$inc': {'frequency': frequency},
+                    '$setOnInsert': {'position': position}
+                },
+                upsert=True
+            )
+            for (word, book_id, page_number), (frequency, position) in aggregated.items()
+        ]
+        
+        batch_size = batch_size or self.batch_size
+        for start in range(0, len(requests), batch_size):
+            self.collection.bulk_write(requests[start:start + batch_size], ordered=False)
+        
+        return len(requests)
+    
     def search_word(self, word):
         return list(self.collection.find({'word': word.lower()}))
     
@@ -35,4 +76,7 @@ class SearchIndex:
         return list(self.collection.find({'book_id': ObjectId(book_id)}))
     
     def delete_book_index(self, book_id):
-        return self.collection.delete_many({'book_id': ObjectId(book_id)})
+        result = self.collection.delete_many(book_filter(str(book_id)))
+        remove_book_stats(self.db, book_id)
+        publish_index_event(self.db, BOOK_REMOVED, book_id)
+        return result
@@ -0,0 +1,47 @@
+# backend/reindex.py
+"""Rebuild search_index for the whole library.
+
+Postings are written to a shadow collection while searches keep using the
+live index. Completed books are checkpointed, so rerunning after a crash
+resumes where it stopped. The shadow is swapped in atomically at the end;
+new uploads wait to be indexed while the last books catch up and it swaps.
+
+Usage: python reindex.py [--workers N] [--batch-size N] [--restart]
+"""
+import argparse
+import os
+import sys
+
+from pymongo import MongoClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.reindexer import CorpusReindexer
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel, resumable full-corpus reindex')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=int(os.environ.get('INDEX_BATCH_SIZE', 1000)))
+    parser.add_argument('--restart', action='store_true', help='discard checkpoints from an unfinished run')
+    args = parser.parse_args()
+
+    mongo_uri = os.environ.get('MONGODB_URI', 'mongodb://127.0.0.1:27017/')
+    database_name = os.environ.get('DATABASE_NAME', 'desidoc_library')
+    db = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)[database_name]
+
+    reindexer = CorpusReindexer(
+        db,
+        mongo_uri,
+        database_name,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        text_store_path=os.environ.get('TEXT_STORE_FOLDER', 'documents/text_store'),
+        ocr_workers=int(os.environ.get('OCR_WORKERS', 2)),
+        ocr_cache_path=os.environ.get('OCR_CACHE_PATH', 'documents/ocr_cache.sqlite3')
+    )
+    summary = reindexer.run(restart=args.restart)
+    print(f"📊 Reindex summary: {summary}")
+    return 1 if summary['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,22 @@
 # backend/utils/advanced_indexer.py
 import math
-from collections import defaultdict, Counter
-from typing import Dict, List, Tuple
+from collections import Counter
+from typing import List
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from utils.document_preocessor import MultiFormatProcessor
+from utils.postings import collect_positions, encode_positions
+from utils.analyzer import get_analyzer
+from utils.corpus_stats import CorpusStats, apply_book_stats
+from utils.index_events import BOOK_INDEXED, publish_index_event
 
 class AdvancedIndexer:
     def __init__(self, db_connection):
         self.db = db_connection
         self.search_index = self.db.search_index
-        self.document_stats = self.db.document_stats
+        self.corpus_stats = CorpusStats(self.db)
+        self.analyzer = get_analyzer()
         
     def calculate_tf_idf(self, term: str, document_id: str, total_documents: int) -> float:
         """Calculate TF-IDF score for a term in a document"""
@@ -26,8 +35,8 @@ class AdvancedIndexer:
         # Calculate TF (Term Frequency)
         tf = term_freq / doc_length
         
-        # Calculate IDF (Inverse Document Frequency)
-        docs_with_term = self.search_index.count_documents({'word': term.lower()})
+        # Calculate IDF (Inverse Document Frequency) from the term statistics kept at index time
+        docs_with_term = self.corpus_stats.document_frequencies([term.lower()])[term.lower()]
         idf = math.log(total_documents / (docs_with_term + 1))
         
         return tf * idf
@@ -36,49 +45,48 @@ class AdvancedIndexer:
         """Advanced indexing with TF-IDF calculations"""
         processor = MultiFormatProcessor()
         page_texts = processor.extract_text_with_pages(file_path)
+        book_oid = ObjectId(book_id)
         
-        # Calculate document statistics
-        total_words = 0
-        word_frequencies = defaultdict(int)
+        # Pass 1: count terms locally and write one bulk batch per page
+        page_lengths = {}
+        word_frequencies = Counter()
         
         for page_num, text in page_texts.items():
             words = self._tokenize_text(text)
-            total_words += len(words)
+            if not words:
+                continue
+            
+            page_lengths[page_num] = len(words)
+            term_positions = collect_positions(words)
+            word_frequencies.update({word: len(positions) for word, positions in term_positions.items()})
             
-            for position, word in enumerate(words):
-                word_frequencies[word.lower()] += 1
-                
-                # Store detailed index entry
-                self.search_index.update_one(
-                    {
-                        'word': word.lower(),
-                        'book_id': ObjectId(book_id),
-                        'page_number': page_num
-                    },
-                    {
-                        '$set': {
-                            'word': word.lower(),
-                            'book_id': ObjectId(book_id),
-                            'page_number': page_num,
-                            'position': position,
-                            'doc_length': total_words
-                        },
-                        '$inc': {'frequency': 1}
-                    },
+            self.search_index.bulk_write([
+                UpdateOne(
+                    {'word': word, 'book_id': book_oid, 'page_number': page_num},
+                    {'$set': {
+                        'frequency': len(positions),
+                        'position': positions[0],
+                        'positions': encode_positions(positions),
+                        'page_length': len(words)
+                    }},
                     upsert=True
                 )
+                for word, positions in term_positions.items()
+            ], ordered=False)
         
-        # Store document statistics
-        self.document_stats.update_one(
-            {'book_id': ObjectId(book_id)},
-            {
-                '$set': {
-                    'total_words': total_words,
-                    'unique_words': len(word_frequencies),
-                    'word_frequencies': dict(word_frequencies)
-                }
-            },
-            upsert=True
+        # Pass 2: the true document length is only known now
+        total_words = sum(page_lengths.values())
+        self.search_index.update_many(
+            {'book_id': book_oid},
+            {'$set': {'doc_length': total_words}}
         )
         
+        # Store document statistics and add the book to the term/corpus counters
+        apply_book_stats(self.db, book_id, word_frequencies, page_lengths)
+        publish_index_event(self.db, BOOK_INDEXED, book_id)
+        
         return len(word_frequencies)
+    
+    def _tokenize_text(self, text: str) -> List[str]:
+        """Tokenize, filter and stem page text"""
+        return self.analyzer.analyze(text)
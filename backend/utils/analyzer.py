@@ -0,0 +1,80 @@
+# backend/utils/analyzer.py
+import os
+from functools import lru_cache
+from typing import List, Set
+
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem import PorterStemmer
+from nltk.tokenize import word_tokenize
+
+from utils import fast_tokenizer
+
+# Technical text repeats a small vocabulary heavily, so this covers nearly every stem call
+STEM_CACHE_SIZE = 100000
+MIN_TOKEN_LENGTH = 3
+# 'regex' needs no Punkt data; 'nltk' runs the full word_tokenize machinery
+DEFAULT_TOKENIZER = os.environ.get('ANALYZER_TOKENIZER', 'regex')
+# Stop words ship with the repo so startup never touches the network
+BUNDLED_NLTK_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'nltk_data')
+FALLBACK_STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
+
+if BUNDLED_NLTK_DATA not in nltk.data.path:
+    nltk.data.path.insert(0, BUNDLED_NLTK_DATA)
+
+def ensure_punkt():
+    """Fetch Punkt on first use of the nltk tokenizer, not at import time"""
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt', quiet=True)
+
+def load_stop_words() -> Set[str]:
+    try:
+        return set(stopwords.words('english'))
+    except Exception:
+        return set(FALLBACK_STOP_WORDS)
+
+class Analyzer:
+    """Tokenize -> filter -> stem pipeline shared by indexing and querying"""
+
+    def __init__(self, stop_words: Set[str] = None, stem_cache_size: int = STEM_CACHE_SIZE,
+                 tokenizer: str = DEFAULT_TOKENIZER):
+        if tokenizer not in ('regex', 'nltk'):
+            raise ValueError(f"Unknown tokenizer mode: {tokenizer}")
+        self.tokenizer = tokenizer
+        if tokenizer == 'nltk':
+            ensure_punkt()
+        self.stemmer = PorterStemmer()
+        self.stop_words = stop_words if stop_words is not None else load_stop_words()
+        self.stem = lru_cache(maxsize=stem_cache_size)(self.stemmer.stem)
+
+    def tokenize(self, text: str) -> List[str]:
+        if self.tokenizer == 'regex':
+            return fast_tokenizer.tokenize(text.lower())
+        return word_tokenize(text.lower())
+
+    def analyze(self, text: str) -> List[str]:
+        """Lowercase, tokenize, drop stop words and short/non-alphabetic tokens, stem"""
+        if not text:
+            return []
+
+        stop_words = self.stop_words
+        stem = self.stem
+        return [
+            stem(token)
+            for token in self.tokenize(text)
+            if token.isalpha() and len(token) >= MIN_TOKEN_LENGTH and token not in stop_words
+        ]
+
+    def cache_info(self):
+        return self.stem.cache_info()
+
+_shared_analyzer = None
+
+def get_analyzer() -> Analyzer:
+    """Process-wide analyzer, so every caller shares one stem cache"""
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        _shared_analyzer = Analyzer()
+    return _shared_analyzer
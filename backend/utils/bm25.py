@@ -0,0 +1,68 @@
+# backend/utils/bm25.py
+import math
+from typing import Dict, Iterable, List
+
+from utils.corpus_stats import DOCUMENT_STATS_COLLECTION
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+class BM25Scorer:
+    """Okapi BM25 for one query, built from the corpus statistics kept at index time"""
+
+    def __init__(self, total_books: int, average_length: float, document_frequencies: Dict[str, int],
+                 k1: float = BM25_K1, b: float = BM25_B):
+        self.total_books = total_books
+        self.average_length = max(average_length, 1.0)
+        self.k1 = k1
+        self.b = b
+        self.idf = {term: self.inverse_document_frequency(df) for term, df in document_frequencies.items()}
+
+    @classmethod
+    def for_query(cls, stats, terms: Iterable[str], **params) -> 'BM25Scorer':
+        """Scorer for these terms from a CorpusStats or TermStatsMirror"""
+        total_books, average_length = stats.totals()
+        return cls(total_books, average_length, stats.document_frequencies(terms), **params)
+
+    def inverse_document_frequency(self, df: int) -> float:
+        # The +1 keeps terms found in most books slightly positive instead of negative
+        df = min(df, self.total_books)
+        return math.log(1 + (self.total_books - df + 0.5) / (df + 0.5))
+
+    def length_norm(self, length: int) -> float:
+        return self.k1 * (1 - self.b + self.b * length / self.average_length)
+
+    def term_score(self, term: str, frequency: int, length: int) -> float:
+        return self.idf.get(term, 0.0) * frequency * (self.k1 + 1) / (frequency + self.length_norm(length))
+
+    def score(self, term_frequencies: Dict[str, int], length: int) -> float:
+        return sum(self.term_score(term, frequency, length) for term, frequency in term_frequencies.items())
+
+    def book_length_stages(self) -> List[Dict]:
+        """Join each grouped book to its length in document_stats (average length if missing)"""
+        return [
+            {'$addFields': {'stats_id': {'$toString': '$_id'}}},
+            {'$lookup': {'from': DOCUMENT_STATS_COLLECTION, 'localField': 'stats_id',
+                         'foreignField': '_id', 'as': 'stats'}},
+            {'$addFields': {'book_length': {
+                '$ifNull': [{'$arrayElemAt': ['$stats.total_words', 0]}, self.average_length]
+            }}},
+            {'$project': {'stats': 0, 'stats_id': 0}}
+        ]
+
+    def aggregation_score(self) -> Dict:
+        """The same score as an aggregation expression over book_matches_pipeline rows"""
+        term_idf = {'$switch': {
+            'branches': [{'case': {'$eq': ['$$term.word', term]}, 'then': value} for term, value in self.idf.items()],
+            'default': 0
+        }}
+        length_norm = {'$multiply': [self.k1, {'$add': [
+            1 - self.b, {'$multiply': [self.b, {'$divide': ['$book_length', self.average_length]}]}
+        ]}]}
+        saturation = {'$divide': [
+            {'$multiply': ['$$term.frequency', self.k1 + 1]},
+            {'$add': ['$$term.frequency', length_norm]}
+        ]}
+        return {'$sum': {'$map': {
+            'input': '$terms', 'as': 'term', 'in': {'$multiply': [term_idf, saturation]}
+        }}}
@@ -0,0 +1,97 @@
+# backend/utils/book_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from bson import ObjectId
+
+from utils.metadata_index import invalidate_metadata_index
+
+# Only what search results display; status and page counts change during ingestion
+SEARCH_BOOK_FIELDS = {
+    'title': 1, 'author': 1, 'subject': 1, 'classification': 1, 'upload_date': 1,
+    'uploader_name': 1, 'content_hash': 1, 'index_book_id': 1
+}
+CACHE_MAX_ENTRIES = 10000
+# Edits made by other processes are picked up after this long
+CACHE_TTL_SECONDS = 300
+
+class BookMetadataCache:
+    """Projected book records for search results, keyed by the book id postings carry.
+
+    A key maps to every record sharing that book's postings: the book
+    itself plus re-uploads linked to it through index_book_id. Misses are
+    fetched with a single $in query per call.
+    """
+
+    def __init__(self, collection, max_entries: int = CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = CACHE_TTL_SECONDS, fields: Dict = None):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.fields = fields or SEARCH_BOOK_FIELDS
+        self.entries = OrderedDict()  # book id -> (fetched_at, [records])
+        self.lock = threading.Lock()
+
+    def get_many(self, book_ids: Iterable) -> Dict[str, List[Dict]]:
+        """Records for each posting book id, in one round trip for whatever is not cached"""
+        book_ids = [str(book_id) for book_id in book_ids]
+        found, missing = {}, []
+        now = time.monotonic()
+        with self.lock:
+            for book_id in book_ids:
+                entry = self.entries.get(book_id)
+                if entry and now - entry[0] < self.ttl_seconds:
+                    self.entries.move_to_end(book_id)
+                    found[book_id] = entry[1]
+                else:
+                    missing.append(book_id)
+
+        if missing:
+            fetched = {book_id: [] for book_id in missing}
+            object_ids = [ObjectId(book_id) for book_id in missing if ObjectId.is_valid(book_id)]
+            # Include re-uploads that share these books' postings
+            for book in self.collection.find(
+                {'$or': [{'_id': {'$in': object_ids}}, {'index_book_id': {'$in': missing}}]},
+                self.fields
+            ):
+                key = book.get('index_book_id') or str(book['_id'])
+                if key in fetched:
+                    fetched[key].append(book)
+
+            with self.lock:
+                for book_id, books in fetched.items():
+                    self.entries[book_id] = (now, books)
+                    self.entries.move_to_end(book_id)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            found.update(fetched)
+        return found
+
+    def invalidate(self, *book_ids):
+        """Drop cached entries for these books, including entries they appear in as linked records"""
+        book_ids = {str(book_id) for book_id in book_ids if book_id is not None}
+        with self.lock:
+            for key in list(self.entries):
+                if key in book_ids or any(str(book['_id']) in book_ids for book in self.entries[key][1]):
+                    del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+_shared_cache = None
+
+def get_book_cache(collection) -> BookMetadataCache:
+    """Process-wide cache, so model writes can invalidate what search reads"""
+    global _shared_cache
+    if _shared_cache is None or _shared_cache.collection != collection:
+        _shared_cache = BookMetadataCache(collection)
+    return _shared_cache
+
+def invalidate_book_metadata(*book_ids):
+    if _shared_cache is not None:
+        _shared_cache.invalidate(*book_ids)
+    # Field filters are precomputed over every book, so any edit rebuilds them on next use
+    invalidate_metadata_index()
@@ -0,0 +1,498 @@
+# backend/utils/compact_index.py
+import heapq
+import itertools
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+
+from utils.index_events import BOOK_INDEXED, BOOK_REMOVED, INDEX_EVENTS_COLLECTION, INDEX_REBUILT
+
+# Rebuild the arrays once this share of loaded books has been replaced or removed
+COMPACT_THRESHOLD = 0.2
+SYNC_INTERVAL = 2.0
+# Events from different processes can land slightly out of order, so each poll looks back a little
+EVENT_LOOKBACK = timedelta(seconds=10)
+# Past this share of the books even the rarest term's bound sits near every book's score, so
+# top-k pruning cannot pay for its bookkeeping and every book is scored instead
+MAXSCORE_MAX_SHARE = 0.2
+POSTING_FIELDS = {'_id': 0, 'word': 1, 'book_id': 1, 'page_number': 1, 'frequency': 1}
+
+class TermPostings:
+    """One term's postings as parallel typed arrays, grouped by book"""
+
+    __slots__ = ('docs', 'doc_freqs', 'page_starts', 'pages', 'page_freqs', 'max_freq', 'min_length')
+
+    def __init__(self):
+        self.docs = array('I')         # internal book ids
+        self.doc_freqs = array('I')    # total occurrences in that book
+        self.page_starts = array('I')  # offset of the book's first page in pages/page_freqs
+        self.pages = array('I')
+        self.page_freqs = array('I')
+        # Score upper-bound inputs for top-k pruning; tombstoned books only make them looser
+        self.max_freq = 0
+        self.min_length = 0
+
+    def add_doc(self, doc: int, page_freqs: Iterable[Tuple[int, int]]):
+        self.docs.append(doc)
+        self.page_starts.append(len(self.pages))
+        total = 0
+        for page, frequency in page_freqs:
+            self.pages.append(page)
+            self.page_freqs.append(frequency)
+            total += frequency
+        self.doc_freqs.append(total)
+        self.max_freq = max(self.max_freq, total)
+
+    def add_length(self, length: int):
+        self.min_length = min(self.min_length, length) if self.min_length else length
+
+    def page_slice(self, i: int) -> Tuple[int, int]:
+        end = self.page_starts[i + 1] if i + 1 < len(self.page_starts) else len(self.pages)
+        return self.page_starts[i], end
+
+    def nbytes(self) -> int:
+        return sum(len(values) * values.itemsize for values in
+                   (self.docs, self.doc_freqs, self.page_starts, self.pages, self.page_freqs))
+
+class CompactIndex:
+    """In-memory inverted index: term -> id dictionary plus array-backed postings.
+
+    Books get dense internal ids. Replacing or removing a book tombstones its
+    old id instead of rewriting every term's arrays; compact() drops the dead
+    entries once enough have built up.
+    """
+
+    def __init__(self):
+        self.term_ids: Dict[str, int] = {}
+        self.postings: List[TermPostings] = []
+        self.doc_ids: Dict[str, int] = {}
+        self.doc_names: List[str] = []
+        self.doc_lengths = array('I')  # analyzed terms per book, for BM25
+        self.deleted: Set[int] = set()
+        self.lock = threading.RLock()
+        self._norms_key = None
+        self._norms: List[float] = []
+
+    def _term(self, word: str) -> TermPostings:
+        term_id = self.term_ids.get(word)
+        if term_id is None:
+            term_id = self.term_ids[word] = len(self.postings)
+            self.postings.append(TermPostings())
+        return self.postings[term_id]
+
+    def add_book(self, book_id, word_pages: Dict[str, Iterable[Tuple[int, int]]]):
+        """Add (or replace) one book's postings: word -> [(page, frequency), ...]"""
+        book_id = str(book_id)
+        with self.lock:
+            self._tombstone(book_id)
+            doc = self.doc_ids[book_id] = len(self.doc_names)
+            self.doc_names.append(book_id)
+            length = 0
+            touched = []
+            for word, page_freqs in word_pages.items():
+                postings = self._term(word)
+                postings.add_doc(doc, page_freqs)
+                length += postings.doc_freqs[-1]
+                touched.append(postings)
+            self.doc_lengths.append(length)
+            self._norms_key = None
+            for postings in touched:
+                postings.add_length(length)
+            self._maybe_compact()
+
+    def remove_book(self, book_id):
+        with self.lock:
+            self._tombstone(str(book_id))
+            self._maybe_compact()
+
+    def _tombstone(self, book_id: str):
+        old = self.doc_ids.pop(book_id, None)
+        if old is not None:
+            self.deleted.add(old)
+
+    def _maybe_compact(self):
+        if self.deleted and len(self.deleted) > COMPACT_THRESHOLD * len(self.doc_names):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the arrays without tombstoned books and renumber the live ones"""
+        with self.lock:
+            remap = {}
+            doc_names = []
+            doc_lengths = array('I')
+            for doc, name in enumerate(self.doc_names):
+                if doc not in self.deleted:
+                    remap[doc] = len(doc_names)
+                    doc_names.append(name)
+                    doc_lengths.append(self.doc_lengths[doc])
+
+            term_ids, postings = {}, []
+            for word, term_id in self.term_ids.items():
+                old = self.postings[term_id]
+                new = TermPostings()
+                for i, doc in enumerate(old.docs):
+                    if doc in remap:
+                        start, end = old.page_slice(i)
+                        new.add_doc(remap[doc], zip(old.pages[start:end], old.page_freqs[start:end]))
+                        new.add_length(self.doc_lengths[doc])
+                if new.docs:
+                    term_ids[word] = len(postings)
+                    postings.append(new)
+
+            self.term_ids, self.postings = term_ids, postings
+            self.doc_names = doc_names
+            self.doc_lengths = doc_lengths
+            self._norms_key = None
+            self.doc_ids = {name: doc for doc, name in enumerate(doc_names)}
+            self.deleted = set()
+
+    def _hits(self, terms: Iterable[str]) -> List[Tuple[str, TermPostings]]:
+        hits = []
+        for word in dict.fromkeys(terms):
+            term_id = self.term_ids.get(word)
+            if term_id is not None:
+                hits.append((word, self.postings[term_id]))
+        return hits
+
+    def _term_bound(self, word: str, postings: TermPostings, scorer) -> float:
+        """Most this term can add to any book's score"""
+        if scorer is None:
+            return postings.max_freq
+        # Saturation grows with frequency and shrinks with length: largest frequency, shortest book
+        return scorer.idf.get(word, 0.0) * postings.max_freq * (scorer.k1 + 1) / \
+            (postings.max_freq + scorer.length_norm(postings.min_length))
+
+    def _add_term(self, scores: Dict, scorer, word: str, postings: TermPostings):
+        """Add one term's contribution for every book in its postings"""
+        if scorer is None:
+            # dict/zip and set intersection run in C; Python only loops over shared books
+            term_totals = dict(zip(postings.docs, postings.doc_freqs))
+            shared = {doc: scores[doc] + term_totals[doc] for doc in scores.keys() & term_totals.keys()}
+            scores.update(term_totals)
+            scores.update(shared)
+            return
+
+        idf = scorer.idf.get(word, 0.0)
+        k1_plus_one = scorer.k1 + 1
+        norms = self._length_norms(scorer)
+        get = scores.get
+        for doc, frequency in zip(postings.docs, postings.doc_freqs):
+            scores[doc] = get(doc, 0) + idf * frequency * k1_plus_one / (frequency + norms[doc])
+
+    def _add_term_to_candidates(self, scores: Dict, scorer, word: str, postings: TermPostings):
+        """Add one term's contribution only for books already in `scores`"""
+        docs, doc_freqs = postings.docs, postings.doc_freqs
+        if len(scores) * 16 < len(docs):
+            found = [(doc, doc_freqs[i]) for doc, i in _find_docs(docs, scores)]
+        else:
+            term_totals = dict(zip(docs, doc_freqs))
+            found = [(doc, term_totals[doc]) for doc in scores.keys() & term_totals.keys()]
+
+        if scorer is None:
+            for doc, frequency in found:
+                scores[doc] += frequency
+            return
+        idf = scorer.idf.get(word, 0.0)
+        k1_plus_one = scorer.k1 + 1
+        norms = self._length_norms(scorer)
+        for doc, frequency in found:
+            scores[doc] += idf * frequency * k1_plus_one / (frequency + norms[doc])
+
+    def _length_norms(self, scorer) -> List[float]:
+        """BM25 length normalisation per internal id, reused until the corpus or parameters change"""
+        key = (scorer.k1, scorer.b, scorer.average_length)
+        if self._norms_key != key:
+            self._norms = [scorer.length_norm(length) for length in self.doc_lengths]
+            self._norms_key = key
+        return self._norms
+
+    def scores(self, terms: Iterable[str], scorer=None) -> Dict[int, float]:
+        """Score of every matching live book (internal id -> score)"""
+        with self.lock:
+            scores = {}
+            for word, postings in self._hits(terms):
+                self._add_term(scores, scorer, word, postings)
+            for doc in self.deleted:
+                scores.pop(doc, None)
+            return scores
+
+    def candidate_scores(self, terms: Iterable[str], books: Iterable[str], scorer=None) -> Dict[int, float]:
+        """Scores of the given live books only; each term is probed for just those books"""
+        with self.lock:
+            scores = {self.doc_ids[book_id]: 0 for book_id in map(str, books) if book_id in self.doc_ids}
+            for word, postings in self._hits(terms):
+                if not scores:
+                    break
+                self._add_term_to_candidates(scores, scorer, word, postings)
+            # Books none of the terms occur in
+            return {doc: score for doc, score in scores.items() if score}
+
+    def top_k_scores(self, terms: Iterable[str], limit: int, scorer=None) -> Dict[int, float]:
+        """Exact scores for a candidate set that contains the top `limit` books (MaxScore).
+
+        Terms are added rarest first. Each has an upper bound on what it can
+        add to any book (highest frequency in its postings, shortest book).
+        Once the bounds of the terms still to come sum below the current
+        limit-th best score, no unseen book can reach the top, so the rest are
+        only probed for existing candidates, and candidates that cannot catch
+        up even with every remaining term are dropped.
+
+        When pruning could never start (no prefix of the terms can outscore
+        the bounds still to come, or even the rarest term is in more than
+        MAXSCORE_MAX_SHARE of the books), every book is scored instead. So are
+        match counts: their full-postings merge runs in C (see _add_term),
+        which probing candidates one by one does not beat.
+        """
+        with self.lock:
+            if scorer is None:
+                return self.scores(terms)
+            hits = sorted(self._hits(terms), key=lambda hit: len(hit[1].docs))
+            bounds = [self._term_bound(word, postings, scorer) for word, postings in hits]
+            # Summed per step rather than decremented, so the last term leaves exactly 0
+            remaining_after = [sum(bounds[i + 1:]) for i in range(len(bounds))]
+            # No book can have scored more than the bounds added so far
+            reachable = list(itertools.accumulate(bounds))
+            if not hits or len(hits[0][1].docs) > MAXSCORE_MAX_SHARE * len(self.doc_ids) or \
+                    all(best <= remaining for best, remaining in zip(reachable[:-1], remaining_after)):
+                return self.scores([word for word, _ in hits], scorer)
+
+            scores = {}
+            pruning = False
+            for (word, postings), remaining, best in zip(hits, remaining_after, reachable):
+                if pruning:
+                    self._add_term_to_candidates(scores, scorer, word, postings)
+                else:
+                    self._add_term(scores, scorer, word, postings)
+                    for doc in self.deleted:
+                        scores.pop(doc, None)
+                # Nothing left to prune for, or no chance the threshold clears the remaining bounds
+                if not remaining or len(scores) <= limit or remaining >= best or \
+                        remaining >= max(scores.values()):
+                    continue
+
+                threshold = heapq.nlargest(limit, scores.values())[-1]
+                if remaining < threshold:
+                    pruning = True
+                    scores = {doc: score for doc, score in scores.items() if score + remaining >= threshold}
+            return scores
+
+    def _ranked(self, terms: List[str], limit: Optional[int], scorer,
+                books: Optional[Iterable[str]]) -> List[Tuple[int, float]]:
+        """(internal id, score), best first"""
+        if books is not None:
+            scores = self.candidate_scores(terms, books, scorer)
+            ranked = sorted(scores, key=scores.__getitem__, reverse=True)[:limit]
+        elif limit is not None:
+            scores = self.top_k_scores(terms, limit, scorer)
+            ranked = heapq.nlargest(limit, scores, key=scores.__getitem__)
+        else:
+            scores = self.scores(terms, scorer)
+            ranked = sorted(scores, key=scores.__getitem__, reverse=True)
+        return [(doc, scores[doc]) for doc in ranked]
+
+    def rank(self, terms: Iterable[str], limit: Optional[int] = None, scorer=None,
+             books: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """(book_id, score) best first, without materializing pages"""
+        with self.lock:
+            return [(self.doc_names[doc], score)
+                    for doc, score in self._ranked(list(dict.fromkeys(terms)), limit, scorer, books)]
+
+    def search(self, terms: Iterable[str], limit: Optional[int] = None, scorer=None,
+               books: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Per-book matches for the query terms, ranked by total occurrences or by `scorer` (BM25).
+
+        Returns {book_id: {'pages', 'total_matches', 'words_found', 'term_pages'}},
+        the same shape the Mongo search path builds, plus 'score' when a scorer
+        is given. With a limit, most matching books are never scored (see
+        top_k_scores) and page sets are only materialized for the top ones.
+        `books` restricts the search to those book ids.
+        """
+        with self.lock:
+            terms = list(dict.fromkeys(terms))
+            matches = {}
+            wanted = {}
+            for doc, score in self._ranked(terms, limit, scorer, books):
+                match = matches[self.doc_names[doc]] = {
+                    'pages': set(),
+                    'total_matches': 0,
+                    'words_found': set(),
+                    'term_pages': {}
+                }
+                if scorer is not None:
+                    match['score'] = score
+                wanted[doc] = match
+
+            for word, postings in self._hits(terms):
+                for doc, i in _find_docs(postings.docs, wanted):
+                    match = wanted[doc]
+                    start, end = postings.page_slice(i)
+                    match['pages'].update(postings.pages[start:end])
+                    match['total_matches'] += postings.doc_freqs[i]
+                    match['words_found'].add(word)
+                    match['term_pages'][word] = dict(zip(postings.pages[start:end], postings.page_freqs[start:end]))
+            return matches
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        """Books per term, tombstoned ones included; cheap enough to order terms by rarity"""
+        with self.lock:
+            return {word: len(postings.docs) for word, postings in self._hits(terms)}
+
+    def term_books(self, word: str, books: Optional[Iterable[str]] = None) -> Set[str]:
+        """Live books containing the term, optionally only among the given ones"""
+        with self.lock:
+            term_id = self.term_ids.get(word)
+            if term_id is None:
+                return set()
+            docs = self.postings[term_id].docs
+            if books is None:
+                return {self.doc_names[doc] for doc in docs if doc not in self.deleted}
+            wanted = {self.doc_ids[book_id] for book_id in map(str, books) if book_id in self.doc_ids}
+            return {self.doc_names[doc] for doc, _ in _find_docs(docs, wanted)}
+
+    def all_books(self) -> Set[str]:
+        with self.lock:
+            return set(self.doc_ids)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                'terms': len(self.term_ids),
+                'books': len(self.doc_ids),
+                'postings': sum(len(p.pages) for p in self.postings),
+                'bytes': sum(p.nbytes() for p in self.postings)
+            }
+
+def _find_docs(docs: array, wanted) -> Iterable[Tuple[int, int]]:
+    """(doc, index into docs) for each wanted internal id present in a term's docs"""
+    if len(wanted) * 16 < len(docs):
+        # Few wanted books: each term's books are in ascending id order, so bisect
+        positions = ((doc, bisect_left(docs, doc)) for doc in wanted)
+        return ((doc, i) for doc, i in positions if i < len(docs) and docs[i] == doc)
+    return ((doc, i) for i, doc in enumerate(docs) if doc in wanted)
+
+def book_id_values(book_ids: Iterable[str]) -> List:
+    """search_index stores book_id as a string or an ObjectId depending on the indexer"""
+    values = []
+    for book_id in book_ids:
+        values.append(book_id)
+        if ObjectId.is_valid(book_id):
+            values.append(ObjectId(book_id))
+    return values
+
+def book_filter(book_id: str) -> Dict:
+    return {'book_id': {'$in': book_id_values([book_id])}}
+
+def group_postings(rows: Iterable[Dict]) -> Dict[str, Dict[str, List[Tuple[int, int]]]]:
+    """book_id -> word -> [(page, frequency)] from raw search_index documents"""
+    books = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        books[str(row['book_id'])][row['word']].append((row['page_number'], row.get('frequency', 1)))
+    return books
+
+class LiveCompactIndex:
+    """CompactIndex loaded from search_index and kept current from index_events"""
+
+    def __init__(self, sync_interval: float = SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self.index: Optional[CompactIndex] = None
+        self.db = None
+        self.last_poll = None
+        self.applied = {}
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def start(self, db):
+        """Load in the background and keep polling; searches use Mongo until loaded"""
+        self.db = db
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='compact-index', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            self.reload()
+        except Exception as e:
+            print(f"❌ Compact index load failed: {e}")
+            return
+        while True:
+            time.sleep(self.sync_interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️  Compact index sync failed: {e}")
+
+    def reload(self):
+        """Build a fresh index from search_index; the old one serves until the swap"""
+        started = datetime.now()
+        start = time.perf_counter()
+        index = CompactIndex()
+        cursor = self.db.search_index.find({}, POSTING_FIELDS).sort([('book_id', 1)])
+        book_id, rows = None, []
+        for row in cursor:
+            if row['book_id'] != book_id and rows:
+                for name, word_pages in group_postings(rows).items():
+                    index.add_book(name, word_pages)
+                rows = []
+            book_id = row['book_id']
+            rows.append(row)
+        for name, word_pages in group_postings(rows).items():
+            index.add_book(name, word_pages)
+
+        self.index = index
+        if self.last_poll is None:
+            self.last_poll = started
+        stats = index.stats()
+        print(f"⚡ Compact index loaded: {stats['books']} books, {stats['terms']} terms, "
+              f"{stats['postings']} postings in {time.perf_counter() - start:.1f}s")
+
+    def poll(self) -> int:
+        """Apply index events published since the last poll"""
+        since = self.last_poll - EVENT_LOOKBACK
+        self.last_poll = datetime.now()
+        applied = 0
+        events = self.db[INDEX_EVENTS_COLLECTION].find({'created_at': {'$gte': since}}).sort('created_at', 1)
+        for event in events:
+            if event['_id'] in self.applied:
+                continue
+            self.applied[event['_id']] = event['created_at']
+            self.apply_event(event)
+            applied += 1
+
+        # Only events inside the look-back window can be seen again
+        self.applied = {key: created for key, created in self.applied.items() if created >= since}
+        return applied
+
+    def apply_event(self, event: Dict):
+        if event['type'] == INDEX_REBUILT:
+            self.reload()
+        elif event['type'] == BOOK_REMOVED:
+            self.index.remove_book(event['book_id'])
+        elif event['type'] == BOOK_INDEXED:
+            rows = self.db.search_index.find(book_filter(event['book_id']), POSTING_FIELDS)
+            self.index.add_book(event['book_id'], group_postings(rows).get(event['book_id'], {}))
+
+    def search(self, terms: Iterable[str], limit: Optional[int] = None, scorer=None,
+               books: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        return self.index.search(terms, limit, scorer, books)
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        return self.index.document_frequencies(terms)
+
+    def term_books(self, word: str, books: Optional[Iterable[str]] = None) -> Set[str]:
+        return self.index.term_books(word, books)
+
+    def all_books(self) -> Set[str]:
+        return self.index.all_books()
+
+    def rank(self, terms: Iterable[str], limit: Optional[int] = None, scorer=None,
+             books: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        return self.index.rank(terms, limit, scorer, books)
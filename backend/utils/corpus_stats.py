@@ -0,0 +1,260 @@
+# backend/utils/corpus_stats.py
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, UpdateOne
+
+# document_stats holds each indexed book's own counts and is the source of truth for the
+# aggregate counters: term_stats (df, ttf per term) and corpus_stats (books, total words).
+TERM_STATS_COLLECTION = 'term_stats'
+DOCUMENT_STATS_COLLECTION = 'document_stats'
+CORPUS_STATS_COLLECTION = 'corpus_stats'
+CORPUS_ID = 'corpus'
+STATS_BATCH_SIZE = 1000
+STATS_SYNC_INTERVAL = 2.0
+# Counter updates from other processes can commit slightly out of order
+STATS_LOOKBACK = timedelta(seconds=10)
+TRANSACTION_TOPOLOGIES = ('ReplicaSetWithPrimary', 'Sharded', 'LoadBalanced')
+
+class BookStatsCollector:
+    """Counts one book's term frequencies and page lengths as its postings stream past"""
+
+    def __init__(self):
+        self.word_frequencies = Counter()
+        self.page_lengths = {}
+
+    def wrap(self, page_entries: Callable[[int, str], List[Dict]]) -> Callable[[int, str], List[Dict]]:
+        """Wrap a page_entries callable so every entry it returns is counted"""
+        def counted(page_num, text):
+            entries = page_entries(page_num, text)
+            length = 0
+            for entry in entries:
+                frequency = entry.get('frequency', 1)
+                self.word_frequencies[entry['word']] += frequency
+                length += frequency
+            if length:
+                self.page_lengths[page_num] = self.page_lengths.get(page_num, 0) + length
+            return entries
+        return counted
+
+def book_stats_document(book_id, word_frequencies: Dict[str, int], page_lengths: Dict[int, int]) -> Dict:
+    return {
+        '_id': str(book_id),
+        'total_words': sum(page_lengths.values()),
+        'unique_words': len(word_frequencies),
+        'word_frequencies': dict(word_frequencies),
+        'page_lengths': {str(page_num): length for page_num, length in page_lengths.items()},
+        'indexed_pages': len(page_lengths)
+    }
+
+def ensure_corpus_stats(db):
+    db[TERM_STATS_COLLECTION].create_index([('updated_at', ASCENDING)])
+    db[DOCUMENT_STATS_COLLECTION].create_index([('pending', ASCENDING)], sparse=True)
+
+def _run_atomically(db, apply: Callable):
+    """Run apply(session) in a transaction where the deployment supports one.
+
+    A standalone server has no transactions; there the book's document_stats
+    entry stays marked pending until its counters are applied, so an
+    interrupted update is visible to check_stats.py and fixed by --repair.
+    """
+    if db.client.topology_description.topology_type_name in TRANSACTION_TOPOLOGIES:
+        with db.client.start_session() as session:
+            session.with_transaction(apply)
+    else:
+        apply(None)
+
+def _apply_term_deltas(db, old: Dict[str, int], new: Dict[str, int], session):
+    now = datetime.now()
+    requests = []
+    for word in old.keys() | new.keys():
+        df = (word in new) - (word in old)
+        ttf = new.get(word, 0) - old.get(word, 0)
+        if df or ttf:
+            requests.append(UpdateOne(
+                {'_id': word},
+                {'$inc': {'df': df, 'ttf': ttf}, '$set': {'updated_at': now}},
+                upsert=True
+            ))
+    for start in range(0, len(requests), STATS_BATCH_SIZE):
+        db[TERM_STATS_COLLECTION].bulk_write(requests[start:start + STATS_BATCH_SIZE],
+                                             ordered=False, session=session)
+
+def apply_book_stats(db, book_id, word_frequencies: Dict[str, int], page_lengths: Dict[int, int]):
+    """Record a book's counts and move the term and corpus counters by the change.
+
+    Re-indexing a book replaces its earlier contribution rather than adding
+    to it, so the counters track search_index through repeated runs.
+    """
+    document = book_stats_document(book_id, word_frequencies, page_lengths)
+
+    def apply(session):
+        stats = db[DOCUMENT_STATS_COLLECTION]
+        previous = stats.find_one({'_id': document['_id']}, {'word_frequencies': 1, 'total_words': 1},
+                                  session=session)
+        stats.replace_one({'_id': document['_id']}, dict(document, pending=True), upsert=True, session=session)
+        _apply_term_deltas(db, (previous or {}).get('word_frequencies', {}), document['word_frequencies'], session)
+        db[CORPUS_STATS_COLLECTION].update_one(
+            {'_id': CORPUS_ID},
+            {'$inc': {
+                'books': 0 if previous else 1,
+                'total_words': document['total_words'] - (previous or {}).get('total_words', 0)
+            }},
+            upsert=True,
+            session=session
+        )
+        stats.update_one({'_id': document['_id']}, {'$unset': {'pending': ''}}, session=session)
+
+    _run_atomically(db, apply)
+
+def remove_book_stats(db, book_id):
+    """Take a book's contribution back out of the counters"""
+    book_id = str(book_id)
+
+    def apply(session):
+        stats = db[DOCUMENT_STATS_COLLECTION]
+        previous = stats.find_one_and_update({'_id': book_id}, {'$set': {'pending': True}}, session=session)
+        if not previous:
+            return
+        _apply_term_deltas(db, previous.get('word_frequencies', {}), {}, session)
+        db[CORPUS_STATS_COLLECTION].update_one(
+            {'_id': CORPUS_ID},
+            {'$inc': {'books': -1, 'total_words': -previous.get('total_words', 0)}},
+            session=session
+        )
+        stats.delete_one({'_id': book_id}, session=session)
+
+    _run_atomically(db, apply)
+
+def rebuild_term_stats(db, documents_collection: str = DOCUMENT_STATS_COLLECTION):
+    """Recompute term_stats and corpus_stats from per-book document_stats and swap them in"""
+    documents = db[documents_collection]
+    rebuild = f"{TERM_STATS_COLLECTION}_rebuild"
+    documents.aggregate([
+        {'$project': {'words': {'$objectToArray': '$word_frequencies'}}},
+        {'$unwind': '$words'},
+        {'$group': {'_id': '$words.k', 'df': {'$sum': 1}, 'ttf': {'$sum': '$words.v'}}},
+        {'$addFields': {'updated_at': '$$NOW'}},
+        {'$out': rebuild}
+    ], allowDiskUse=True)
+    # Also creates the collection when the library is empty, so the rename always has a source
+    db[rebuild].create_index([('updated_at', ASCENDING)])
+    db.client.admin.command('renameCollection', f"{db.name}.{rebuild}",
+                            to=f"{db.name}.{TERM_STATS_COLLECTION}", dropTarget=True)
+
+    totals = next(documents.aggregate([
+        {'$group': {'_id': None, 'books': {'$sum': 1}, 'total_words': {'$sum': '$total_words'}}}
+    ]), {})
+    # rebuilt_at tells in-memory mirrors to reload rather than apply updates
+    db[CORPUS_STATS_COLLECTION].replace_one(
+        {'_id': CORPUS_ID},
+        {'_id': CORPUS_ID, 'books': totals.get('books', 0), 'total_words': totals.get('total_words', 0),
+         'rebuilt_at': datetime.now()},
+        upsert=True
+    )
+
+class CorpusStats:
+    """Reads the statistics maintained at index time; no scans of search_index or books"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def totals(self) -> Tuple[int, float]:
+        """(indexed books, average book length in analyzed terms)"""
+        corpus = self.db[CORPUS_STATS_COLLECTION].find_one({'_id': CORPUS_ID}) or {}
+        books = corpus.get('books', 0)
+        return books, corpus.get('total_words', 0) / books if books else 0.0
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        """Books containing each term, in one query"""
+        terms = list(dict.fromkeys(terms))
+        frequencies = {term: 0 for term in terms}
+        for row in self.db[TERM_STATS_COLLECTION].find({'_id': {'$in': terms}}, {'df': 1}):
+            frequencies[row['_id']] = row.get('df', 0)
+        return frequencies
+
+class TermStatsMirror:
+    """In-memory copy of term_stats and corpus_stats, polled for changes.
+
+    Same read interface as CorpusStats, so ranking a query costs no round
+    trips once the mirror is loaded.
+    """
+
+    def __init__(self, sync_interval: float = STATS_SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self.terms: Dict[str, Tuple[int, int]] = {}  # word -> (df, ttf)
+        self.books = 0
+        self.total_words = 0
+        self.rebuilt_at = None
+        self.db = None
+        self.last_poll: Optional[datetime] = None
+        self.loaded = False
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded
+
+    def start(self, db):
+        """Load in the background and keep polling; CorpusStats serves until loaded"""
+        self.db = db
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='term-stats', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            self.reload()
+        except Exception as e:
+            print(f"❌ Term statistics load failed: {e}")
+            return
+        while True:
+            time.sleep(self.sync_interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️  Term statistics sync failed: {e}")
+
+    def _read_corpus(self) -> Dict:
+        corpus = self.db[CORPUS_STATS_COLLECTION].find_one({'_id': CORPUS_ID}) or {}
+        self.books = corpus.get('books', 0)
+        self.total_words = corpus.get('total_words', 0)
+        return corpus
+
+    def reload(self):
+        started = datetime.now()
+        terms = {
+            row['_id']: (row['df'], row.get('ttf', 0))
+            for row in self.db[TERM_STATS_COLLECTION].find({'df': {'$gt': 0}}, {'df': 1, 'ttf': 1})
+        }
+        self.terms = terms
+        self.rebuilt_at = self._read_corpus().get('rebuilt_at')
+        self.last_poll = started
+        self.loaded = True
+        print(f"⚡ Term statistics loaded: {len(terms)} terms, {self.books} books")
+
+    def poll(self) -> int:
+        """Pick up counters changed since the last poll"""
+        since = self.last_poll - STATS_LOOKBACK
+        self.last_poll = datetime.now()
+        if self._read_corpus().get('rebuilt_at') != self.rebuilt_at:
+            self.reload()
+            return len(self.terms)
+
+        changed = 0
+        for row in self.db[TERM_STATS_COLLECTION].find({'updated_at': {'$gte': since}}, {'df': 1, 'ttf': 1}):
+            if row.get('df', 0) > 0:
+                self.terms[row['_id']] = (row['df'], row.get('ttf', 0))
+            else:
+                self.terms.pop(row['_id'], None)
+            changed += 1
+        return changed
+
+    def totals(self) -> Tuple[int, float]:
+        return self.books, self.total_words / self.books if self.books else 0.0
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        return {term: self.terms.get(term, (0, 0))[0] for term in dict.fromkeys(terms)}
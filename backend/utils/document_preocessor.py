@@ -1,57 +1,181 @@
-import PyPDF2
-from docx import Document
-from bs4 import BeautifulSoup
 import os
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.ocr import OCRStage
+from utils.pdf_extractor import PDFExtractor
+
+try:
+    from docx import Document
+except ImportError:  # python-docx is only needed for .docx uploads
+    Document = None
+
+# Formats without real pages are cut into pages of roughly this many characters
+PAGE_CHAR_BUDGET = 2000
+READ_CHUNK_SIZE = 1024 * 1024
+SUPPORTED_FORMATS = ['.pdf', '.docx', '.html', '.htm', '.txt']
+
+class PageSplitter:
+    """Cuts a stream of text pieces into pages of a fixed character budget"""
+
+    def __init__(self, page_chars: int = PAGE_CHAR_BUDGET):
+        self.page_chars = page_chars
+        self.parts: List[str] = []
+        self.size = 0
+        self.page_num = 0
+
+    def feed(self, text: str) -> Iterator[Tuple[int, str]]:
+        if not text:
+            return
+        self.parts.append(text)
+        self.size += len(text)
+
+        if self.size < self.page_chars:
+            return
+
+        # Join once per feed and walk a cursor, so a large chunk is not re-copied per page
+        buffered = ''.join(self.parts)
+        start = 0
+        while len(buffered) - start >= self.page_chars:
+            end = start + self.page_chars
+            # Prefer to break on whitespace so words are never split across pages
+            cut = max(buffered.rfind(' ', start + self.page_chars // 2, end),
+                      buffered.rfind('\n', start + self.page_chars // 2, end))
+            if cut <= start:
+                cut = end
+            self.page_num += 1
+            yield self.page_num, buffered[start:cut]
+            start = cut
+
+        rest = buffered[start:]
+        self.parts = [rest]
+        self.size = len(rest)
+
+    def flush(self) -> Iterator[Tuple[int, str]]:
+        buffered = ''.join(self.parts)
+        self.parts, self.size = [], 0
+        if buffered.strip():
+            self.page_num += 1
+            yield self.page_num, buffered
+
+class HTMLTextParser(HTMLParser):
+    """Incremental HTML to text; visible text is collected as chunks are fed"""
+
+    SKIP_TAGS = {'script', 'style', 'head', 'noscript', 'template'}
+    BLOCK_TAGS = {'p', 'div', 'br', 'li', 'tr', 'td', 'th', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+                  'section', 'article', 'header', 'footer', 'pre', 'blockquote', 'title'}
 
-class MultiFormatProcessor:
     def __init__(self):
-        self.supported_formats = ['.pdf', '.docx', '.html', '.txt']
-    
-    def extract_text_with_pages(self, file_path: str) -> Dict[int, str]:
-        """Extract text from multiple document formats"""
-        file_extension = os.path.splitext(file_path)[1].lower()
-        
+        super().__init__(convert_charrefs=True)
+        self.pieces: List[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.pieces.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.pieces.append('\n')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.pieces.append(data)
+
+    def drain(self) -> str:
+        text = ''.join(self.pieces)
+        self.pieces = []
+        return text
+
+class MultiFormatProcessor:
+    def __init__(self, extract_workers: int = 1, page_chars: int = PAGE_CHAR_BUDGET,
+                 pdf_extractor: Optional[PDFExtractor] = None, ocr: Optional[OCRStage] = None):
+        self.supported_formats = SUPPORTED_FORMATS
+        self.page_chars = page_chars
+        self.pdf_extractor = pdf_extractor or PDFExtractor(max_workers=extract_workers)
+        self.ocr = ocr
+
+    @staticmethod
+    def file_format(file_path: str) -> str:
+        return os.path.splitext(file_path)[1].lower()
+
+    def is_supported(self, file_path: str) -> bool:
+        return self.file_format(file_path) in self.supported_formats
+
+    def count_pages(self, file_path: str) -> Optional[int]:
+        """Page count up front for PDFs; other formats are only paged while streaming"""
+        if self.file_format(file_path) == '.pdf':
+            return self.pdf_extractor.count_pages(file_path)
+        return None
+
+    def iter_pages(self, file_path: str, content_hash: str = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) without holding the whole document in memory"""
+        file_extension = self.file_format(file_path)
+
         if file_extension == '.pdf':
-            return self._extract_pdf_text(file_path)
+            pages = self.pdf_extractor.iter_page_texts(file_path)
+            # Scanned pages have no text layer; OCR only those
+            if self.ocr is not None:
+                return self.ocr.fill_empty_pages(file_path, pages, content_hash)
+            return pages
         elif file_extension == '.docx':
-            return self._extract_docx_text(file_path)
-        elif file_extension == '.html':
-            return self._extract_html_text(file_path)
+            return self._iter_docx_pages(file_path)
+        elif file_extension in ('.html', '.htm'):
+            return self._iter_html_pages(file_path)
         elif file_extension == '.txt':
-            return self._extract_txt_text(file_path)
+            return self._iter_txt_pages(file_path)
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
-    
-    def _extract_pdf_text(self, file_path: str) -> Dict[int, str]:
-        """Enhanced PDF extraction with better OCR support"""
-        page_texts = {}
-        try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    text = page.extract_text()
-                    if text.strip():
-                        page_texts[page_num] = text
-        except Exception as e:
-            print(f"Error extracting PDF: {e}")
-        return page_texts
-    
-    def _extract_docx_text(self, file_path: str) -> Dict[int, str]:
+
+    def ocr_refill(self, file_path: str, content_hash: str = None) -> Optional[Callable]:
+        """OCR for the empty pages of a stored PDF's text, or None when it cannot run.
+
+        OCR that failed or was unavailable at ingestion leaves pages stored
+        empty; pages it read as blank come back from the OCR cache.
+        """
+        if self.ocr is None or self.file_format(file_path) != '.pdf' or not os.path.exists(file_path):
+            return None
+        return lambda pages: self.ocr.fill_empty_pages(file_path, pages, content_hash)
+
+    def extract_text_with_pages(self, file_path: str) -> Dict[int, str]:
+        """Extract text from multiple document formats"""
+        return {page_num: text for page_num, text in self.iter_pages(file_path) if text.strip()}
+
+    def _split_pages(self, pieces: Iterable[str]) -> Iterator[Tuple[int, str]]:
+        splitter = PageSplitter(self.page_chars)
+        for piece in pieces:
+            yield from splitter.feed(piece)
+        yield from splitter.flush()
+
+    def _iter_docx_pages(self, file_path: str) -> Iterator[Tuple[int, str]]:
         """Extract text from DOCX files"""
+        if Document is None:
+            raise ValueError('python-docx is required to process .docx files')
         doc = Document(file_path)
-        page_texts = {}
-        page_num = 1
-        current_text = ""
-        
-        for paragraph in doc.paragraphs:
-            current_text += paragraph.text + "\n"
-            # Simple page break detection (you can enhance this)
-            if len(current_text) > 2000:  # Approximate page length
-                page_texts[page_num] = current_text
-                page_num += 1
-                current_text = ""
-        
-        if current_text:
-            page_texts[page_num] = current_text
-        
-        return page_texts
+        return self._split_pages(paragraph.text + "\n" for paragraph in doc.paragraphs)
+
+    def _iter_html_pages(self, file_path: str) -> Iterator[Tuple[int, str]]:
+        parser = HTMLTextParser()
+
+        def pieces():
+            with open(file_path, 'r', encoding='utf-8', errors='replace',
+                      buffering=READ_CHUNK_SIZE) as file:
+                for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), ''):
+                    parser.feed(chunk)
+                    yield parser.drain()
+            parser.close()
+            yield parser.drain()
+
+        return self._split_pages(pieces())
+
+    def _iter_txt_pages(self, file_path: str) -> Iterator[Tuple[int, str]]:
+        def pieces():
+            with open(file_path, 'r', encoding='utf-8', errors='replace',
+                      buffering=READ_CHUNK_SIZE) as file:
+                yield from iter(lambda: file.read(READ_CHUNK_SIZE), '')
+
+        return self._split_pages(pieces())
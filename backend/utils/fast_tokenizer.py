@@ -0,0 +1,108 @@
+# backend/utils/fast_tokenizer.py
+"""Precompiled-regex stand-in for nltk.word_tokenize on the indexing hot path.
+
+The analyzer only keeps purely alphabetic tokens, so instead of running
+Punkt + Treebank and discarding most of the output, this finds letter runs
+that Treebank would have emitted as whole tokens:
+
+* a run counts only when it is bounded by whitespace or by punctuation
+  that Treebank splits off (quotes, brackets, , ; : ? ! etc., "--", "...");
+  runs glued to digits, hyphens, slashes or inner periods are dropped,
+  just as "state-of-the-art" or "e.g." fail isalpha() after word_tokenize
+* a trailing period splits off only at a sentence end (followed by
+  whitespace or end of text), except after common abbreviations
+* clitics behave like Treebank: "john's" -> "john", "couldn't" -> "could",
+  and "cannot"/"gonna"-style words are split the same way
+* an opening single quote stays glued to the word after it, as Treebank
+  only splits it off one-letter words: "the 'radar' system" keeps just
+  "the" and "system" ("'radar" is not alphabetic); a doubled '' splits off
+
+Punkt's sentence splitter uses a trained abbreviation model; only a small
+list of common abbreviations is mirrored here, so rare abbreviations
+followed by a period are the known source of divergence.
+benchmarks/check_tokenizer_equivalence.py measures agreement on sample pages.
+"""
+import re
+from typing import List
+
+LETTERS = r"[^\W\d_]+"
+
+# Characters Treebank always separates from neighbouring words
+SPLIT_CHARS = r"\s\"()\[\]{}<>;@#$%&?!*`“”‘’«»„"
+
+# A run may start after a boundary, "--", "..", '', or an opening quote ' that
+# itself follows a boundary (so clitics like 's and 't never start a token);
+# after a single ' only one-letter runs survive, see tokenize()
+TOKEN_PATTERN = re.compile(
+    rf"(?:(?<![^{SPLIT_CHARS},:])|(?<=--)|(?<=\.\.)|(?<='')|(?<=^')|(?<=[{SPLIT_CHARS},:]'))({LETTERS})"
+)
+
+# Treebank splits ' from a following one-letter word, unless it reads as a clitic
+QUOTE_SPLIT_LETTER = re.compile(r"[^\W\d_mtsdn]")
+
+# What may follow a run for it to be a whole token
+BOUNDARY_PATTERN = re.compile(
+    rf"""
+    $ | [{SPLIT_CHARS}]          # whitespace / always-split punctuation
+    | [,:](?!\d)                 # , and : split unless a number continues
+    | --                         # double dash
+    | ''                         # doubled closing quote
+    | \.\.                       # ellipsis
+    | \.[\]\)}}>"']*(?:\s|$)     # sentence-final period
+    | '(?:s|m|d|ll|re|ve)?(?=[{SPLIT_CHARS},:.]|$)   # clitic or closing quote
+    """,
+    re.VERBOSE
+)
+
+NEGATION_PATTERN = re.compile(rf"n't(?=[{SPLIT_CHARS},:.]|$)")
+
+# Treebank's CONTRACTIONS2 splits these into two tokens
+SPLIT_WORDS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+# Punkt does not end a sentence after these, so "etc." stays one token
+ABBREVIATIONS = {
+    'etc', 'fig', 'figs', 'vol', 'vols', 'approx', 'dept', 'prof', 'inc', 'ltd', 'corp',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+    'mrs', 'esp', 'est', 'eqn', 'eqns', 'sec', 'resp', 'refs', 'nos', 'viz', 'cf', 'al',
+}
+
+def tokenize(text: str) -> List[str]:
+    """Alphabetic tokens that word_tokenize(text) would produce, in order.
+
+    Expects lowercased text, as the analyzer passes it.
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text):
+        word = match.group(1)
+        start, end = match.span(1)
+
+        # "'radar" stays one token and fails isalpha(); "'a" splits into ' and a
+        if start and text[start - 1] == "'" and not text.startswith("''", start - 2) \
+                and not (len(word) == 1 and QUOTE_SPLIT_LETTER.match(word)):
+            continue
+
+        # "couldn't" -> "could" + "n't"
+        if word.endswith('n') and text.startswith("'t", end) and NEGATION_PATTERN.match(text, end - 1):
+            if len(word) > 1:
+                tokens.append(word[:-1])
+            continue
+
+        if not BOUNDARY_PATTERN.match(text, end):
+            continue
+
+        if word in ABBREVIATIONS and text.startswith('.', end) and not text.startswith('..', end):
+            continue
+
+        split = SPLIT_WORDS.get(word)
+        if split:
+            tokens.extend(split)
+        else:
+            tokens.append(word)
+    return tokens
@@ -0,0 +1,24 @@
+# backend/utils/index_events.py
+from datetime import datetime
+
+# Written by whoever changes search_index; in-process search engines poll it to stay current
+INDEX_EVENTS_COLLECTION = 'index_events'
+BOOK_INDEXED = 'book_indexed'
+BOOK_REMOVED = 'book_removed'
+INDEX_REBUILT = 'index_rebuilt'
+EVENT_TTL_SECONDS = 7 * 24 * 3600
+
+def publish_index_event(db, event_type: str, book_id=None):
+    """Record a change to search_index; never fails the caller"""
+    try:
+        db[INDEX_EVENTS_COLLECTION].insert_one({
+            'type': event_type,
+            'book_id': str(book_id) if book_id is not None else None,
+            'created_at': datetime.now()
+        })
+    except Exception as e:
+        print(f"⚠️  Could not publish index event {event_type}: {e}")
+
+def ensure_index_events(db):
+    """Events are only needed until every process has polled them"""
+    db[INDEX_EVENTS_COLLECTION].create_index('created_at', expireAfterSeconds=EVENT_TTL_SECONDS)
@@ -0,0 +1,50 @@
+# backend/utils/index_pipeline.py
+from typing import Callable, Dict, Iterable, List, Tuple
+
+DEFAULT_BATCH_SIZE = 1000
+
+class PostingBatcher:
+    """Buffers index entries and hands them to a writer in bounded batches"""
+
+    def __init__(self, write_batch: Callable[[List[Dict]], None], batch_size: int = DEFAULT_BATCH_SIZE):
+        self.write_batch = write_batch
+        self.batch_size = max(1, batch_size)
+        self.buffer = []
+        self.written = 0
+
+    def add(self, entries: Iterable[Dict]):
+        for entry in entries:
+            self.buffer.append(entry)
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.write_batch(self.buffer)
+            self.written += len(self.buffer)
+            self.buffer = []
+
+def stream_index_pages(pages: Iterable[Tuple[int, str]],
+                       page_entries: Callable[[int, str], Iterable[Dict]],
+                       write_batch: Callable[[List[Dict]], None],
+                       batch_size: int = DEFAULT_BATCH_SIZE,
+                       progress_callback: Callable[[int], None] = None) -> Tuple[int, int]:
+    """Run page -> postings -> batched writes one page at a time.
+
+    Only the current page and one pending batch are held in memory, so
+    memory stays flat regardless of document length. Returns
+    (pages_seen, entries_written).
+    """
+    batcher = PostingBatcher(write_batch, batch_size)
+    pages_seen = 0
+
+    for page_num, text in pages:
+        pages_seen += 1
+        if text and text.strip():
+            batcher.add(page_entries(page_num, text))
+
+        if progress_callback:
+            progress_callback(pages_seen)
+
+    batcher.flush()
+    return pages_seen, batcher.written
@@ -1,63 +1,79 @@
-from utils.pdf_extractor import PDFExtractor
+from utils.document_preocessor import MultiFormatProcessor
 from utils.text_processor import TextProcessor
+from utils.index_pipeline import DEFAULT_BATCH_SIZE, stream_index_pages
+from utils.text_store import TextStore
+from utils.index_events import BOOK_INDEXED, publish_index_event
+from utils.corpus_stats import BookStatsCollector, apply_book_stats
+from utils.search_pipeline import aggregate_book_matches
+from utils.page_ranker import PageRanker
 from models.search_index import SearchIndex
 from bson import ObjectId
 
 class DocumentIndexer:
-    def __init__(self, db_connection):
-        self.pdf_extractor = PDFExtractor()
+    def __init__(self, db_connection, batch_size: int = DEFAULT_BATCH_SIZE, text_store: TextStore = None):
+        self.db = db_connection
+        self.document_processor = MultiFormatProcessor()
         self.text_processor = TextProcessor()
-        self.search_index = SearchIndex(db_connection)
+        self.search_index = SearchIndex(db_connection, batch_size=batch_size)
+        self.batch_size = batch_size
+        self.text_store = text_store
     
-    def index_document(self, book_id: str, file_path: str):
+    def index_document(self, book_id: str, file_path: str, content_hash: str = None):
         print(f"Starting indexing for book: {book_id}")
         
-        page_texts = self.pdf_extractor.extract_text_with_pages(file_path)
-        total_words_indexed = 0
-        
-        for page_num, text in page_texts.items():
+        def page_entries(page_num, text):
             keywords = self.text_processor.extract_keywords(text)
-            
-            for position, keyword in enumerate(keywords):
-                self.search_index.add_index_entry(
-                    word=keyword,
-                    book_id=book_id,
-                    page_number=page_num,
-                    position=position
-                )
-                total_words_indexed += 1
+            return [
+                {'word': keyword.lower(), 'book_id': book_id, 'page_number': page_num, 'position': position}
+                for position, keyword in enumerate(keywords)
+            ]
+        
+        # Reuse stored page text when this content was extracted before
+        if self.text_store and content_hash:
+            pages = self.text_store.iter_pages(
+                content_hash, lambda: self.document_processor.iter_pages(file_path, content_hash),
+                self.document_processor.ocr_refill(file_path, content_hash)
+            )
+        else:
+            pages = self.document_processor.iter_pages(file_path)
+        
+        # Pages are extracted, tokenized and bulk-upserted one batch at a time
+        book_stats = BookStatsCollector()
+        _, total_words_indexed = stream_index_pages(
+            pages,
+            book_stats.wrap(page_entries),
+            self.search_index.add_index_entries,
+            batch_size=self.batch_size
+        )
         
         print(f"Indexing completed. Total words indexed: {total_words_indexed}")
+        apply_book_stats(self.db, book_id, book_stats.word_frequencies, book_stats.page_lengths)
+        publish_index_event(self.db, BOOK_INDEXED, book_id)
         return total_words_indexed
     
     def search_documents(self, query: str, limit: int = 10):
         query_keywords = self.text_processor.extract_keywords(query)
-        search_results = {}
-        
-        for keyword in query_keywords:
-            results = self.search_index.search_word(keyword)
-            
-            for result in results:
-                book_id = str(result['book_id'])
-                
-                if book_id not in search_results:
-                    search_results[book_id] = {
-                        'book_id': book_id,
-                        'pages': set(),
-                        'total_matches': 0,
-                        'keywords_found': []
-                    }
-                
-                search_results[book_id]['pages'].add(result['page_number'])
-                search_results[book_id]['total_matches'] += result['frequency']
-                search_results[book_id]['keywords_found'].append(keyword)
         
-        final_results = []
-        for book_id, data in search_results.items():
-            data['pages'] = sorted(list(data['pages']))
-            data['relevance_score'] = data['total_matches'] * len(data['keywords_found'])
-            final_results.append(data)
+        # Relevance is total matches times matching postings, ranked server-side
+        matches = aggregate_book_matches(
+            self.search_index.collection,
+            query_keywords,
+            limit,
+            score={'$multiply': ['$total_matches', '$postings']}
+        )
+        top_pages = PageRanker(self.search_index.collection).rank(
+            query_keywords, {match['book_id']: match for match in matches}
+        )
         
-        final_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return final_results[:limit]
+        return [
+            {
+                'book_id': match['book_id'],
+                'pages': sorted(match['pages']),
+                'top_pages': top_pages.get(match['book_id'], []),
+                'total_matches': match['total_matches'],
+                'keywords_found': sorted(match['words_found']),
+                'relevance_score': match['score']
+            }
+            for match in matches
+        ]
 
@@ -0,0 +1,183 @@
+# backend/utils/ingestion.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from bson import ObjectId
+from pymongo import MongoClient
+
+from utils.corpus_stats import BookStatsCollector, apply_book_stats, remove_book_stats
+from utils.index_events import BOOK_INDEXED, publish_index_event
+from utils.index_pipeline import DEFAULT_BATCH_SIZE, stream_index_pages
+from utils.job_queue import JobQueue
+from utils.pdf_processor import PDFProcessor
+from utils.reindexer import begin_ingest, end_ingest
+from utils.text_store import TextStore
+
+# Per-process state, built once by the pool initializer
+_worker_processor = None
+
+def _init_worker(extract_workers=1, ocr_workers=0, ocr_cache_path=None):
+    global _worker_processor
+    _worker_processor = PDFProcessor(extract_workers=extract_workers, ocr_workers=ocr_workers,
+                                     ocr_cache_path=ocr_cache_path)
+
+def run_ingestion_job(job_id: str, queue_path: str, mongo_uri: str, database_name: str,
+                      options: dict = None) -> int:
+    """Extract and index one uploaded document inside a pool worker"""
+    options = options or {}
+    if _worker_processor is None:
+        _init_worker(options.get('extract_workers', 1), options.get('ocr_workers', 0),
+                     options.get('ocr_cache_path'))
+
+    queue = JobQueue(queue_path)
+    if not queue.claim(job_id):
+        return 0
+
+    job = queue.get_job(job_id)
+    book_id = job['book_id']
+    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+    db = client[database_name]
+    leased = False
+
+    try:
+        # Waits while a corpus reindex swaps search_index, which would drop what we write
+        begin_ingest(db, book_id)
+        leased = True
+        file_path = job['file_path']
+        documents = _worker_processor.documents
+        book = db.books.find_one({'_id': ObjectId(book_id)}, {'content_hash': 1}) or {}
+        content_hash = book.get('content_hash')
+        text_store = TextStore(options['text_store_path']) if options.get('text_store_path') else None
+
+        # Previously extracted text is read back from the store instead of the file.
+        # Non-PDF formats are only paged while streaming, so their total starts unknown (None)
+        if text_store and text_store.has(content_hash):
+            total_pages = text_store.page_count(content_hash)
+        else:
+            total_pages = documents.count_pages(file_path)
+        if total_pages == 0:
+            if os.path.exists(file_path):
+                os.remove(file_path)  # Clean up
+            raise ValueError('Failed to extract text from document')
+
+        def extract_pages():
+            return documents.iter_pages(file_path, content_hash)
+
+        pages = text_store.iter_pages(content_hash, extract_pages, documents.ocr_refill(file_path, content_hash)) \
+            if text_store and content_hash else extract_pages()
+
+        def report_progress(pages_done):
+            queue.update_progress(job_id, 'indexing', pages_done, total_pages or 0)
+
+        # Stream page -> postings -> batched inserts; the book is never held in memory
+        print(f"📄 Processing document: {file_path}")
+        print(f"🔍 Creating search index for book: {book_id}")
+        # A run interrupted by a restart already wrote some batches; the retry starts from page 1
+        db.search_index.delete_many({'book_id': book_id})
+        book_stats = BookStatsCollector()
+        pages_seen, words_indexed = stream_index_pages(
+            pages,
+            book_stats.wrap(lambda page_num, text: _worker_processor.page_index_entries(book_id, page_num, text)),
+            db.search_index.insert_many,
+            batch_size=options.get('batch_size', DEFAULT_BATCH_SIZE),
+            progress_callback=report_progress
+        )
+        print(f"✅ Indexed {words_indexed} word entries")
+        if not words_indexed:
+            raise ValueError('No text extracted from document')
+        if total_pages is None:
+            total_pages = pages_seen
+
+        db.books.update_one(
+            {'_id': ObjectId(book_id)},
+            {'$set': {
+                'status': 'active',
+                'total_pages': total_pages,
+                'words_indexed': words_indexed,
+                'indexed_date': datetime.now()
+            }}
+        )
+        # Duplicate uploads linked while this job was running share its postings
+        db.books.update_many(
+            {'index_book_id': book_id, 'status': 'processing'},
+            {'$set': {'status': 'active', 'total_pages': total_pages}}
+        )
+        # Lengths and document frequencies for BM25 ranking
+        apply_book_stats(db, book_id, book_stats.word_frequencies, book_stats.page_lengths)
+        publish_index_event(db, BOOK_INDEXED, book_id)
+        queue.mark_done(job_id, words_indexed)
+        return words_indexed
+
+    except Exception as e:
+        print(f"❌ Ingestion job {job_id} failed: {e}")
+        queue.mark_failed(job_id, str(e))
+        try:
+            db.search_index.delete_many({'book_id': book_id})  # Drop partial postings
+            remove_book_stats(db, book_id)  # ...and any counts from an earlier successful run
+            db.books.update_many(
+                {'$or': [{'_id': ObjectId(book_id)}, {'index_book_id': book_id}]},
+                {'$set': {'status': 'failed'}}
+            )
+        except Exception:
+            pass
+        return 0
+    finally:
+        if leased:
+            try:
+                end_ingest(db, book_id)
+            except Exception as e:
+                print(f"⚠️  Could not release ingestion lease for {book_id}: {e}")
+        client.close()
+
+class IngestionWorker:
+    """Runs queued ingestion jobs on a process pool"""
+
+    def __init__(self, queue: JobQueue, mongo_uri: str, database_name: str, max_workers: int = 2,
+                 extract_workers: int = 1, batch_size: int = DEFAULT_BATCH_SIZE,
+                 text_store_path: str = None, ocr_workers: int = 0, ocr_cache_path: str = None):
+        self.queue = queue
+        self.mongo_uri = mongo_uri
+        self.database_name = database_name
+        self.max_workers = max(1, max_workers)
+        self.extract_workers = max(1, extract_workers)
+        self.batch_size = batch_size
+        self.text_store_path = text_store_path
+        self.ocr_workers = ocr_workers
+        self.ocr_cache_path = ocr_cache_path
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.extract_workers, self.ocr_workers, self.ocr_cache_path)
+            )
+        return self._executor
+
+    def submit(self, job_id: str):
+        """Hand a queued job to the worker pool"""
+        options = {
+            'extract_workers': self.extract_workers,
+            'batch_size': self.batch_size,
+            'text_store_path': self.text_store_path,
+            'ocr_workers': self.ocr_workers,
+            'ocr_cache_path': self.ocr_cache_path
+        }
+        return self._get_executor().submit(
+            run_ingestion_job, job_id, self.queue.db_path, self.mongo_uri, self.database_name, options
+        )
+
+    def resume_pending(self) -> int:
+        """Resubmit jobs left queued or interrupted by a previous shutdown"""
+        pending = self.queue.requeue_unfinished()
+        for job in pending:
+            self.submit(job['id'])
+        if pending:
+            print(f"🔄 Resumed {len(pending)} pending ingestion jobs")
+        return len(pending)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
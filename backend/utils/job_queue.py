@@ -0,0 +1,119 @@
+# backend/utils/job_queue.py
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class JobQueue:
+    """Durable ingestion job queue backed by a local SQLite file.
+
+    Every process (web workers and ingestion workers) opens its own
+    connection, so job state and page progress survive restarts.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    book_id TEXT,
+                    file_path TEXT NOT NULL,
+                    payload TEXT,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    pages_done INTEGER DEFAULT 0,
+                    total_pages INTEGER DEFAULT 0,
+                    words_indexed INTEGER DEFAULT 0,
+                    error TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)')
+
+    def enqueue(self, book_id: str, file_path: str, payload: Optional[Dict] = None) -> str:
+        """Add a new ingestion job and return its id"""
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, book_id, file_path, payload, status, stage, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, book_id, file_path, json.dumps(payload or {}), 'queued', 'queued', now, now)
+            )
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Return job state as a plain dict"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'] or '{}')
+        total_pages = job['total_pages'] or 0
+        job['progress'] = round(job['pages_done'] / total_pages, 4) if total_pages else 0.0
+        return job
+
+    def claim(self, job_id: str) -> bool:
+        """Move a queued job to running; False if another worker already has it"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'running', stage = 'extracting', attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ? AND status = 'queued'",
+                (datetime.now().isoformat(), job_id)
+            )
+        return cursor.rowcount == 1
+
+    def update_progress(self, job_id: str, stage: str, pages_done: int, total_pages: int):
+        """Record per-page progress for a running job"""
+        self._update(job_id, 'stage = ?, pages_done = ?, total_pages = ?', (stage, pages_done, total_pages))
+
+    def mark_done(self, job_id: str, words_indexed: int):
+        self._update(job_id, "status = 'done', stage = 'done', words_indexed = ?", (words_indexed,))
+
+    def mark_failed(self, job_id: str, error: str):
+        self._update(job_id, "status = 'failed', error = ?", (error,))
+
+    def requeue_unfinished(self) -> List[Dict]:
+        """Reset jobs interrupted by a restart and return everything still pending"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', stage = 'queued', pages_done = 0, updated_at = ? "
+                "WHERE status = 'running'",
+                (datetime.now().isoformat(),)
+            )
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        return [self.get_job(row['id']) for row in rows]
+
+    def _update(self, job_id: str, assignments: str, params: tuple = ()):
+        with self._connect() as conn:
+            conn.execute(
+                f'UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?',
+                params + (datetime.now().isoformat(), job_id)
+            )
@@ -0,0 +1,122 @@
+# backend/utils/metadata_index.py
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Set
+
+# Book fields the query language can filter on
+METADATA_FIELDS = ('subject', 'author', 'classification', 'year')
+METADATA_BOOK_FIELDS = {'author': 1, 'subject': 1, 'classification': 1, 'publication_date': 1,
+                        'upload_date': 1, 'index_book_id': 1}
+# Edits made by other processes are picked up after this long
+METADATA_TTL_SECONDS = 60
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+YEAR_PATTERN = re.compile(r'\b(1[5-9]\d\d|2\d\d\d)\b')
+YEAR_RANGE_PATTERN = re.compile(r'^(\d{4})\.\.(\d{4})$')
+YEAR_COMPARE_PATTERN = re.compile(r'^(>=|<=|>|<)?(\d{4})$')
+
+def field_words(value) -> Set[str]:
+    return set(WORD_PATTERN.findall(str(value or '').lower()))
+
+def book_year(book: Dict):
+    """Publication year when recorded, otherwise the year it was uploaded"""
+    match = YEAR_PATTERN.search(str(book.get('publication_date') or ''))
+    if match:
+        return int(match.group(1))
+    upload_date = book.get('upload_date')
+    return upload_date.year if upload_date else None
+
+class MetadataIndex:
+    """Precomputed book-id sets per metadata field value, for query filters.
+
+    Sets are keyed by the book id postings carry, so a book matches a
+    filter when any record sharing its postings does. author and subject
+    match on words (author:smith finds "John Smith"), classification on
+    the whole value, year on the publication year (see book_year).
+    """
+
+    def __init__(self, collection, ttl_seconds: float = METADATA_TTL_SECONDS):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.loaded_at = None
+        self.books = set()
+        self.words = {}  # field -> word -> book ids
+        self.years = {}  # year -> book ids
+        self.lock = threading.Lock()
+
+    def _load(self):
+        books = set()
+        words = {field: defaultdict(set) for field in ('subject', 'author', 'classification')}
+        years = defaultdict(set)
+        for book in self.collection.find({'status': {'$ne': 'deleted'}}, METADATA_BOOK_FIELDS):
+            key = book.get('index_book_id') or str(book['_id'])
+            books.add(key)
+            for field in ('subject', 'author'):
+                for word in field_words(book.get(field)):
+                    words[field][word].add(key)
+            words['classification'][str(book.get('classification') or 'public').lower()].add(key)
+            year = book_year(book)
+            if year is not None:
+                years[year].add(key)
+        self.books, self.words, self.years = books, words, years
+        self.loaded_at = time.monotonic()
+
+    def _fresh(self):
+        with self.lock:
+            if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl_seconds:
+                self._load()
+
+    def invalidate(self):
+        with self.lock:
+            self.loaded_at = None
+
+    def all_books(self) -> Set[str]:
+        self._fresh()
+        return set(self.books)
+
+    def matching(self, field: str, value: str) -> Set[str]:
+        """Book ids whose `field` matches `value`"""
+        self._fresh()
+        if field == 'year':
+            return self._years(value)
+        if field == 'classification':
+            return set(self.words['classification'].get(value.strip().lower(), ()))
+        # Every word of the value must appear in the field; rarest first keeps the sets small
+        index = self.words[field]
+        found = None
+        for word in sorted(field_words(value), key=lambda word: len(index.get(word, ()))):
+            books = index.get(word, set())
+            found = set(books) if found is None else found & books
+            if not found:
+                break
+        return found or set()
+
+    def _years(self, value: str) -> Set[str]:
+        value = value.strip()
+        span = YEAR_RANGE_PATTERN.match(value)
+        if span:
+            low, high = int(span.group(1)), int(span.group(2))
+        else:
+            compare = YEAR_COMPARE_PATTERN.match(value)
+            if not compare:
+                return set()
+            operator, year = compare.group(1), int(compare.group(2))
+            low, high = {
+                None: (year, year), '>=': (year, 9999), '>': (year + 1, 9999),
+                '<=': (0, year), '<': (0, year - 1)
+            }[operator]
+        return set().union(*(books for year, books in self.years.items() if low <= year <= high))
+
+_shared_index = None
+
+def get_metadata_index(collection) -> MetadataIndex:
+    """Process-wide index, so model writes can invalidate what search reads"""
+    global _shared_index
+    if _shared_index is None or _shared_index.collection != collection:
+        _shared_index = MetadataIndex(collection)
+    return _shared_index
+
+def invalidate_metadata_index():
+    if _shared_index is not None:
+        _shared_index.invalidate()
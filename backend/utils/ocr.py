@@ -0,0 +1,142 @@
+# backend/utils/ocr.py
+import os
+import shutil
+import sqlite3
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
+
+from utils.uploads import hash_file
+
+OCR_DPI = 300
+OCR_LANGUAGE = 'eng'
+OCR_TIMEOUT = 120  # seconds per page, per tool
+
+def ocr_available() -> bool:
+    """Tesseract and poppler's pdftoppm are both needed; either may be missing"""
+    return bool(shutil.which('tesseract') and shutil.which('pdftoppm'))
+
+def ocr_page(pdf_path: str, page_number: int, dpi: int = OCR_DPI, language: str = OCR_LANGUAGE) -> str:
+    """Rasterize one PDF page and run it through Tesseract, all in memory"""
+    image = subprocess.run(
+        ['pdftoppm', '-f', str(page_number), '-l', str(page_number), '-r', str(dpi),
+         '-gray', '-png', '-singlefile', pdf_path],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True, timeout=OCR_TIMEOUT
+    ).stdout
+    result = subprocess.run(
+        ['tesseract', 'stdin', 'stdout', '-l', language],
+        input=image, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True, timeout=OCR_TIMEOUT
+    )
+    return result.stdout.decode('utf-8', errors='replace')
+
+class OCRCache:
+    """OCR text per (file hash, page number) in a local SQLite file"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_pages (
+                    content_hash TEXT NOT NULL,
+                    page_number INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    language TEXT,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (content_hash, page_number)
+                )
+            """)
+
+    def get(self, content_hash: str, page_number: int) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT text FROM ocr_pages WHERE content_hash = ? AND page_number = ?',
+                (content_hash, page_number)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, content_hash: str, page_number: int, text: str, language: str = OCR_LANGUAGE):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO ocr_pages (content_hash, page_number, text, language, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (content_hash, page_number, text, language, datetime.now().isoformat())
+            )
+
+class OCRStage:
+    """Fills in pages that came back from text extraction empty.
+
+    Each OCR call is a pair of external processes, so a small thread pool
+    is enough to keep `max_workers` Tesseract processes busy. Pages stay in
+    order and only a bounded window is in flight at a time.
+    """
+
+    def __init__(self, cache: OCRCache, max_workers: int = 2, dpi: int = OCR_DPI,
+                 language: str = OCR_LANGUAGE):
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+        self.dpi = dpi
+        self.language = language
+
+    def _ocr_and_cache(self, pdf_path: str, content_hash: str, page_number: int) -> str:
+        try:
+            text = ocr_page(pdf_path, page_number, self.dpi, self.language)
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"Warning: OCR failed for page {page_number}: {e}")
+            return ""  # Not cached, so a later run retries the page
+        self.cache.put(content_hash, page_number, text, self.language)
+        return text
+
+    def fill_empty_pages(self, pdf_path: str, pages: Iterable[Tuple[int, str]],
+                         content_hash: str = None) -> Iterator[Tuple[int, str]]:
+        """Yield the page stream with empty pages replaced by (cached) OCR text"""
+        content_hash = content_hash or hash_file(pdf_path)
+        start = time.perf_counter()
+        ocr_pages, cached_pages = 0, 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            window = deque()
+            for page_number, text in pages:
+                if not text.strip():
+                    cached = self.cache.get(content_hash, page_number)
+                    if cached is not None:
+                        cached_pages += 1
+                        text = cached
+                    else:
+                        ocr_pages += 1
+                        text = executor.submit(self._ocr_and_cache, pdf_path, content_hash, page_number)
+                window.append((page_number, text))
+
+                # Text pages queue behind in-flight OCR so output stays in page order
+                while window and (len(window) > self.max_workers * 2 or isinstance(window[0][1], str)):
+                    page, result = window.popleft()
+                    yield page, result if isinstance(result, str) else result.result()
+
+            while window:
+                page, result = window.popleft()
+                yield page, result if isinstance(result, str) else result.result()
+
+        if ocr_pages or cached_pages:
+            seconds = time.perf_counter() - start
+            rate = ocr_pages / seconds * 60 if seconds and ocr_pages else 0
+            print(f"🔎 OCR: {ocr_pages} pages in {seconds:.1f}s ({rate:.1f} pages/min), "
+                  f"{cached_pages} from cache")
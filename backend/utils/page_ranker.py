@@ -0,0 +1,127 @@
+# backend/utils/page_ranker.py
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.positional import fetch_page_positions
+
+PAGES_PER_BOOK = 3
+# Pages per book whose positions are fetched in one round
+PAGE_BATCH = 8
+PAGE_TF_K1 = 1.2
+PROXIMITY_WEIGHT = 1.0
+
+def min_window(term_positions: List[List[int]]) -> int:
+    """Length of the shortest span holding at least one position from every (sorted) list"""
+    heap = [(positions[0], i, 0) for i, positions in enumerate(term_positions)]
+    heapq.heapify(heap)
+    high = max(position for position, _, _ in heap)
+    best = high - heap[0][0]
+    while True:
+        low, i, j = heapq.heappop(heap)
+        best = min(best, high - low)
+        if j + 1 == len(term_positions[i]):
+            return best
+        position = term_positions[i][j + 1]
+        high = max(high, position)
+        heapq.heappush(heap, (position, i, j + 1))
+
+def page_term_frequencies(match: Dict) -> Dict[int, Dict[str, int]]:
+    """page -> word -> frequency from a match's per-term page lists"""
+    pages = {}
+    for word, term_pages in match.get('term_pages', {}).items():
+        for page, frequency in term_pages.items():
+            pages.setdefault(page, {})[word] = frequency
+    return pages
+
+class PageRanker:
+    """Scores a book's pages by weighted term coverage plus how close together the terms sit.
+
+    Pages are visited in order of an upper bound that assumes the terms are
+    adjacent, so positional postings are only fetched for pages that could
+    still enter a book's top N. Pages matching one term need no positions.
+    """
+
+    def __init__(self, search_index, pages_per_book: int = PAGES_PER_BOOK, batch_pages: int = PAGE_BATCH,
+                 proximity_weight: float = PROXIMITY_WEIGHT):
+        self.search_index = search_index
+        self.pages_per_book = pages_per_book
+        self.batch_pages = batch_pages
+        self.proximity_weight = proximity_weight
+
+    def _coverage(self, term_freqs: Dict[str, int], weights: Dict[str, float]) -> float:
+        return sum(weights.get(word, 1.0) * frequency / (frequency + PAGE_TF_K1)
+                   for word, frequency in term_freqs.items())
+
+    def _proximity_bound(self, term_freqs: Dict[str, int], weights: Dict[str, float]) -> float:
+        if len(term_freqs) < 2:
+            return 0.0
+        return self.proximity_weight * sum(weights.get(word, 1.0) for word in term_freqs)
+
+    def _proximity(self, term_freqs: Dict[str, int], positions: Dict[str, List[int]],
+                   weights: Dict[str, float]) -> float:
+        """Full bonus when the terms are adjacent, shrinking as the window around them grows"""
+        lists = [positions[word] for word in term_freqs if positions.get(word)]
+        if len(lists) < 2:
+            return 0.0
+        window = min_window(lists)
+        return self._proximity_bound(term_freqs, weights) * (len(lists) - 1) / max(window, len(lists) - 1)
+
+    def rank(self, terms: Iterable[str], book_matches: Dict[str, Dict],
+             weights: Optional[Dict[str, float]] = None) -> Dict[str, List[Dict]]:
+        """Top pages per book: {book_id: [{'page', 'score'}, ...]}, best first"""
+        terms = list(dict.fromkeys(terms))
+        weights = weights or {}
+        states = {}
+        for book_id, match in book_matches.items():
+            pages = page_term_frequencies(match)
+            bounds = []
+            for page, term_freqs in pages.items():
+                coverage = self._coverage(term_freqs, weights)
+                bounds.append((-(coverage + self._proximity_bound(term_freqs, weights)), page, coverage))
+            # Upper bounds are popped best first; exact scores collect in a bounded min-heap
+            heapq.heapify(bounds)
+            states[str(book_id)] = {'pages': pages, 'bounds': bounds, 'top': []}
+
+        open_books = dict(states)
+        while open_books:
+            wanted = {}
+            for book_id, state in list(open_books.items()):
+                batch = []
+                top, bounds = state['top'], state['bounds']
+                while bounds and len(batch) < self.batch_pages:
+                    if len(top) >= self.pages_per_book and -bounds[0][0] <= top[0][0]:
+                        break
+                    bound, page, coverage = heapq.heappop(bounds)
+                    if -bound == coverage:
+                        # One matched term: nothing to measure, the bound is the score
+                        self._keep(top, coverage, page)
+                    else:
+                        batch.append((page, coverage))
+                if batch:
+                    state['batch'] = batch
+                    wanted[book_id] = [page for page, _ in batch]
+                else:
+                    del open_books[book_id]
+
+            if not wanted:
+                break
+            positions = fetch_page_positions(self.search_index, wanted, terms)
+            for book_id in wanted:
+                state = states[book_id]
+                for page, coverage in state.pop('batch'):
+                    proximity = self._proximity(state['pages'][page], positions.get((book_id, page), {}), weights)
+                    self._keep(state['top'], coverage + proximity, page)
+
+        return {
+            book_id: [{'page': -negative_page, 'score': round(score, 4)}
+                      for score, negative_page in sorted(state['top'], reverse=True)]
+            for book_id, state in states.items()
+        }
+
+    def _keep(self, top: List[Tuple[float, int]], score: float, page: int):
+        # Ties keep the earlier page
+        item = (score, -page)
+        if len(top) < self.pages_per_book:
+            heapq.heappush(top, item)
+        elif item > top[0]:
+            heapq.heapreplace(top, item)
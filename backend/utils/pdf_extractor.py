@@ -1,22 +1,79 @@
+import os
 import PyPDF2
 import re
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+
+# Below this many pages the process pool costs more than it saves
+PARALLEL_MIN_PAGES = 40
+PAGES_PER_CHUNK = 25
+
+def _iter_page_range(pdf_path: str, start: int, end: int) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) for pages [start, end)"""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for index in range(start, end):
+            try:
+                text = pdf_reader.pages[index].extract_text() or ""
+            except Exception as e:
+                print(f"Warning: Could not extract text from page {index + 1}: {e}")
+                text = ""
+            yield index + 1, text
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Pool task: each worker opens the PDF itself and returns its page range"""
+    return list(_iter_page_range(pdf_path, start, end))
 
 class PDFExtractor:
-    def __init__(self):
-        pass
-    
+    def __init__(self, max_workers: int = 1, parallel_min_pages: int = PARALLEL_MIN_PAGES,
+                 pages_per_chunk: int = PAGES_PER_CHUNK):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_chunk = max(1, pages_per_chunk)
+
+    def count_pages(self, pdf_path: str) -> int:
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+    def iter_page_texts(self, pdf_path: str, total_pages: int = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) in page order, fanning page ranges out to a pool for large files"""
+        if total_pages is None:
+            total_pages = self.count_pages(pdf_path)
+
+        if self.max_workers <= 1 or total_pages < self.parallel_min_pages:
+            yield from _iter_page_range(pdf_path, 0, total_pages)
+            return
+
+        ranges = [(start, min(start + self.pages_per_chunk, total_pages))
+                  for start in range(0, total_pages, self.pages_per_chunk)]
+        workers = min(self.max_workers, len(ranges))
+        remaining = iter(ranges)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep a bounded window of chunks in flight so a slow consumer
+            # never has the whole book buffered; popping in submission order
+            # keeps pages ordered
+            pending = deque()
+            for start, end in remaining:
+                pending.append(executor.submit(_extract_page_range, pdf_path, start, end))
+                if len(pending) >= workers * 2:
+                    break
+
+            while pending:
+                chunk = pending.popleft().result()
+                next_range = next(remaining, None)
+                if next_range:
+                    pending.append(executor.submit(_extract_page_range, pdf_path, *next_range))
+                yield from chunk
+
     def extract_text_with_pages(self, pdf_path: str) -> Dict[int, str]:
         page_texts = {}
         
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    text = page.extract_text()
-                    if text.strip():
-                        page_texts[page_num] = text
+            for page_num, text in self.iter_page_texts(pdf_path):
+                if text.strip():
+                    page_texts[page_num] = text
                         
         except Exception as e:
             print(f"Error extracting PDF: {e}")
@@ -0,0 +1,95 @@
+from utils.analyzer import get_analyzer
+from utils.document_preocessor import MultiFormatProcessor
+from utils.ocr import OCRCache, OCRStage, ocr_available
+from utils.pdf_extractor import PDFExtractor, PARALLEL_MIN_PAGES
+from utils.postings import collect_positions, encode_positions
+
+# PDF Processing Class
+class PDFProcessor:
+    def __init__(self, extract_workers=1, parallel_min_pages=PARALLEL_MIN_PAGES,
+                 ocr_workers=0, ocr_cache_path=None):
+        self.analyzer = get_analyzer()
+        self.extractor = PDFExtractor(max_workers=extract_workers, parallel_min_pages=parallel_min_pages)
+        self.ocr = None
+        if ocr_workers and ocr_cache_path:
+            if ocr_available():
+                self.ocr = OCRStage(OCRCache(ocr_cache_path), max_workers=ocr_workers)
+            else:
+                print("⚠️  tesseract/pdftoppm not found; scanned pages will not be OCR'd")
+        # DOCX/HTML/TXT go through the same page stream as PDFs
+        self.documents = MultiFormatProcessor(pdf_extractor=self.extractor, ocr=self.ocr)
+        print("✅ PDF Processor initialized")
+
+    def extract_text_from_pdf(self, file_path, progress_callback=None):
+        """Extract text from PDF with page-level mapping"""
+        page_texts = {}
+        total_pages = 0
+
+        try:
+            total_pages = self.extractor.count_pages(file_path)
+
+            # Pages come back in order whether extraction ran serially or on the pool
+            for page_num, text in self.documents.iter_pages(file_path):
+                page_texts[page_num] = text
+
+                if progress_callback:
+                    progress_callback(page_num, total_pages)
+
+        except Exception as e:
+            print(f"Error extracting PDF text: {e}")
+            return {}, 0
+
+        return page_texts, total_pages
+
+    def process_text_for_search(self, text):
+        """Process text for search indexing"""
+        if not text:
+            return []
+
+        try:
+            return self.analyzer.analyze(text)
+        except Exception as e:
+            print(f"Error processing text: {e}")
+            return []
+
+    def page_index_entries(self, book_id, page_num, text):
+        """Create search index entries for a single page"""
+        if not text.strip():
+            return []
+
+        processed_words = self.process_text_for_search(text)
+
+        if not processed_words:
+            return []
+
+        # Collect every position of each word in one pass
+        word_positions = collect_positions(processed_words)
+
+        # Create index entries
+        return [
+            {
+                'word': word,
+                'book_id': book_id,
+                'page_number': page_num,
+                'frequency': len(positions),
+                'position': positions[0],
+                'positions': encode_positions(positions)
+            }
+            for word, positions in word_positions.items()
+        ]
+
+    def create_search_index(self, book_id, page_texts, book_stats=None):
+        """Create search index entries for the document
+
+        Pass a BookStatsCollector to have the entries counted; the caller applies
+        it with apply_book_stats once the entries are written.
+        """
+        index_entries = []
+        page_entries = lambda page_num, text: self.page_index_entries(book_id, page_num, text)
+        if book_stats is not None:
+            page_entries = book_stats.wrap(page_entries)
+
+        for page_num, text in page_texts.items():
+            index_entries.extend(page_entries(page_num, text))
+
+        return index_entries
@@ -0,0 +1,192 @@
+# backend/utils/positional.py
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.compact_index import book_id_values
+from utils.postings import decode_positions
+
+POSITION_FIELDS = {'_id': 0, 'word': 1, 'book_id': 1, 'page_number': 1, 'position': 1, 'positions': 1}
+
+# Positions count analyzed tokens, so stop words are not counted: "department of defense"
+# matches "department defense", and NEAR/n distances skip stop words too.
+
+def intersect_shifted(starts: List[int], positions: List[int], offset: int) -> List[int]:
+    """The starts s with s + offset in positions (both sorted), by a merge walk"""
+    found = []
+    i, end = 0, len(positions)
+    gallop = len(starts) * 16 < end
+    for start in starts:
+        target = start + offset
+        if gallop:
+            i = bisect_left(positions, target, i)
+        else:
+            while i < end and positions[i] < target:
+                i += 1
+        if i == end:
+            break
+        if positions[i] == target:
+            found.append(start)
+    return found
+
+def phrase_starts(terms: List[str], positions: Dict[str, List[int]]) -> List[int]:
+    """Positions where `terms` occur consecutively, intersecting from the rarest term"""
+    lists = []
+    for offset, word in enumerate(terms):
+        word_positions = positions.get(word)
+        if not word_positions:
+            return []
+        lists.append((offset, word_positions))
+    lists.sort(key=lambda item: len(item[1]))
+
+    offset, rarest = lists[0]
+    starts = [position - offset for position in rarest]
+    for offset, word_positions in lists[1:]:
+        starts = intersect_shifted(starts, word_positions, offset)
+        if not starts:
+            break
+    return starts
+
+def near_count(left: List[int], left_length: int, right: List[int], right_length: int, distance: int) -> int:
+    """Occurrences of the rarer operand with the other at most `distance` positions away, either side"""
+    if len(right) < len(left):
+        left, left_length, right, right_length = right, right_length, left, left_length
+    count = 0
+    j = 0
+    for start in left:
+        end = start + left_length - 1
+        # Earliest start of a right occurrence that ends close enough before this one
+        j = bisect_left(right, start - distance - right_length + 1, j)
+        k = j
+        while k < len(right) and right[k] <= end + distance:
+            # Overlapping occurrences do not count as near each other
+            if right[k] + right_length - 1 < start or right[k] > end:
+                count += 1
+                break
+            k += 1
+    return count
+
+class Phrase:
+    """Terms that must occur at consecutive positions on a page"""
+
+    def __init__(self, terms: List[str]):
+        self.terms = list(terms)
+        self.words = set(self.terms)
+
+    def matches(self, positions: Dict[str, List[int]]) -> int:
+        return len(phrase_starts(self.terms, positions))
+
+class Near:
+    """Two terms or phrases at most `distance` positions apart on a page, in either order"""
+
+    def __init__(self, left: List[str], right: List[str], distance: int):
+        self.left = list(left)
+        self.right = list(right)
+        self.distance = max(1, distance)
+        self.words = set(self.left) | set(self.right)
+
+    def matches(self, positions: Dict[str, List[int]]) -> int:
+        left = phrase_starts(self.left, positions)
+        if not left:
+            return 0
+        right = phrase_starts(self.right, positions)
+        if not right:
+            return 0
+        return near_count(left, len(self.left), right, len(self.right), self.distance)
+
+def fetch_page_positions(search_index, wanted: Dict[str, Iterable[int]],
+                         terms: List[str]) -> Dict[Tuple[str, int], Dict[str, List[int]]]:
+    """(book, page) -> word -> positions for the requested pages, in one query"""
+    wanted = {book_id: set(pages) for book_id, pages in wanted.items()}
+    page_numbers = sorted({page for pages in wanted.values() for page in pages})
+    found = {}
+    for row in search_index.find(
+        {'word': {'$in': list(terms)}, 'book_id': {'$in': book_id_values(wanted)},
+         'page_number': {'$in': page_numbers}},
+        POSITION_FIELDS
+    ):
+        book_id = str(row['book_id'])
+        if row['page_number'] in wanted.get(book_id, ()):
+            positions = decode_positions(row['positions']) if row.get('positions') else [row.get('position', 0)]
+            found.setdefault((book_id, row['page_number']), {})[row['word']] = positions
+    return found
+
+class MongoTermBooks:
+    """Per-term book sets from search_index, for use until the compact index has loaded"""
+
+    def __init__(self, search_index, stats):
+        self.search_index = search_index
+        self.stats = stats
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        return self.stats.document_frequencies(terms)
+
+    def term_books(self, word: str, books: Optional[Iterable[str]] = None) -> Set[str]:
+        query = {'word': word}
+        if books is not None:
+            query['book_id'] = {'$in': book_id_values(books)}
+        return {str(book_id) for book_id in self.search_index.distinct('book_id', query)}
+
+    def all_books(self) -> Set[str]:
+        return {str(book_id) for book_id in self.search_index.distinct('book_id')}
+
+class PositionalMatcher:
+    """Decides where phrase and NEAR clauses hold, for batches of candidate books.
+
+    `postings` is the live compact index or a MongoTermBooks. A clause's
+    candidates are the books holding all its terms, looked up rarest first
+    with each lookup restricted to the books every rarer term occurs in.
+    Positions are then fetched a batch of books at a time and decoded only
+    on pages holding every term of the clause.
+    """
+
+    def __init__(self, search_index, postings):
+        self.search_index = search_index
+        self.postings = postings
+
+    def candidates(self, clause, frequencies: Dict[str, int], within: Optional[Set[str]] = None) -> Set[str]:
+        """Books (among `within`) holding every term of the clause somewhere"""
+        books = within
+        for word in sorted(clause.words, key=lambda word: frequencies.get(word, 0)):
+            books = self.postings.term_books(word, books)
+            if not books:
+                return set()
+        return books
+
+    def book_rows(self, book_ids: Iterable[str], words: Iterable[str]) -> Dict[str, Dict[int, Dict]]:
+        """book_id -> page -> word -> posting row, for one batch of books"""
+        rows = {}
+        for row in self.search_index.find(
+            {'word': {'$in': list(words)}, 'book_id': {'$in': book_id_values(book_ids)}}, POSITION_FIELDS
+        ):
+            rows.setdefault(str(row['book_id']), {}).setdefault(row['page_number'], {})[row['word']] = row
+        return rows
+
+    def clause_pages(self, clause, page_rows: Dict[int, Dict]) -> Dict[int, int]:
+        """{page: matches} for the pages of one book where the clause holds"""
+        pages = {}
+        for page, word_rows in page_rows.items():
+            if not clause.words <= word_rows.keys():
+                continue
+            positions = {}
+            for word in clause.words:
+                row = word_rows[word]
+                positions[word] = decode_positions(row['positions']) if row.get('positions') \
+                    else [row.get('position', 0)]
+            count = clause.matches(positions)
+            if count:
+                pages[page] = count
+        return pages
+
+def restrict_to_pages(match: Dict, pages: Iterable[int]) -> Dict:
+    """A book match cut down to the pages where the query's clauses held"""
+    pages = set(pages)
+    term_pages = {}
+    for word, word_pages in match.get('term_pages', {}).items():
+        kept = {page: frequency for page, frequency in word_pages.items() if page in pages}
+        if kept:
+            term_pages[word] = kept
+    restricted = dict(match, pages=pages, term_pages=term_pages, words_found=set(term_pages),
+                      total_matches=sum(sum(word_pages.values()) for word_pages in term_pages.values()))
+    if 'page_matches' in match:
+        restricted['page_matches'] = {page: count for page, count in match['page_matches'].items() if page in pages}
+    return restricted
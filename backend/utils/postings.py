@@ -0,0 +1,47 @@
+# backend/utils/postings.py
+from itertools import accumulate
+from typing import Dict, Iterable, List
+
+def collect_positions(terms: Iterable[str]) -> Dict[str, List[int]]:
+    """Map each term to every position it occurs at, in one linear pass"""
+    positions = {}
+    for position, term in enumerate(terms):
+        term_positions = positions.get(term)
+        if term_positions is None:
+            positions[term] = [position]
+        else:
+            term_positions.append(position)
+    return positions
+
+def encode_positions(positions: List[int]) -> bytes:
+    """Delta-encode sorted positions as unsigned LEB128 varints"""
+    encoded = bytearray()
+    previous = 0
+    for position in positions:
+        delta = position - previous
+        previous = position
+        while delta >= 0x80:
+            encoded.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        encoded.append(delta)
+    return bytes(encoded)
+
+def decode_positions(encoded: bytes) -> List[int]:
+    """Inverse of encode_positions"""
+    if encoded and max(encoded) < 0x80:
+        # Every delta fit in one byte (usual for frequent terms), so decoding is a running sum
+        return list(accumulate(encoded))
+    positions = []
+    current = 0
+    delta = 0
+    shift = 0
+    for byte in encoded or b'':
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += delta
+        positions.append(current)
+        delta = 0
+        shift = 0
+    return positions
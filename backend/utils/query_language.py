@@ -0,0 +1,421 @@
+# backend/utils/query_language.py
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from utils.metadata_index import METADATA_FIELDS
+from utils.positional import Near, Phrase, PositionalMatcher
+
+# Query syntax (operators are upper case; lower-case and/or/not are ordinary words):
+#   radar sonar                  optional words, as before: books with either, best first
+#   "phased array radar"         consecutive words (required)
+#   radar NEAR/5 antenna         within 5 words of each other, either order (required)
+#   radar AND sonar              both (required)
+#   radar OR sonar               either (required)
+#   NOT military                 excluded
+#   (radar OR sonar) AND antenna grouping
+#   subject:electronics author:"john smith" classification:internal year:2010..2015
+#                                metadata filters (required), also year:>=2010, year:<2000
+# NOT binds tightest, then NEAR, AND, OR, and plain juxtaposition loosest.
+QUERY_TOKENS = re.compile(r'''
+    (?P<open>\() | (?P<close>\)) |
+    (?P<field>[A-Za-z]+):(?:"(?P<field_quoted>[^"]*)"?|(?P<field_value>[^\s()"]+)) |
+    "(?P<quoted>[^"]*)"? |
+    NEAR/(?P<distance>\d+)(?![^\s()]) |
+    (?P<operator>AND|OR|NOT)(?![^\s()]) |
+    (?P<word>[^\s()"]+)
+''', re.VERBOSE)
+
+UPPER, LOWER, EXACT = 'upper', 'lower', 'exact'
+# Under NOT an over-estimate of the excluded books becomes an under-estimate of the result
+FLIPPED = {UPPER: LOWER, LOWER: UPPER, EXACT: EXACT}
+# Candidate books whose positions are fetched in the first round when there is no limit
+CONFIRM_BATCH = 50
+# Candidates past this share of the books mean the clause terms are in most books; confirm()
+# then checks positions for the top-ranked batch only instead of walking most of the corpus
+COMMON_CANDIDATE_SHARE = 0.5
+
+class Term:
+    def __init__(self, word: str):
+        self.word = word
+        self.words = {word}
+
+class Words(Phrase):
+    """A bare word the analyzer split into several terms: separate optional terms on
+    its own, consecutive terms when used as an operand"""
+
+class Field:
+    def __init__(self, field: str, value: str):
+        self.field = field
+        self.value = value
+
+class Not:
+    def __init__(self, operand):
+        self.operand = operand
+
+class And:
+    def __init__(self, operands: List):
+        self.operands = operands
+
+class Or:
+    def __init__(self, operands: List):
+        self.operands = operands
+
+class Group:
+    """Juxtaposed items: every `must` holds (or, with none, some `should`) and no `must_not`"""
+
+    def __init__(self, must: List, should: List, must_not: List):
+        self.must = must
+        self.should = should
+        self.must_not = must_not
+
+    @property
+    def empty(self) -> bool:
+        return not (self.must or self.should or self.must_not)
+
+def walk(node, negated: bool = False) -> Iterator[Tuple[object, bool]]:
+    """Every leaf with whether it sits under a NOT"""
+    if isinstance(node, Not):
+        yield from walk(node.operand, not negated)
+    elif isinstance(node, (And, Or)):
+        for operand in node.operands:
+            yield from walk(operand, negated)
+    elif isinstance(node, Group):
+        for operand in node.must + node.should:
+            yield from walk(operand, negated)
+        for operand in node.must_not:
+            yield from walk(operand, not negated)
+    else:
+        yield node, negated
+
+class Query:
+    """A parsed query: the expression tree plus what the search paths need from it"""
+
+    def __init__(self, root: Group):
+        self.root = root
+        leaves = list(walk(root))
+        # Scored and shown terms: everything the books should contain, not what they must not
+        self.terms = list(dict.fromkeys(
+            word for leaf, negated in leaves if not negated and not isinstance(leaf, Field)
+            for word in (leaf.terms if isinstance(leaf, Phrase) else
+                         leaf.left + leaf.right if isinstance(leaf, Near) else [leaf.word])
+        ))
+        self.words = list(dict.fromkeys(word for leaf, _ in leaves if not isinstance(leaf, Field) for word in leaf.words))
+        self.clauses = [leaf for leaf, _ in leaves if isinstance(leaf, (Phrase, Near))]
+
+    @property
+    def empty(self) -> bool:
+        return self.root.empty
+
+    @property
+    def simple(self) -> bool:
+        """Only optional words: the plain ranked search handles it"""
+        return not self.root.must and not self.root.must_not and \
+            all(isinstance(node, Term) for node in self.root.should)
+
+    @property
+    def positional(self) -> bool:
+        return bool(self.clauses)
+
+def label(node) -> str:
+    """A leaf as it would be written in a query, in analyzed terms"""
+    if isinstance(node, Field):
+        return f'{node.field}:{node.value}'
+    if isinstance(node, Term):
+        return node.word
+    if isinstance(node, Near):
+        return f'"{" ".join(node.left)}" NEAR/{node.distance} "{" ".join(node.right)}"'
+    return '"' + ' '.join(node.terms) + '"'
+
+def operand_terms(node) -> Optional[List[str]]:
+    if isinstance(node, Term):
+        return [node.word]
+    if isinstance(node, Phrase):
+        return node.terms
+    return None
+
+class QueryParser:
+    """Recursive-descent parser from query text to a Query; operands go through `analyze`"""
+
+    def __init__(self, analyze: Callable[[str], List[str]]):
+        self.analyze = analyze
+        self.tokens = []
+        self.i = 0
+
+    def parse(self, text: str) -> Query:
+        self.tokens = list(self._tokenize(text or ''))
+        self.i = 0
+        return Query(self._group(top=True))
+
+    def _tokenize(self, text: str) -> Iterator[Tuple[str, object]]:
+        for match in QUERY_TOKENS.finditer(text):
+            if match.group('open') is not None:
+                yield 'open', None
+            elif match.group('close') is not None:
+                yield 'close', None
+            elif match.group('field') is not None:
+                field = match.group('field').lower()
+                value = match.group('field_quoted') if match.group('field_quoted') is not None \
+                    else match.group('field_value')
+                if field in METADATA_FIELDS:
+                    yield 'field', (field, value)
+                else:
+                    yield 'word', match.group(0)
+            elif match.group('quoted') is not None:
+                yield 'phrase', match.group('quoted')
+            elif match.group('distance') is not None:
+                yield 'near', int(match.group('distance'))
+            elif match.group('operator') is not None:
+                yield match.group('operator'), None
+            else:
+                yield 'word', match.group('word')
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.i][0] if self.i < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, object]:
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+
+    def _group(self, top: bool) -> Group:
+        must, should, must_not = [], [], []
+        while self._peek() is not None:
+            kind = self._peek()
+            if kind == 'close':
+                self.i += 1
+                if top:
+                    continue  # unbalanced ')'
+                break
+            if kind in ('AND', 'OR', 'near'):
+                self.i += 1  # nothing on its left
+                continue
+            node = self._or()
+            if node is None:
+                continue
+            if isinstance(node, Not):
+                must_not.append(node.operand)
+            elif isinstance(node, Term):
+                should.append(node)
+            elif isinstance(node, Words):
+                should.extend(Term(word) for word in node.terms)
+            else:
+                must.append(node)
+        return Group(must, should, must_not)
+
+    def _or(self):
+        operands = [self._and()]
+        while self._peek() == 'OR':
+            self.i += 1
+            operands.append(self._and())
+        operands = [operand for operand in operands if operand is not None]
+        if len(operands) < 2:
+            return operands[0] if operands else None
+        return Or(operands)
+
+    def _and(self):
+        operands = [self._unary()]
+        while self._peek() == 'AND':
+            self.i += 1
+            operands.append(self._unary())
+        operands = [operand for operand in operands if operand is not None]
+        if len(operands) < 2:
+            return operands[0] if operands else None
+        return And(operands)
+
+    def _unary(self):
+        if self._peek() == 'NOT':
+            self.i += 1
+            operand = self._unary()
+            return Not(operand) if operand is not None else None
+        return self._near()
+
+    def _near(self):
+        left = self._primary()
+        parts = []
+        while self._peek() == 'near':
+            _, distance = self._next()
+            right = self._primary()
+            if left is None or right is None:
+                left = right if right is not None else left
+                continue
+            left_terms, right_terms = operand_terms(left), operand_terms(right)
+            if left_terms and right_terms:
+                parts.append(Near(left_terms, right_terms, distance))
+            else:
+                # NEAR takes words or phrases; anything else is simply required
+                parts.extend((left, right))
+            left = right
+        if not parts:
+            return left
+        return parts[0] if len(parts) == 1 else And(parts)
+
+    def _primary(self):
+        kind = self._peek()
+        if kind in (None, 'close', 'near', 'AND', 'OR', 'NOT'):
+            return None
+        kind, value = self._next()
+        if kind == 'open':
+            group = self._group(top=False)
+            return None if group.empty else group
+        if kind == 'field':
+            field, text = value
+            return Field(field, text) if text.strip() else None
+
+        stems = self.analyze(value)
+        if not stems:
+            return None
+        if len(stems) == 1:
+            return Term(stems[0])
+        return Phrase(stems) if kind == 'phrase' else Words(stems)
+
+def parse_query(text: str, analyze: Callable[[str], List[str]]) -> Query:
+    return QueryParser(analyze).parse(text)
+
+class QueryExecutor:
+    """Evaluates a Query as set operations over book ids.
+
+    Field filters come from the precomputed metadata sets and run first in
+    every AND; each later operand is then evaluated only within the books
+    that are left (term lookups pass them on as a restriction), cheapest
+    (rarest) first. Phrase and NEAR clauses need positions, so candidates()
+    over-estimates them from their terms alone and confirm() settles them
+    for batches of books in rank order. With `total_books` given, clauses
+    made of terms found in most books are only confirmed among the
+    top-ranked batch, which keeps them as cheap as the plain search.
+    """
+
+    def __init__(self, postings, matcher: PositionalMatcher, metadata=None, batch_books: int = CONFIRM_BATCH,
+                 trace=None, total_books: Optional[int] = None):
+        self.postings = postings
+        self.matcher = matcher
+        self.metadata = metadata
+        self.trace = trace  # a QueryTrace records every lookup, in evaluation order
+        self.batch_books = batch_books
+        self.total_books = total_books
+        self.frequencies = {}
+        self.rows = {}
+        self.pages = {}
+        self._universe = None
+
+    def candidates(self, query: Query, frequencies: Optional[Dict[str, int]] = None) -> Set[str]:
+        """Every book the query can match (exactly, unless it has positional clauses)"""
+        self.frequencies = frequencies if frequencies is not None else self.postings.document_frequencies(query.words)
+        return self._eval(query.root, None, UPPER, False)
+
+    def confirm(self, query: Query, order: Iterable[str], limit: Optional[int] = None) -> Dict[str, Dict[int, int]]:
+        """book_id -> {page: clause matches} for books that match, taken in `order` up to `limit`.
+
+        Pages are those where a (non-excluded) phrase or NEAR clause held;
+        empty when the book matched without one. Batches start at the limit
+        and double, so clauses that rarely hold still take few round trips.
+        When the candidates cover most books (see COMMON_CANDIDATE_SHARE),
+        only the first batch is checked: with terms that common, a rare
+        phrase would otherwise mean decoding positions across the corpus.
+        """
+        order = [str(book_id) for book_id in order]
+        if not query.positional:
+            return {book_id: {} for book_id in order[:limit]}
+
+        words = list(dict.fromkeys(word for clause in query.clauses for word in clause.words))
+        confirmed = {}
+        start, batch_size = 0, limit or self.batch_books
+        if limit is not None and self.total_books and len(order) > COMMON_CANDIDATE_SHARE * self.total_books:
+            order = order[:batch_size]
+        while start < len(order):
+            batch = order[start:start + batch_size]
+            start += batch_size
+            batch_size *= 2
+            self.rows = self.matcher.book_rows(batch, words)
+            self.pages = {}
+            matched = self._eval(query.root, set(batch), EXACT, False)
+            for book_id in batch:
+                if book_id in matched:
+                    confirmed[book_id] = self.pages.get(book_id, {})
+                    if limit is not None and len(confirmed) >= limit:
+                        return confirmed
+        return confirmed
+
+    def universe(self) -> Set[str]:
+        if self._universe is None:
+            self._universe = self.metadata.all_books() if self.metadata is not None else self.postings.all_books()
+        return self._universe
+
+    def _cost(self, node) -> float:
+        """Rough size of a node's book set, to order AND operands"""
+        if isinstance(node, Field):
+            return -1
+        if isinstance(node, Not):
+            return float('inf')
+        if isinstance(node, (Term, Phrase, Near)):
+            return min(self.frequencies.get(word, 0) for word in node.words)
+        if isinstance(node, And):
+            return min(map(self._cost, node.operands))
+        if isinstance(node, Or):
+            return sum(map(self._cost, node.operands))
+        if node.must:
+            return min(map(self._cost, node.must))
+        return sum(map(self._cost, node.should)) if node.should else float('inf')
+
+    def _all(self, operands: List, within: Optional[Set[str]], mode: str, negated: bool) -> Set[str]:
+        books = within
+        for operand in sorted(operands, key=self._cost):
+            books = self._eval(operand, books, mode, negated)
+            if not books:
+                return set()
+        return books
+
+    def _eval(self, node, within: Optional[Set[str]], mode: str, negated: bool) -> Set[str]:
+        """Books matching `node`, among `within` when given"""
+        if isinstance(node, (Field, Term, Phrase, Near)):
+            if self.trace is None:
+                return self._leaf(node, within, mode, negated)
+            with self.trace.stage(label(node), mode=mode, within=len(within) if within is not None else 'all',
+                                  df=None if isinstance(node, Field) else self._cost(node)) as entry:
+                books = self._leaf(node, within, mode, negated)
+                entry['books'] = len(books)
+            return books
+        if isinstance(node, Not):
+            base = within if within is not None else self.universe()
+            return base - self._eval(node.operand, base, FLIPPED[mode], not negated)
+        if isinstance(node, And):
+            return self._all(node.operands, within, mode, negated)
+        if isinstance(node, Or):
+            return set().union(*(self._eval(operand, within, mode, negated) for operand in node.operands))
+
+        if node.must:
+            books = self._all(node.must, within, mode, negated)
+        elif node.should:
+            books = set().union(*(self._eval(operand, within, mode, negated) for operand in node.should))
+        else:
+            books = set(within if within is not None else self.universe())
+        for operand in node.must_not:
+            if not books:
+                break
+            books = books - self._eval(operand, books, FLIPPED[mode], not negated)
+        return books
+
+    def _leaf(self, node, within: Optional[Set[str]], mode: str, negated: bool) -> Set[str]:
+        if isinstance(node, Field):
+            books = self.metadata.matching(node.field, node.value) if self.metadata is not None else set()
+            return books & within if within is not None else books
+        if isinstance(node, Term):
+            return self.postings.term_books(node.word, within)
+        return self._positional(node, within, mode, negated)
+
+    def _positional(self, clause, within: Optional[Set[str]], mode: str, negated: bool) -> Set[str]:
+        if mode == LOWER:
+            return set()
+        if mode == UPPER:
+            return self.matcher.candidates(clause, self.frequencies, within)
+
+        # Exact: `within` is part of the batch whose posting rows are loaded
+        held = set()
+        for book_id in within & self.rows.keys():
+            pages = self.matcher.clause_pages(clause, self.rows.get(book_id, {}))
+            if pages:
+                held.add(book_id)
+                if not negated:
+                    book_pages = self.pages.setdefault(book_id, {})
+                    for page, count in pages.items():
+                        book_pages[page] = book_pages.get(page, 0) + count
+        return held
@@ -0,0 +1,145 @@
+# backend/utils/query_planner.py
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Set
+
+from utils.query_language import And, Group, Or, Query, Term, walk
+
+# A plain term found in more than this share of books is treated like a stop word
+STOPWORD_DF_RATIO = 0.9
+# Below this many books document frequencies say little about a word
+STOPWORD_MIN_BOOKS = 100
+
+class QueryTrace:
+    """Named stages with their timings and sizes, in the order they started, for ?explain=1"""
+
+    def __init__(self):
+        self.stages = []
+        self.depth = 0
+
+    @contextmanager
+    def stage(self, name: str, **details):
+        entry = dict(details, stage=name, depth=self.depth)
+        self.stages.append(entry)
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry['ms'] = round((time.perf_counter() - start) * 1000, 2)
+            self.depth -= 1
+
+    def summary(self) -> str:
+        return ', '.join(f"{entry['stage']} {entry['ms']}ms" for entry in self.stages if entry['depth'] == 0)
+
+class QueryPlan:
+    """A query after planning: near-stop words dropped, with the frequencies evaluation is ordered by"""
+
+    def __init__(self, query: Query, frequencies: Dict[str, int], total_books: int,
+                 average_length: float, dropped: List[str]):
+        self.query = query
+        self.frequencies = frequencies
+        self.total_books = total_books
+        self.average_length = average_length
+        self.dropped = dropped
+
+    def describe(self) -> Dict:
+        return {
+            'terms': [{'term': term, 'df': self.frequencies.get(term, 0)}
+                      for term in sorted(self.query.terms, key=lambda term: self.frequencies.get(term, 0))],
+            'dropped': [{'term': term, 'df': self.frequencies.get(term, 0)} for term in self.dropped],
+            'books': self.total_books
+        }
+
+def without_terms(node, dropped: set, top: bool = True):
+    """`node` with the dropped plain terms removed; None when nothing is left of it"""
+    if isinstance(node, Term):
+        return None if node.word in dropped else node
+    if isinstance(node, (And, Or)):
+        operands = [kept for kept in (without_terms(operand, dropped, False) for operand in node.operands)
+                    if kept is not None]
+        if len(operands) < 2:
+            return operands[0] if operands else None
+        return type(node)(operands)
+    if isinstance(node, Group):
+        must = [kept for kept in (without_terms(operand, dropped, False) for operand in node.must) if kept is not None]
+        if node.must and not must:
+            # Its conditions all matched nearly every book; its optional terms must not become one.
+            # Nested, the group then holds for nearly every book; at the top its conditions stay.
+            if not top:
+                return None
+            must = node.must
+        should = [kept for kept in (without_terms(operand, dropped, False) for operand in node.should)
+                  if kept is not None]
+        if not must and not should:
+            return None
+        return Group(must, should, node.must_not)
+    # Phrases and NEAR need every word in place; excluded words are left as asked
+    return node
+
+class QueryPlanner:
+    """Looks up every query word's document frequency once and drops near-stop words.
+
+    A plain term in more than `max_df_ratio` of the books barely narrows or
+    ranks the results but costs the longest posting walk, so it is dropped,
+    as the analyzer drops stop words. Only AND operands and optional terms
+    are dropped: an OR operand (or the only condition of a parenthesized
+    group) is a whole alternative, so dropping it would lose every book it
+    alone admits. Words inside phrases and NEAR clauses are kept since
+    positions need them, and so are excluded words. Nothing
+    is dropped if it would leave no words to match. The executor then
+    evaluates what remains rarest first.
+    """
+
+    def __init__(self, stats, max_df_ratio: float = STOPWORD_DF_RATIO, min_books: int = STOPWORD_MIN_BOOKS):
+        self.stats = stats
+        self.max_df_ratio = max_df_ratio
+        self.min_books = min_books
+
+    def plan(self, query: Query) -> QueryPlan:
+        total_books, average_length = self.stats.totals()
+        frequencies = self.stats.document_frequencies(query.words)
+        dropped = []
+        if total_books >= self.min_books:
+            limit = self.max_df_ratio * total_books
+            # Words anywhere in a phrase, NEAR clause or OR alternative are kept everywhere
+            plain = {leaf.word for leaf in plain_terms(query.root)}.difference(
+                held_words(query.root), *(clause.words for clause in query.clauses))
+            dropped = [word for word in query.terms if word in plain and frequencies.get(word, 0) > limit]
+
+        if dropped:
+            root = without_terms(query.root, set(dropped))
+            if root is None:
+                dropped = []
+            else:
+                query = Query(root)
+                dropped = [word for word in dropped if word not in query.terms]
+        return QueryPlan(query, frequencies, total_books, average_length, dropped)
+
+def plain_terms(node, top: bool = True) -> List[Term]:
+    """Term leaves outside NOT that only narrow or rank: AND operands and optional terms.
+
+    The top-level group's loose terms count as optional (they rank); a nested
+    group's only count when it has required items, since otherwise they are
+    its condition.
+    """
+    if isinstance(node, Term):
+        return [node]
+    if isinstance(node, And):
+        return [term for operand in node.operands for term in plain_terms(operand, False)]
+    if isinstance(node, Group):
+        optional = node.should if node.must or top else []
+        return [term for operand in node.must + optional for term in plain_terms(operand, False)]
+    return []
+
+def held_words(node, top: bool = True) -> Set[str]:
+    """Words of Term leaves under OR, or forming a nested group's only condition"""
+    if isinstance(node, Or):
+        return {leaf.word for leaf, _ in walk(node) if isinstance(leaf, Term)}
+    if isinstance(node, And):
+        return set().union(*(held_words(operand, False) for operand in node.operands))
+    if isinstance(node, Group):
+        if not node.must and not top:
+            return {leaf.word for leaf, _ in walk(node) if isinstance(leaf, Term)}
+        return set().union(*(held_words(operand, False) for operand in node.must + node.should))
+    return set()
@@ -0,0 +1,234 @@
+# backend/utils/reindexer.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, MongoClient
+
+from utils.corpus_stats import (DOCUMENT_STATS_COLLECTION, BookStatsCollector, book_stats_document,
+                                rebuild_term_stats)
+from utils.index_events import INDEX_REBUILT, publish_index_event
+from utils.index_pipeline import DEFAULT_BATCH_SIZE, stream_index_pages
+from utils.pdf_processor import PDFProcessor
+from utils.text_store import TextStore
+
+SHADOW_COLLECTION = 'search_index_shadow'
+STATS_SHADOW_COLLECTION = 'document_stats_shadow'
+CHECKPOINT_COLLECTION = 'reindex_checkpoints'
+STATE_COLLECTION = 'reindex_state'
+# Ingestion jobs hold a lease here while they write postings and stats
+ACTIVE_INGESTS_COLLECTION = 'active_ingests'
+INGEST_PAUSE_POLL_SECONDS = 1.0
+# How long the swap waits for running ingestion jobs to finish before giving up
+INGEST_DRAIN_TIMEOUT_SECONDS = 600
+# A pause not refreshed for this long is from a reindexer that died; ingestion ignores it
+INGEST_PAUSE_TTL_SECONDS = 3600
+# Leases older than this belong to workers that died without releasing them
+INGEST_LEASE_TTL_SECONDS = 6 * 3600
+
+# Per-process state, built once by the pool initializer
+_worker = {}
+
+def _init_worker(mongo_uri: str, database_name: str, text_store_path: str,
+                 ocr_workers: int = 0, ocr_cache_path: str = None):
+    _worker['processor'] = PDFProcessor(ocr_workers=ocr_workers, ocr_cache_path=ocr_cache_path)
+    _worker['db'] = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)[database_name]
+    _worker['text_store'] = TextStore(text_store_path) if text_store_path else None
+
+def ingestion_paused(db) -> bool:
+    state = db[STATE_COLLECTION].find_one({'_id': 'current'}, {'ingestion_paused_at': 1}) or {}
+    paused_at = state.get('ingestion_paused_at')
+    return paused_at is not None and (datetime.now() - paused_at).total_seconds() < INGEST_PAUSE_TTL_SECONDS
+
+def begin_ingest(db, book_id: str):
+    """Take an ingestion lease, waiting while a reindex swaps collections.
+
+    The lease is written before the pause flag is read and the reindexer
+    sets the flag before counting leases, so one of the two always sees
+    the other: either the job waits or the swap does.
+    """
+    while True:
+        db[ACTIVE_INGESTS_COLLECTION].replace_one(
+            {'_id': book_id}, {'_id': book_id, 'started_at': datetime.now()}, upsert=True
+        )
+        if not ingestion_paused(db):
+            return
+        db[ACTIVE_INGESTS_COLLECTION].delete_one({'_id': book_id})
+        time.sleep(INGEST_PAUSE_POLL_SECONDS)
+
+def end_ingest(db, book_id: str):
+    db[ACTIVE_INGESTS_COLLECTION].delete_one({'_id': book_id})
+
+def reindex_book(book: dict, shadow_name: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Rebuild one book's postings into the shadow collection"""
+    processor = _worker['processor']
+    db = _worker['db']
+    text_store = _worker['text_store']
+    book_id = str(book['_id'])
+    shadow = db[shadow_name]
+
+    # A crash mid-book can leave partial postings behind
+    shadow.delete_many({'book_id': book_id})
+
+    def extract_pages():
+        return processor.documents.iter_pages(book['file_path'], book.get('content_hash'))
+
+    content_hash = book.get('content_hash')
+    if text_store and content_hash:
+        pages = text_store.iter_pages(content_hash, extract_pages,
+                                      processor.documents.ocr_refill(book['file_path'], content_hash))
+    else:
+        pages = extract_pages()
+
+    book_stats = BookStatsCollector()
+    _, written = stream_index_pages(
+        pages,
+        book_stats.wrap(lambda page_num, text: processor.page_index_entries(book_id, page_num, text)),
+        shadow.insert_many,
+        batch_size=batch_size
+    )
+    # Term and corpus counters are rebuilt from these per-book counts at swap time
+    db[STATS_SHADOW_COLLECTION].replace_one(
+        {'_id': book_id},
+        book_stats_document(book_id, book_stats.word_frequencies, book_stats.page_lengths),
+        upsert=True
+    )
+
+    db[CHECKPOINT_COLLECTION].update_one(
+        {'_id': book_id},
+        {'$set': {'shadow': shadow_name, 'entries': written, 'completed_at': datetime.now()}},
+        upsert=True
+    )
+    return written
+
+class CorpusReindexer:
+    """Rebuilds search_index for the whole library without taking search offline"""
+
+    def __init__(self, db, mongo_uri: str, database_name: str, workers: int = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, text_store_path: str = None,
+                 shadow_name: str = SHADOW_COLLECTION, ocr_workers: int = 0, ocr_cache_path: str = None):
+        self.db = db
+        self.mongo_uri = mongo_uri
+        self.database_name = database_name
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.text_store_path = text_store_path
+        self.shadow_name = shadow_name
+        self.ocr_workers = ocr_workers
+        self.ocr_cache_path = ocr_cache_path
+
+    def _start_or_resume(self, restart: bool):
+        state = self.db[STATE_COLLECTION].find_one({'_id': 'current'})
+        if state and not restart:
+            print(f"🔄 Resuming reindex started {state['started_at']}")
+            return
+
+        # Fresh run: clear the shadow and any checkpoints from an earlier attempt
+        self.db[self.shadow_name].drop()
+        self.db[STATS_SHADOW_COLLECTION].drop()
+        self.db[CHECKPOINT_COLLECTION].delete_many({})
+        self.db[STATE_COLLECTION].replace_one(
+            {'_id': 'current'},
+            {'_id': 'current', 'shadow': self.shadow_name, 'started_at': datetime.now()},
+            upsert=True
+        )
+
+    def pending_books(self):
+        """Books that own postings and have not been checkpointed yet"""
+        done = set(self.db[CHECKPOINT_COLLECTION].distinct('_id'))
+        books = self.db.books.find(
+            {'status': {'$in': ['active', 'processing']}, 'index_book_id': {'$exists': False}},
+            {'file_path': 1, 'content_hash': 1}
+        )
+        return [book for book in books if str(book['_id']) not in done]
+
+    def _reindex_pending(self, executor, totals: dict):
+        """Reindex pending books until none are left; books uploaded meanwhile join the next pass"""
+        pending = self.pending_books()
+        while pending and not totals['failed']:
+            print(f"📚 {len(pending)} books to reindex with {self.workers} workers")
+            futures = {
+                executor.submit(reindex_book, book, self.shadow_name, self.batch_size): book['_id']
+                for book in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    totals['entries'] += future.result()
+                    totals['completed'] += 1
+                    print(f"✅ [{totals['completed']}] {futures[future]}")
+                except Exception as e:
+                    totals['failed'] += 1
+                    print(f"❌ Reindex failed for {futures[future]}: {e}")
+            pending = self.pending_books()
+
+    def _pause_ingestion(self):
+        """Stop new ingestion writes and wait for running jobs to finish theirs"""
+        self.db[STATE_COLLECTION].update_one({'_id': 'current'}, {'$set': {'ingestion_paused_at': datetime.now()}})
+        deadline = time.monotonic() + INGEST_DRAIN_TIMEOUT_SECONDS
+        while self.db[ACTIVE_INGESTS_COLLECTION].count_documents(
+            {'started_at': {'$gt': datetime.now() - timedelta(seconds=INGEST_LEASE_TTL_SECONDS)}}
+        ):
+            if time.monotonic() > deadline:
+                self._resume_ingestion()
+                raise RuntimeError('Ingestion jobs still writing after '
+                                   f'{INGEST_DRAIN_TIMEOUT_SECONDS}s; not swapping the reindexed collections')
+            time.sleep(INGEST_PAUSE_POLL_SECONDS)
+            self.db[STATE_COLLECTION].update_one({'_id': 'current'}, {'$set': {'ingestion_paused_at': datetime.now()}})
+
+    def _resume_ingestion(self):
+        self.db[STATE_COLLECTION].update_one({'_id': 'current'}, {'$unset': {'ingestion_paused_at': ''}})
+
+    def run(self, restart: bool = False) -> dict:
+        self._start_or_resume(restart)
+
+        start = time.perf_counter()
+        totals = {'completed': 0, 'failed': 0, 'entries': 0}
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.mongo_uri, self.database_name, self.text_store_path,
+                      self.ocr_workers, self.ocr_cache_path)
+        ) as executor:
+            self._reindex_pending(executor, totals)
+            if not totals['failed']:
+                # Books ingested into the live collections from here on would be dropped by the swap,
+                # so ingestion waits while the last books are caught up and the collections change
+                print("⏸️  Pausing ingestion for the swap")
+                self._pause_ingestion()
+                try:
+                    self._reindex_pending(executor, totals)
+                    if not totals['failed']:
+                        self.swap()
+                finally:
+                    self._resume_ingestion()
+
+        summary = dict(totals, seconds=round(time.perf_counter() - start, 2))
+        if totals['failed']:
+            print(f"⚠️  {totals['failed']} books failed; rerun to resume before swapping")
+        return summary
+
+    def swap(self):
+        """Atomically replace search_index with the finished shadow collection and recount term statistics"""
+        shadow = self.db[self.shadow_name]
+        shadow.create_index([('word', ASCENDING), ('book_id', ASCENDING)])
+        shadow.create_index([('book_id', ASCENDING)])
+
+        self.db.client.admin.command(
+            'renameCollection',
+            f"{self.database_name}.{self.shadow_name}",
+            to=f"{self.database_name}.search_index",
+            dropTarget=True
+        )
+        self.db[STATS_SHADOW_COLLECTION].create_index('pending', sparse=True)
+        self.db.client.admin.command(
+            'renameCollection',
+            f"{self.database_name}.{STATS_SHADOW_COLLECTION}",
+            to=f"{self.database_name}.{DOCUMENT_STATS_COLLECTION}",
+            dropTarget=True
+        )
+        rebuild_term_stats(self.db)
+        # Also lifts the ingestion pause
+        self.db[STATE_COLLECTION].delete_one({'_id': 'current'})
+        self.db[CHECKPOINT_COLLECTION].delete_many({})
+        publish_index_event(self.db, INDEX_REBUILT)
+        print("🔁 Shadow index swapped into search_index")
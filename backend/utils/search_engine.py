@@ -1,84 +1,107 @@
 # backend/utils/search_engine.py
+import math
+from typing import Dict, List
+
+from utils.analyzer import get_analyzer
+from utils.book_cache import get_book_cache
+from utils.corpus_stats import CorpusStats
+from utils.search_pipeline import aggregate_book_matches
+
 class SearchEngine:
     def __init__(self, db_connection):
         self.db = db_connection
         self.search_index = db_connection.search_index
         self.books = db_connection.books
+        self.corpus_stats = CorpusStats(db_connection)
         
     def search_with_relevance(self, query: str, limit: int = 10) -> List[Dict]:
         """Advanced search with TF-IDF relevance scoring"""
         query_terms = self._process_query(query)
+        if not query_terms:
+            return []
         
-        # Get total document count for IDF calculation
-        total_docs = self.books.count_documents({'status': 'active'})
+        # Book count and document frequencies come from the statistics kept at index time
+        total_docs, _ = self.corpus_stats.totals()
+        doc_counts = self.corpus_stats.document_frequencies(query_terms)
+        idf = {term: math.log(max(total_docs, 1) / (doc_counts[term] + 1)) for term in doc_counts}
         
-        # Find documents containing query terms
-        search_results = defaultdict(lambda: {
-            'pages': set(),
-            'total_matches': 0,
-            'term_scores': {},
-            'page_matches': defaultdict(int)
-        })
+        # Score, join page counts and rank on the server; only the top `limit` books come back
+        matches = aggregate_book_matches(
+            self.search_index,
+            query_terms,
+            limit,
+            score=self._relevance_expression(idf),
+            extra_stages=self._book_pages_stages()
+        )
         
-        for term in query_terms:
-            # Find all documents containing this term
-            term_results = list(self.search_index.find({'word': term.lower()}))
-            
-            for result in term_results:
-                book_id = str(result['book_id'])
-                page_num = result['page_number']
-                
-                # Calculate TF-IDF score for this term
-                tf_idf_score = self._calculate_tf_idf(
-                    term, result, total_docs
-                )
-                
-                search_results[book_id]['pages'].add(page_num)
-                search_results[book_id]['total_matches'] += result['frequency']
-                search_results[book_id]['term_scores'][term] = tf_idf_score
-                search_results[book_id]['page_matches'][page_num] += result['frequency']
+        # Get book information for the top books in one round trip
+        book_records = get_book_cache(self.books).get_many(match['book_id'] for match in matches)
         
-        # Calculate final relevance scores
         final_results = []
-        for book_id, data in search_results.items():
-            # Get book information
-            book_info = self.books.find_one({'_id': ObjectId(book_id)})
+        for match in matches:
+            book_info = next(
+                (book for book in book_records.get(match['book_id'], []) if str(book['_id']) == match['book_id']),
+                None
+            )
             if not book_info:
                 continue
             
-            # Calculate combined relevance score
-            relevance_score = sum(data['term_scores'].values())
-            
-            # Boost score based on page concentration
-            page_concentration_bonus = len(data['pages']) / book_info.get('total_pages', 1)
-            final_score = relevance_score * (1 + page_concentration_bonus)
+            term_scores = {
+                term: self._calculate_tf_idf(data, idf[term])
+                for term, data in match['terms'].items()
+            }
             
             result_item = {
-                'book_id': book_id,
+                'book_id': match['book_id'],
                 'title': book_info['title'],
                 'author': book_info['author'],
-                'pages': sorted(list(data['pages'])),
-                'page_matches': dict(data['page_matches']),
-                'total_matches': data['total_matches'],
-                'relevance_score': final_score,
-                'term_scores': data['term_scores'],
-                'keywords_found': list(data['term_scores'].keys())
+                'pages': sorted(match['pages']),
+                'page_matches': match['page_matches'],
+                'total_matches': match['total_matches'],
+                'relevance_score': match['score'],
+                'term_scores': term_scores,
+                'keywords_found': list(term_scores.keys())
             }
             final_results.append(result_item)
         
-        # Sort by relevance score
-        final_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return final_results[:limit]
+        return final_results
+    
+    def _process_query(self, query: str) -> List[str]:
+        return get_analyzer().analyze(query)
+    
+    def _book_pages_stages(self) -> List[Dict]:
+        """Join each grouped book to its total_pages for the page concentration bonus"""
+        return [
+            {'$addFields': {'book_oid': {
+                '$convert': {'input': '$_id', 'to': 'objectId', 'onError': None, 'onNull': None}
+            }}},
+            {'$lookup': {'from': 'books', 'localField': 'book_oid', 'foreignField': '_id', 'as': 'book'}},
+            {'$match': {'book': {'$ne': []}}},
+            {'$addFields': {'total_pages': {'$arrayElemAt': ['$book.total_pages', 0]}}},
+            {'$project': {'book': 0, 'book_oid': 0}}
+        ]
     
-    def _calculate_tf_idf(self, term: str, result: Dict, total_docs: int) -> float:
+    def _relevance_expression(self, idf: Dict[str, float]) -> Dict:
+        """sum(TF-IDF over terms) * (1 + matched pages / total pages), as an aggregation expression"""
+        term_idf = {'$switch': {
+            'branches': [{'case': {'$eq': ['$$term.word', term]}, 'then': value} for term, value in idf.items()],
+            'default': 0
+        }}
+        term_tf = {'$divide': ['$$term.frequency', {'$max': [{'$ifNull': ['$$term.doc_length', 1]}, 1]}]}
+        relevance = {'$sum': {'$map': {
+            'input': '$terms', 'as': 'term', 'in': {'$multiply': [term_tf, term_idf]}
+        }}}
+        
+        # Boost score based on page concentration
+        matched_pages = {'$size': {'$reduce': {
+            'input': '$terms', 'initialValue': [], 'in': {'$setUnion': ['$$value', '$$this.pages.page']}
+        }}}
+        page_concentration_bonus = {'$divide': [matched_pages, {'$max': [{'$ifNull': ['$total_pages', 1]}, 1]}]}
+        return {'$multiply': [relevance, {'$add': [1, page_concentration_bonus]}]}
+    
+    def _calculate_tf_idf(self, term_data: Dict, idf: float) -> float:
         """Calculate TF-IDF score"""
         # Term Frequency
-        tf = result['frequency'] / result.get('doc_length', 1)
-        
-        # Document Frequency
-        df = self.search_index.count_documents({'word': term.lower()})
-        
-        # Inverse Document Frequency
-        idf = math.log(total_docs / (df + 1))
+        tf = term_data['frequency'] / max(term_data.get('doc_length') or 1, 1)
         
         return tf * idf
@@ -0,0 +1,85 @@
+# backend/utils/search_pipeline.py
+from typing import Dict, Iterable, List, Optional
+
+from utils.compact_index import book_id_values
+
+# All query terms are matched with one $in and grouped per book on the server,
+# so a search is one round trip and only the top-k grouped rows are returned.
+
+def book_matches_pipeline(terms: List[str], limit: Optional[int] = None,
+                          score: Optional[Dict] = None, extra_stages: Optional[List[Dict]] = None,
+                          books: Optional[Iterable[str]] = None) -> List[Dict]:
+    """$match -> $group (book, word) -> $group book -> [score] -> $sort -> $limit"""
+    match = {'word': {'$in': list(terms)}}
+    if books is not None:
+        match['book_id'] = {'$in': book_id_values(books)}
+    pipeline = [
+        {'$match': match},
+        {'$group': {
+            '_id': {'book_id': '$book_id', 'word': '$word'},
+            'frequency': {'$sum': '$frequency'},
+            'postings': {'$sum': 1},
+            'doc_length': {'$max': '$doc_length'},
+            'pages': {'$push': {'page': '$page_number', 'frequency': '$frequency'}}
+        }},
+        {'$group': {
+            '_id': '$_id.book_id',
+            'total_matches': {'$sum': '$frequency'},
+            'postings': {'$sum': '$postings'},
+            'terms': {'$push': {
+                'word': '$_id.word',
+                'frequency': '$frequency',
+                'doc_length': '$doc_length',
+                'pages': '$pages'
+            }}
+        }}
+    ]
+    pipeline.extend(extra_stages or [])
+
+    if score is not None:
+        pipeline.append({'$addFields': {'score': score}})
+        pipeline.append({'$sort': {'score': -1, 'total_matches': -1}})
+    else:
+        pipeline.append({'$sort': {'total_matches': -1}})
+
+    if limit:
+        pipeline.append({'$limit': limit})
+    return pipeline
+
+def unpack_book_match(row: Dict) -> Dict:
+    """Flatten one grouped row into the per-book match shape the search paths use"""
+    pages = set()
+    page_matches = {}
+    terms = {}
+    term_pages = {}
+    for term in row['terms']:
+        terms[term['word']] = {'frequency': term['frequency'], 'doc_length': term.get('doc_length')}
+        word_pages = term_pages[term['word']] = {}
+        for page in term['pages']:
+            pages.add(page['page'])
+            page_matches[page['page']] = page_matches.get(page['page'], 0) + page['frequency']
+            word_pages[page['page']] = word_pages.get(page['page'], 0) + page['frequency']
+
+    match = {
+        'book_id': str(row['_id']),
+        'pages': pages,
+        'page_matches': page_matches,
+        'total_matches': row['total_matches'],
+        'postings': row['postings'],
+        'words_found': set(terms),
+        'terms': terms,
+        'term_pages': term_pages
+    }
+    if 'score' in row:
+        match['score'] = row['score']
+    return match
+
+def aggregate_book_matches(collection, terms: Iterable[str], limit: Optional[int] = None,
+                           score: Optional[Dict] = None, extra_stages: Optional[List[Dict]] = None,
+                           books: Optional[Iterable[str]] = None) -> List[Dict]:
+    """Ranked per-book matches for the query terms in a single aggregation, optionally within `books`"""
+    terms = list(dict.fromkeys(terms))
+    if not terms:
+        return []
+    pipeline = book_matches_pipeline(terms, limit, score, extra_stages, books)
+    return [unpack_book_match(row) for row in collection.aggregate(pipeline)]
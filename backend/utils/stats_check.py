@@ -0,0 +1,113 @@
+# backend/utils/stats_check.py
+from typing import Dict, Iterator, Tuple
+
+from utils.corpus_stats import (CORPUS_ID, CORPUS_STATS_COLLECTION, DOCUMENT_STATS_COLLECTION,
+                                TERM_STATS_COLLECTION, rebuild_term_stats)
+
+# search_index stores book_id as a string or an ObjectId depending on the indexer
+BOOK_KEY = {'$toString': '$book_id'}
+
+def _postings_by_term(search_index) -> Iterator[Dict]:
+    return search_index.aggregate([
+        {'$group': {'_id': {'word': '$word', 'book': BOOK_KEY}, 'frequency': {'$sum': '$frequency'}}},
+        {'$group': {'_id': '$_id.word', 'df': {'$sum': 1}, 'ttf': {'$sum': '$frequency'}}},
+        {'$sort': {'_id': 1}}
+    ], allowDiskUse=True)
+
+def _postings_by_book(search_index) -> Iterator[Dict]:
+    return search_index.aggregate([
+        {'$group': {'_id': BOOK_KEY, 'total_words': {'$sum': '$frequency'}}},
+        {'$sort': {'_id': 1}}
+    ], allowDiskUse=True)
+
+def _merge_compare(expected: Iterator[Dict], actual: Iterator[Dict], fields: Tuple[str, ...]):
+    """Walk two _id-sorted streams together; yields (key, expected row, actual row) for every difference"""
+    expected_row, actual_row = next(expected, None), next(actual, None)
+    while expected_row is not None or actual_row is not None:
+        if actual_row is None or (expected_row is not None and expected_row['_id'] < actual_row['_id']):
+            yield expected_row['_id'], expected_row, None
+            expected_row = next(expected, None)
+        elif expected_row is None or actual_row['_id'] < expected_row['_id']:
+            # Terms and books whose counts dropped to zero are left behind with zeros
+            if any(actual_row.get(field, 0) for field in fields):
+                yield actual_row['_id'], None, actual_row
+            actual_row = next(actual, None)
+        else:
+            if any(expected_row.get(field, 0) != actual_row.get(field, 0) for field in fields):
+                yield expected_row['_id'], expected_row, actual_row
+            expected_row, actual_row = next(expected, None), next(actual, None)
+
+def check_corpus_stats(db, max_samples: int = 20) -> Dict:
+    """Recount df/ttf, book lengths and corpus totals from search_index and compare"""
+    report = {'term_mismatches': 0, 'book_mismatches': 0, 'samples': []}
+
+    def sample(kind, key, expected, actual, fields):
+        if len(report['samples']) < max_samples:
+            report['samples'].append({
+                'kind': kind,
+                'key': key,
+                'postings': {field: (expected or {}).get(field, 0) for field in fields},
+                'stats': {field: (actual or {}).get(field, 0) for field in fields}
+            })
+
+    term_fields = ('df', 'ttf')
+    terms = db[TERM_STATS_COLLECTION].find({}, {'df': 1, 'ttf': 1}).sort('_id', 1)
+    for key, expected, actual in _merge_compare(_postings_by_term(db.search_index), terms, term_fields):
+        report['term_mismatches'] += 1
+        sample('term', key, expected, actual, term_fields)
+
+    totals = {'books': 0, 'total_words': 0}
+
+    def counted(rows):
+        for row in rows:
+            totals['books'] += 1
+            totals['total_words'] += row['total_words']
+            yield row
+
+    book_fields = ('total_words',)
+    books = db[DOCUMENT_STATS_COLLECTION].find({}, {'total_words': 1}).sort('_id', 1)
+    for key, expected, actual in _merge_compare(counted(_postings_by_book(db.search_index)), books, book_fields):
+        report['book_mismatches'] += 1
+        sample('book', key, expected, actual, book_fields)
+
+    corpus = db[CORPUS_STATS_COLLECTION].find_one({'_id': CORPUS_ID}) or {}
+    report['corpus'] = {
+        'postings': totals,
+        'stats': {'books': corpus.get('books', 0), 'total_words': corpus.get('total_words', 0)}
+    }
+    report['pending'] = db[DOCUMENT_STATS_COLLECTION].count_documents({'pending': True})
+    report['consistent'] = (
+        not report['term_mismatches'] and not report['book_mismatches'] and not report['pending']
+        and report['corpus']['postings'] == report['corpus']['stats']
+    )
+    return report
+
+def rebuild_stats_from_postings(db):
+    """Recompute document_stats from search_index, then term_stats and corpus_stats from that"""
+    rebuild = f"{DOCUMENT_STATS_COLLECTION}_rebuild"
+    db.search_index.aggregate([
+        {'$group': {'_id': {'book': BOOK_KEY, 'word': '$word'}, 'frequency': {'$sum': '$frequency'}}},
+        {'$group': {
+            '_id': '$_id.book',
+            'word_frequencies': {'$push': {'k': '$_id.word', 'v': '$frequency'}},
+            'total_words': {'$sum': '$frequency'},
+            'unique_words': {'$sum': 1}
+        }},
+        {'$addFields': {'word_frequencies': {'$arrayToObject': '$word_frequencies'}}},
+        {'$out': rebuild}
+    ], allowDiskUse=True)
+    db.search_index.aggregate([
+        {'$group': {'_id': {'book': BOOK_KEY, 'page': '$page_number'}, 'length': {'$sum': '$frequency'}}},
+        {'$group': {
+            '_id': '$_id.book',
+            'page_lengths': {'$push': {'k': {'$toString': '$_id.page'}, 'v': '$length'}},
+            'indexed_pages': {'$sum': 1}
+        }},
+        {'$addFields': {'page_lengths': {'$arrayToObject': '$page_lengths'}}},
+        {'$merge': {'into': rebuild, 'on': '_id', 'whenMatched': 'merge', 'whenNotMatched': 'discard'}}
+    ], allowDiskUse=True)
+
+    db[rebuild].create_index('pending', sparse=True)
+    db.client.admin.command('renameCollection', f"{db.name}.{rebuild}",
+                            to=f"{db.name}.{DOCUMENT_STATS_COLLECTION}", dropTarget=True)
+    rebuild_term_stats(db)
@@ -1,24 +1,11 @@
-import nltk
 import re
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer
-from nltk.tokenize import word_tokenize
 from typing import List
 
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+from utils.analyzer import get_analyzer
 
 class TextProcessor:
     def __init__(self):
-        self.stemmer = PorterStemmer()
-        self.stop_words = set(stopwords.words('english'))
+        self.analyzer = get_analyzer()
     
     def clean_text(self, text: str) -> str:
         text = re.sub(r'[^a-zA-Z\s]', '', text)
@@ -27,16 +14,8 @@ class TextProcessor:
         return text
     
     def tokenize_and_process(self, text: str) -> List[str]:
-        cleaned_text = self.clean_text(text)
-        tokens = word_tokenize(cleaned_text)
-        
-        processed_tokens = [
-            self.stemmer.stem(token) 
-            for token in tokens 
-            if token not in self.stop_words and len(token) > 2
-        ]
-        
-        return processed_tokens
+        # Cleaning leaves only letters, so the shared filters match the old ones
+        return self.analyzer.analyze(self.clean_text(text))
     
     def extract_keywords(self, text: str, min_length: int = 3) -> List[str]:
         processed_tokens = self.tokenize_and_process(text)
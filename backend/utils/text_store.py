@@ -0,0 +1,190 @@
+# backend/utils/text_store.py
+import os
+import re
+import struct
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# File layout: MAGIC, zlib page blobs, page index, footer.
+# Index entries are (page_number, offset, length); the footer holds the
+# index offset and page count so a reader can jump straight to any page.
+MAGIC = b'BSTX'
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+INDEX_ENTRY = struct.Struct('<IQI')
+FOOTER = struct.Struct('<QI4s')
+COMPRESSION_LEVEL = 6
+
+class TextStoreWriter:
+    """Appends compressed pages as they arrive; the file appears atomically on close"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.temp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(self.temp_path, 'wb')
+        self.file.write(HEADER)
+        self.index = []
+
+    def add_page(self, page_number: int, text: str):
+        blob = zlib.compress((text or '').encode('utf-8'), COMPRESSION_LEVEL)
+        self.index.append((page_number, self.file.tell(), len(blob)))
+        self.file.write(blob)
+
+    def close(self):
+        index_offset = self.file.tell()
+        for entry in self.index:
+            self.file.write(INDEX_ENTRY.pack(*entry))
+        self.file.write(FOOTER.pack(index_offset, len(self.index), MAGIC))
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class TextStoreReader:
+    """Random access to individual pages of a stored document"""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        if self.file.read(len(HEADER)) != HEADER:
+            self.file.close()
+            raise ValueError(f"Not a text store file: {path}")
+
+        self.file.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, page_count, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+        if magic != MAGIC:
+            self.file.close()
+            raise ValueError(f"Truncated text store file: {path}")
+
+        self.file.seek(index_offset)
+        raw_index = self.file.read(INDEX_ENTRY.size * page_count)
+        self.index = {}
+        for i in range(page_count):
+            page_number, offset, length = INDEX_ENTRY.unpack_from(raw_index, i * INDEX_ENTRY.size)
+            self.index[page_number] = (offset, length)
+
+    @property
+    def page_numbers(self) -> List[int]:
+        return sorted(self.index)
+
+    def read_page(self, page_number: int) -> Optional[str]:
+        location = self.index.get(page_number)
+        if location is None:
+            return None
+        offset, length = location
+        self.file.seek(offset)
+        return zlib.decompress(self.file.read(length)).decode('utf-8')
+
+    def iter_pages(self) -> Iterator[Tuple[int, str]]:
+        for page_number in self.page_numbers:
+            yield page_number, self.read_page(page_number)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class TextStore:
+    """Extracted page text, persisted once per document content hash"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}.pages")
+
+    def has(self, content_hash: str) -> bool:
+        return bool(content_hash) and os.path.exists(self.path_for(content_hash))
+
+    def writer(self, content_hash: str) -> TextStoreWriter:
+        return TextStoreWriter(self.path_for(content_hash))
+
+    def reader(self, content_hash: str) -> TextStoreReader:
+        return TextStoreReader(self.path_for(content_hash))
+
+    def page_count(self, content_hash: str) -> int:
+        if not self.has(content_hash):
+            return 0
+        with self.reader(content_hash) as reader:
+            return len(reader.index)
+
+    def read_page(self, content_hash: str, page_number: int) -> Optional[str]:
+        if not self.has(content_hash):
+            return None
+        with self.reader(content_hash) as reader:
+            return reader.read_page(page_number)
+
+    def iter_pages(self, content_hash: str, extract_pages: Callable[[], Iterable[Tuple[int, str]]],
+                   fill_empty: Callable[[Iterable[Tuple[int, str]]], Iterable[Tuple[int, str]]] = None
+                   ) -> Iterator[Tuple[int, str]]:
+        """Yield stored pages, or extract them once and persist while yielding.
+
+        `fill_empty` gets another go at pages stored empty (OCR that failed
+        or was not available); the file is rewritten if it fills any.
+        """
+        if self.has(content_hash):
+            with self.reader(content_hash) as reader:
+                empty = {page for page, text in reader.iter_pages() if not text.strip()} if fill_empty else None
+                if not empty:
+                    yield from reader.iter_pages()
+                    return
+
+                writer = self.writer(content_hash)
+                filled = False
+                try:
+                    for page_number, text in fill_empty(reader.iter_pages()):
+                        filled = filled or (page_number in empty and bool(text.strip()))
+                        writer.add_page(page_number, text)
+                        yield page_number, text
+                except BaseException:
+                    writer.abort()
+                    raise
+            if filled:
+                writer.close()
+            else:
+                writer.abort()
+            return
+
+        with self.writer(content_hash) as writer:
+            for page_number, text in extract_pages():
+                writer.add_page(page_number, text)
+                yield page_number, text
+
+    def stats(self) -> Dict:
+        """Document count and on-disk size of the store"""
+        documents = 0
+        total_bytes = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith('.pages'):
+                    documents += 1
+                    total_bytes += os.path.getsize(os.path.join(directory, name))
+        return {'documents': documents, 'bytes': total_bytes}
+
+def make_snippet(text: str, terms: Iterable[str], width: int = 160) -> str:
+    """Short excerpt around the first occurrence of any (stemmed) query term"""
+    if not text:
+        return ''
+
+    flat = ' '.join(text.split())
+    pattern = '|'.join(re.escape(term) for term in terms if term)
+    match = re.search(rf"\b(?:{pattern})", flat, re.IGNORECASE) if pattern else None
+    start = max(0, match.start() - width // 2) if match else 0
+    return flat[start:start + width]
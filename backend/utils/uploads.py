@@ -0,0 +1,221 @@
+# backend/utils/uploads.py
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from werkzeug.exceptions import Conflict, NotFound, RequestEntityTooLarge, UnsupportedMediaType
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+# Leading bytes every file of the format must start with; text formats just must not be binary
+FILE_SIGNATURES = {'.pdf': b'%PDF-', '.docx': b'PK\x03\x04'}
+SNIFF_BYTES = 1024
+
+def save_and_hash(file_storage, file_path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[str, int]:
+    """Copy an uploaded file to disk in chunks, computing its SHA-256 on the way"""
+    digest = hashlib.sha256()
+    size = 0
+
+    with open(file_path, 'wb') as destination:
+        while True:
+            chunk = file_storage.stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            destination.write(chunk)
+            size += len(chunk)
+
+    return digest.hexdigest(), size
+
+def hash_file(file_path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    """SHA-256 of a file already on disk, matching save_and_hash"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as source:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def check_signature(extension: str, head: bytes) -> bool:
+    """Do the first bytes of an upload look like the format its name claims?"""
+    signature = FILE_SIGNATURES.get(extension)
+    if signature:
+        return head.startswith(signature)
+    return b'\x00' not in head
+
+class StreamingUploadWriter:
+    """File-like sink for one multipart file part.
+
+    Chunks go straight to the final upload path while being hashed, so the
+    body is never buffered in memory or spooled to a temp file. The size
+    limit and format signature are enforced as bytes arrive; a rejected
+    upload is deleted and the request fails before the rest is read.
+    """
+
+    def __init__(self, file_path: str, extension: str, max_bytes: int):
+        self.path = file_path
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+        self.checked = False
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        self.file = open(file_path, 'w+b')
+
+    @property
+    def content_hash(self) -> str:
+        return self.digest.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            self.discard()
+            raise RequestEntityTooLarge(f"Upload exceeds {self.max_bytes // (1024 * 1024)}MB")
+
+        if not self.checked:
+            self.head += data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self._check_head()
+
+        self.digest.update(data)
+        return self.file.write(data)
+
+    def _check_head(self):
+        self.checked = True
+        if not check_signature(self.extension, self.head):
+            self.discard()
+            raise UnsupportedMediaType(f"File content is not a valid {self.extension} document")
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        # The form parser rewinds once the part is complete; small files are checked here
+        if not self.checked:
+            self._check_head()
+        return self.file.seek(offset, whence)
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.file.closed
+
+    def discard(self):
+        """Close and delete the partial file"""
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class ResumableUploads:
+    """Chunked uploads that survive dropped connections.
+
+    Each upload is a `<id>.part` file plus a `<id>.json` session record in
+    `root`. Clients send chunks at the current offset and can ask for that
+    offset again after a failure; nothing is kept in memory between requests.
+    """
+
+    UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+    def __init__(self, root: str, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, upload_id: str) -> Tuple[str, str]:
+        if not self.UPLOAD_ID.match(upload_id or ''):
+            raise NotFound('Upload not found')
+        base = os.path.join(self.root, upload_id)
+        return f"{base}.part", f"{base}.json"
+
+    def create(self, filename: str, size: int, metadata: Dict) -> Dict:
+        extension = os.path.splitext(filename)[1].lower()
+        if size <= 0:
+            raise ValueError('Upload size must be positive')
+        if size > self.max_bytes:
+            raise RequestEntityTooLarge(f"Upload exceeds {self.max_bytes // (1024 * 1024)}MB")
+
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._paths(upload_id)
+        session = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'extension': extension,
+            'size': size,
+            'metadata': metadata,
+            'created_at': datetime.now().isoformat()
+        }
+        open(part_path, 'wb').close()
+        with open(meta_path, 'w') as file:
+            json.dump(session, file)
+        return dict(session, offset=0)
+
+    def get(self, upload_id: str) -> Optional[Dict]:
+        part_path, meta_path = self._paths(upload_id)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as file:
+            session = json.load(file)
+        session['offset'] = os.path.getsize(part_path)
+        return session
+
+    def append(self, upload_id: str, offset: int, stream) -> int:
+        """Append a chunk read from `stream` at `offset`; returns the new offset"""
+        with self._lock:
+            session = self.get(upload_id)
+            if session is None:
+                raise NotFound('Upload not found')
+            if offset != session['offset']:
+                raise Conflict(f"Expected offset {session['offset']}")
+
+            part_path, _ = self._paths(upload_id)
+            position = offset
+            with open(part_path, 'ab') as part:
+                try:
+                    for chunk in iter(lambda: stream.read(self.chunk_size), b''):
+                        if position + len(chunk) > session['size']:
+                            raise RequestEntityTooLarge('Chunk runs past the declared upload size')
+                        if position == 0 and not check_signature(session['extension'], chunk[:SNIFF_BYTES]):
+                            raise UnsupportedMediaType(
+                                f"File content is not a valid {session['extension']} document"
+                            )
+                        part.write(chunk)
+                        position += len(chunk)
+                except Exception:
+                    # Roll back to the last good offset so the client can retry the chunk
+                    part.truncate(offset)
+                    raise
+            return position
+
+    def complete(self, upload_id: str, destination: str) -> Tuple[str, int]:
+        """Move a fully received upload into place; returns (sha256, size)"""
+        with self._lock:
+            session = self.get(upload_id)
+            if session is None:
+                raise NotFound('Upload not found')
+            if session['offset'] != session['size']:
+                raise Conflict(f"Upload incomplete: {session['offset']} of {session['size']} bytes")
+
+            part_path, meta_path = self._paths(upload_id)
+            os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+            os.replace(part_path, destination)
+            os.remove(meta_path)
+        return hash_file(destination), session['size']
+
+    def discard(self, upload_id: str):
+        for path in self._paths(upload_id):
+            if os.path.exists(path):
+                os.remove(path)